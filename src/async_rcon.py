@@ -0,0 +1,430 @@
+"""Asyncio RCON client that pipelines many commands on one connection."""
+import asyncio
+import itertools
+import logging
+import struct
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Packet types (the Source RCON protocol, as Minecraft implements it)
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+# Any unknown type: the server answers "Unknown request c8" with the same request ID.
+# Sent after each command, its reply marks the end of that command's (possibly split) response.
+SENTINEL_TYPE = 200
+
+_HEADER = struct.Struct('<iii')  # length, request ID, type
+RESPONSE_SPLIT_BYTES = 4096  # The server splits longer replies into packets of this many UTF-8 bytes
+MAX_PACKET_SIZE = 4 * RESPONSE_SPLIT_BYTES + _HEADER.size + 2  # Largest packet (also fits 4096 characters of UTF-8)
+
+Packet = Tuple[int, int, str]  # (request ID, type, body)
+
+
+class RCONError(RuntimeError):
+    """Raised when the RCON connection fails, authentication is refused or a reply times out."""
+
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    """
+    Encode one RCON packet.
+    
+    Args:
+        request_id: ID the server echoes back in its reply
+        packet_type: SERVERDATA_* type
+        body: Command or password
+    
+    Returns:
+        Length-prefixed packet (body and an empty string, both NUL terminated)
+    """
+    payload = body.encode('utf-8')
+    return _HEADER.pack(_HEADER.size - 4 + len(payload) + 2, request_id, packet_type) + payload + b'\x00\x00'
+
+
+class PacketDecoder:
+    """Incremental decoder: feed it bytes as they arrive, get back whole packets."""
+    
+    def __init__(self):
+        self._buffer = bytearray()
+    
+    def feed(self, data: bytes) -> List[Packet]:
+        """
+        Add received bytes and decode every packet they complete.
+        
+        Returns:
+            Complete packets in arrival order (a partial packet stays buffered)
+        """
+        self._buffer += data
+        packets = []
+        while len(self._buffer) >= 4:
+            (length,) = struct.unpack_from('<i', self._buffer)
+            if length < _HEADER.size - 4 + 2 or length > MAX_PACKET_SIZE:
+                raise RCONError(f"Malformed RCON packet (length {length})")
+            if len(self._buffer) < 4 + length:
+                break
+            _, request_id, packet_type = _HEADER.unpack_from(self._buffer)
+            body = bytes(self._buffer[_HEADER.size:4 + length - 2])
+            del self._buffer[:4 + length]
+            packets.append((request_id, packet_type, body.decode('utf-8', errors='replace')))
+        return packets
+
+
+class _Request:
+    """A command waiting for its reply."""
+    
+    __slots__ = ('fragments', 'future', 'sentinel_id')
+    
+    def __init__(self, future: asyncio.Future):
+        self.fragments: List[str] = []
+        self.future = future
+        self.sentinel_id: Optional[int] = None
+
+
+class AsyncRCON:
+    """
+    One RCON connection with any number of commands in flight.
+    
+    Commands are written back to back without waiting for replies; a reader task
+    matches replies to waiting callers by request ID. The server may split a long
+    reply into several packets with no end marker, so every command is followed by
+    a sentinel packet: the server answers in order, so the sentinel's reply means
+    the command's reply is complete.
+    
+    Vanilla's RCON reader expects exactly one packet per read and drops the
+    connection otherwise, so the default is pipeline=False: one command is on the
+    wire at a time, and a sentinel is only sent after a reply packet that may have
+    been split (4096 characters long). A pipelined connection that fails switches
+    itself to serial mode for good.
+    """
+    
+    def __init__(self, host: str, port: int, password: str, timeout: float = 10.0, pipeline: bool = False):
+        """
+        Initialize the client (connects on first use).
+        
+        Args:
+            host: Server host
+            port: RCON port
+            password: RCON password
+            timeout: Seconds to wait for a connection, login or reply
+            pipeline: Send commands without waiting for earlier replies
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.pipeline = pipeline
+        self._reader_task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._serial_lock: Optional[asyncio.Lock] = None  # One command at a time when not pipelining
+        self._ids = itertools.count(1)
+        self._requests: Dict[int, _Request] = {}  # Command ID -> request
+        self._sentinels: Dict[int, int] = {}  # Sentinel ID -> command ID
+        self.commands_sent = 0
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the connection is open and logged in."""
+        return self._reader_task is not None and not self._reader_task.done()
+    
+    async def connect(self) -> None:
+        """Open the connection and log in (no-op if already connected)."""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+            self._serial_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self._writer is not None:
+                self._writer.close()  # Left over from a connection the server dropped
+                self._writer = None
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise RCONError(f"Cannot connect to RCON at {self.host}:{self.port}: {e}") from e
+            try:
+                await asyncio.wait_for(self._login(reader, writer), self.timeout)
+            except asyncio.TimeoutError as e:
+                writer.close()
+                raise RCONError("RCON login timed out") from e
+            except BaseException:
+                writer.close()
+                raise
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_replies(reader, PacketDecoder()))
+            logger.info(f"Async RCON connected to {self.host}:{self.port}")
+    
+    async def _login(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Send the password and wait for the server to accept it."""
+        login_id = self._next_id()
+        writer.write(encode_packet(login_id, SERVERDATA_AUTH, self.password))
+        await writer.drain()
+        decoder = PacketDecoder()
+        while True:
+            data = await reader.read(MAX_PACKET_SIZE)
+            if not data:
+                raise RCONError("RCON connection closed during login")
+            for request_id, packet_type, _ in decoder.feed(data):
+                if packet_type != SERVERDATA_AUTH_RESPONSE:
+                    continue  # Some servers send an empty RESPONSE_VALUE first
+                if request_id == -1:
+                    raise RCONError("RCON login refused (wrong password?)")
+                if request_id == login_id:
+                    return
+    
+    async def close(self) -> None:
+        """Close the connection; commands still waiting fail with RCONError."""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending(RCONError("RCON connection closed"))
+    
+    def _next_id(self) -> int:
+        """Next request ID (positive 32-bit; -1 is the server's login failure marker)."""
+        request_id = next(self._ids)
+        if request_id >= 2 ** 31:
+            self._ids = itertools.count(1)
+            request_id = next(self._ids)
+        return request_id
+    
+    async def command(self, command: str) -> str:
+        """
+        Run one command and return the server's full reply.
+        
+        Raises:
+            RCONError: Connection failed or no reply within the timeout
+        """
+        return (await self.commands([command]))[0]
+    
+    async def commands(self, commands: Sequence[str]) -> List[str]:
+        """
+        Run commands pipelined: all are sent at once, then every reply is awaited.
+        
+        The server still runs them one at a time in order, but the round trips overlap,
+        so N commands cost about one round trip instead of N (with pipeline=False they
+        go one after another).
+        
+        Returns:
+            Replies in the same order as commands
+        
+        Raises:
+            RCONError: Connection failed or a reply didn't arrive within the timeout
+        """
+        if not commands:
+            return []
+        await self.connect()
+        if not self.pipeline:
+            replies = []
+            async with self._serial_lock:
+                for command in commands:
+                    replies.extend(await self._send(command))
+            return replies
+        try:
+            return await self._send(*commands)
+        except RCONError:
+            # Most likely a server that reads one packet per buffer and dropped the batch
+            logger.warning("Pipelined RCON commands failed, switching this connection to serial mode")
+            self.pipeline = False
+            raise
+    
+    async def _send(self, *commands: str) -> List[str]:
+        """Write commands (with sentinels when pipelining) and wait for their replies."""
+        loop = asyncio.get_running_loop()
+        command_ids = []
+        data = bytearray()
+        for command in commands:
+            command_id = self._next_id()
+            request = self._requests[command_id] = _Request(loop.create_future())
+            command_ids.append(command_id)
+            data += encode_packet(command_id, SERVERDATA_EXECCOMMAND, command)
+            if self.pipeline:
+                data += self._sentinel(command_id, request)
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except (OSError, AttributeError) as e:
+            self._forget(command_ids)
+            raise RCONError(f"RCON write failed: {e}") from e
+        self.commands_sent += len(commands)
+        
+        futures = [self._requests[command_id].future for command_id in command_ids]
+        try:
+            return list(await asyncio.wait_for(asyncio.gather(*futures), self.timeout))
+        except asyncio.TimeoutError as e:
+            self._forget(command_ids)
+            raise RCONError(f"No RCON reply within {self.timeout:.0f}s") from e
+    
+    def _sentinel(self, command_id: int, request: _Request) -> bytes:
+        """Register and encode the sentinel that closes a command's reply."""
+        sentinel_id = request.sentinel_id = self._next_id()
+        self._sentinels[sentinel_id] = command_id
+        return encode_packet(sentinel_id, SENTINEL_TYPE, '')
+    
+    def _forget(self, command_ids: List[int]) -> None:
+        """Stop waiting for replies to the given commands (late replies are dropped)."""
+        for command_id in command_ids:
+            request = self._requests.pop(command_id, None)
+            if request is None:
+                continue
+            self._sentinels.pop(request.sentinel_id, None)
+            if not request.future.done():
+                request.future.cancel()
+    
+    def _finish(self, command_id: int) -> None:
+        """Hand a command its reassembled reply."""
+        request = self._requests.pop(command_id, None)
+        if request is not None and not request.future.done():
+            request.future.set_result(''.join(request.fragments))
+    
+    async def _read_replies(self, reader: asyncio.StreamReader, decoder: PacketDecoder) -> None:
+        """Reader task: route reply packets to the commands waiting for them."""
+        error: Exception = RCONError("RCON connection closed by server")
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for request_id, _, body in decoder.feed(data):
+                    request = self._requests.get(request_id)
+                    if request is not None:
+                        request.fragments.append(body)
+                        if request.sentinel_id is None:
+                            # Not pipelining: a short packet can't have been split (the limit
+                            # is in bytes, so non-ASCII text splits well below 4096 characters)
+                            if len(body.encode('utf-8')) < RESPONSE_SPLIT_BYTES:
+                                self._finish(request_id)
+                            else:
+                                self._writer.write(self._sentinel(request_id, request))
+                        continue
+                    command_id = self._sentinels.pop(request_id, None)
+                    if command_id is not None:
+                        self._finish(command_id)
+                    # Otherwise: reply to a command that timed out
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Async RCON connection lost: {e}")
+            error = RCONError(f"RCON connection lost: {e}")
+        self._fail_pending(error)
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every command still waiting for a reply."""
+        requests, self._requests = self._requests, {}
+        self._sentinels = {}
+        for request in requests.values():
+            if not request.future.done():
+                request.future.set_exception(error)
+
+
+class AsyncRCONPool:
+    """
+    Several logged-in RCON connections to one server.
+    
+    A batch of commands is split into contiguous slices, one per connection, and
+    the slices run concurrently; each connection is checked out by one slice at a
+    time. A connection that fails is closed and reopened on its next checkout, and
+    its slice is retried once; the retry, and every later batch, runs serially
+    (one command on the wire at a time), which every server accepts.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        size: int = 4,
+        timeout: float = 10.0,
+        pipeline: bool = False,
+    ):
+        """
+        Initialize the pool (connections open on first use).
+        
+        Args:
+            host: Server host
+            port: RCON port
+            password: RCON password
+            size: Number of connections
+            timeout: Seconds to wait for a connection, login or reply
+            pipeline: Pipeline commands on each connection (see AsyncRCON)
+        """
+        self.size = max(1, size)
+        self.connections = [
+            AsyncRCON(host, port, password, timeout=timeout, pipeline=pipeline) for _ in range(self.size)
+        ]
+        self._idle: Optional[asyncio.Queue] = None  # Created on the event loop at first checkout
+        self.reconnects = 0
+    
+    @property
+    def connected(self) -> int:
+        """Number of connections currently open."""
+        return sum(1 for connection in self.connections if connection.connected)
+    
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncRCON]:
+        """Check out an idle connection, waiting if all are busy."""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for connection in self.connections:
+                self._idle.put_nowait(connection)
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+    
+    async def commands(self, commands: Sequence[str]) -> List[Optional[str]]:
+        """
+        Run commands split across the pool's connections.
+        
+        Commands in one slice run in order; slices run concurrently, so commands must
+        not depend on each other's order (fills of different areas don't).
+        
+        Returns:
+            Replies in the same order as commands; None for a slice that failed twice
+        """
+        if not commands:
+            return []
+        slices = min(self.size, len(commands))
+        step = -(-len(commands) // slices)
+        parts = [list(commands[i:i + step]) for i in range(0, len(commands), step)]
+        replies = await asyncio.gather(*(self._run_slice(part) for part in parts))
+        return [reply for part in replies for reply in part]
+    
+    async def _run_slice(self, commands: List[str]) -> List[Optional[str]]:
+        """Run commands on one checked-out connection, reconnecting and retrying once on failure."""
+        for attempt in range(2):
+            async with self.connection() as connection:
+                try:
+                    return list(await connection.commands(commands))
+                except RCONError as e:
+                    # Reopened on its next checkout; fills are idempotent, so resending is safe
+                    await connection.close()
+                    self.reconnects += 1
+                    if attempt == 0:
+                        self._serial()
+                        logger.warning(f"RCON connection failed, retrying {len(commands)} commands serially: {e}")
+                        continue
+                    logger.error(f"Error executing {len(commands)} RCON commands: {e}")
+        return [None] * len(commands)
+    
+    def _serial(self) -> None:
+        """Stop pipelining on every connection (the server may not accept it)."""
+        for connection in self.connections:
+            connection.pipeline = False
+    
+    async def close(self) -> None:
+        """Close every connection."""
+        for connection in self.connections:
+            await connection.close()
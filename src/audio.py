@@ -0,0 +1,358 @@
+"""Audio buffering and format conversion for per-speaker voice streams."""
+import logging
+from typing import List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import webrtcvad
+except ImportError:
+    # Optional: the speech gate falls back to energy-only detection
+    webrtcvad = None
+
+logger = logging.getLogger(__name__)
+
+# Discord voice sends PCM at 48kHz STEREO (2 channels); Whisper expects 16kHz mono
+DISCORD_PCM_RATE = 48000
+DISCORD_CHANNELS = 2  # Discord sends stereo
+WHISPER_SAMPLE_RATE = 16000
+# Resample ratio: 48k -> 16k = 1/3
+RESAMPLE_RATIO = DISCORD_PCM_RATE // WHISPER_SAMPLE_RATE  # 3
+
+# Speech gate analysis frame: 20ms at 16kHz (one Discord packet)
+GATE_FRAME_SAMPLES = WHISPER_SAMPLE_RATE // 50
+GATE_FRAME_MS = 20
+
+# Anti-alias filter: 96 taps (32 per polyphase branch), Kaiser window (beta 8, ~2.5kHz transition).
+# Flat (-0.1dB) to ~6kHz, -40dB at the 8kHz output Nyquist, stopband (~-80dB) from ~8.3kHz.
+# The 8-8.3kHz band folds onto 7.7-8kHz, above anything Whisper needs from speech.
+DECIMATOR_TAPS = 96
+DECIMATOR_CUTOFF_HZ = 7000
+DECIMATOR_KAISER_BETA = 8.0
+
+
+def design_lowpass(num_taps: int, cutoff_hz: float, sample_rate: int, beta: float = DECIMATOR_KAISER_BETA) -> np.ndarray:
+    """Design a Kaiser-windowed sinc low-pass FIR filter with unity DC gain."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = np.sinc(2 * cutoff_hz / sample_rate * n) * np.kaiser(num_taps, beta)
+    return taps / taps.sum()
+
+
+class SpeakerRingBuffer:
+    """
+    Fixed-capacity ring buffer of audio samples for a single speaker.
+    
+    Every sample is written twice (at ``i`` and ``i + capacity``) into a backing
+    array of twice the capacity, so any run of up to ``capacity`` samples is
+    contiguous in memory. Appends are O(1) per sample and :meth:`peek` always
+    returns a zero-copy view, even when the window wraps around the ring.
+    When the ring is full the oldest samples are overwritten.
+    """
+    
+    def __init__(self, capacity: int, dtype=np.float32):
+        """
+        Initialize the ring buffer.
+        
+        Args:
+            capacity: Maximum number of samples held before the oldest are dropped
+            dtype: Sample dtype (float32 for converted 16kHz audio)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._start = 0  # Index of the oldest unread sample (0 <= _start < capacity)
+        self._size = 0
+        self.dropped_samples = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest ones if the ring is full."""
+        n = len(samples)
+        if n == 0:
+            return
+        cap = self.capacity
+        if n >= cap:
+            # Only the newest `capacity` samples can survive
+            self.dropped_samples += self._size + n - cap
+            samples = samples[-cap:]
+            n = cap
+            self._start = 0
+            self._size = 0
+        
+        end = (self._start + self._size) % cap
+        first = min(n, cap - end)
+        # Primary copy plus its mirror in the second half
+        self._data[end:end + first] = samples[:first]
+        self._data[end + cap:end + cap + first] = samples[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = samples[first:]
+            self._data[cap:cap + rest] = samples[first:]
+        
+        overflow = self._size + n - cap
+        if overflow > 0:
+            self.dropped_samples += overflow
+            self._start = (self._start + overflow) % cap
+            self._size = cap
+        else:
+            self._size += n
+    
+    def peek(self, n: int) -> np.ndarray:
+        """Return a zero-copy view of the oldest ``n`` samples (without consuming them)."""
+        n = min(n, self._size)
+        return self._data[self._start:self._start + n]
+    
+    def peek_latest(self, n: int) -> np.ndarray:
+        """Return a zero-copy view of the newest ``n`` samples (without consuming them)."""
+        n = min(n, self._size)
+        end = self._start + self._size
+        return self._data[end - n:end]
+    
+    def consume(self, n: int) -> None:
+        """Discard the oldest ``n`` samples."""
+        n = min(n, self._size)
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+    
+    def clear(self) -> None:
+        """Drop all buffered samples."""
+        self._start = 0
+        self._size = 0
+
+
+class DiscordPcmConverter:
+    """
+    Fused converter from Discord PCM to Whisper input.
+    
+    Goes straight from interleaved int16 48kHz stereo to float32 16kHz mono in one
+    vectorized pass: L+R are summed into a float32 work buffer, then a polyphase FIR
+    decimator evaluates the anti-alias filter only at every 3rd output position.
+    The stereo average, int16 normalization and gain are folded into the filter
+    taps, and the filter history is kept across packets so consecutive 20ms frames
+    are filtered as one continuous stream. One converter per speaker.
+    """
+    
+    def __init__(self, gain: float = 1.0, num_taps: int = DECIMATOR_TAPS):
+        """
+        Initialize the converter.
+        
+        Args:
+            gain: Linear gain applied to the output (output is clipped to [-1.0, 1.0])
+            num_taps: FIR filter length
+        """
+        taps = design_lowpass(num_taps, DECIMATOR_CUTOFF_HZ, DISCORD_PCM_RATE)
+        # Average of two channels (0.5) and int16 -> [-1.0, 1.0] (1/32768) folded in
+        taps = taps * (gain * 0.5 / 32768.0)
+        self._taps_rev = np.ascontiguousarray(taps[::-1], dtype=np.float32)
+        self.num_taps = num_taps
+        # Work buffer: filter history followed by the newest mono samples.
+        # Starts with num_taps - 1 zeros so the first output lines up with the first input.
+        self._work = np.zeros(num_taps - 1 + DISCORD_PCM_RATE // 50, dtype=np.float32)
+        self._pending = num_taps - 1
+        self._out = np.zeros(self.max_output(DISCORD_PCM_RATE // 50), dtype=np.float32)
+    
+    def max_output(self, n_frames: int) -> int:
+        """Upper bound on output samples produced for ``n_frames`` stereo frames."""
+        return (self.num_taps + 1 + n_frames) // RESAMPLE_RATIO + 1
+    
+    def reset(self) -> None:
+        """Clear the filter history (e.g. between unrelated streams)."""
+        self._work[:self.num_taps - 1] = 0.0
+        self._pending = self.num_taps - 1
+    
+    def process(self, pcm, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Convert one chunk of Discord PCM.
+        
+        Args:
+            pcm: Interleaved int16 48kHz stereo PCM (bytes, memoryview or int16 array)
+            out: Optional preallocated float32 output buffer of at least
+                 ``max_output(frames)`` samples; an internal buffer is reused otherwise
+        
+        Returns:
+            View of the output buffer holding the new 16kHz mono float32 samples
+        """
+        samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        n_frames = len(samples) // DISCORD_CHANNELS
+        frames = samples[:n_frames * DISCORD_CHANNELS].reshape(-1, DISCORD_CHANNELS)
+        
+        start = self._pending
+        end = start + n_frames
+        if end > len(self._work):
+            grown = np.zeros(end, dtype=np.float32)
+            grown[:start] = self._work[:start]
+            self._work = grown
+        # Downmix straight into the work buffer (scaling lives in the taps)
+        np.add(frames[:, 0], frames[:, 1], out=self._work[start:end], dtype=np.float32)
+        
+        if out is None:
+            if len(self._out) < self.max_output(n_frames):
+                self._out = np.zeros(self.max_output(n_frames), dtype=np.float32)
+            out = self._out
+        
+        n_out = (end - self.num_taps) // RESAMPLE_RATIO + 1 if end >= self.num_taps else 0
+        result = out[:n_out]
+        if n_out:
+            # Polyphase evaluation: only the windows ending on kept samples are computed
+            windows = sliding_window_view(self._work[:end], self.num_taps)[::RESAMPLE_RATIO][:n_out]
+            np.matmul(windows, self._taps_rev, out=result)
+            np.clip(result, -1.0, 1.0, out=result)
+        
+        # Keep the unconsumed tail as history for the next packet
+        consumed = n_out * RESAMPLE_RATIO
+        self._pending = end - consumed
+        self._work[:self._pending] = self._work[consumed:end]
+        return result
+
+
+class SpeechGate:
+    """
+    Cheap streaming speech detector for one speaker, run on 20ms frames at ingest.
+    
+    A frame counts as speech when its energy is above both an absolute floor and
+    an adaptive noise floor by ``snr_db``. Frames that pass the energy test can
+    optionally be confirmed by WebRTC VAD (if ``webrtcvad`` is installed).
+    Windows with too little speech never need to reach Whisper.
+    """
+    
+    def __init__(self, threshold_db: float = -50.0, snr_db: float = 10.0, vad_mode: int = -1):
+        """
+        Initialize the gate.
+        
+        Args:
+            threshold_db: Absolute energy floor in dBFS; quieter frames are never speech
+            snr_db: Required margin above the tracked noise floor
+            vad_mode: WebRTC VAD aggressiveness 0-3, or -1 for energy only
+        """
+        self.threshold_db = threshold_db
+        self.snr_db = snr_db
+        self.noise_floor_db = threshold_db
+        self._vad = None
+        if vad_mode >= 0:
+            if webrtcvad is None:
+                logger.warning("webrtcvad not installed, speech gate uses energy only. Install with: pip install webrtcvad")
+            else:
+                self._vad = webrtcvad.Vad(vad_mode)
+        # Leftover samples that don't fill a whole frame yet
+        self._partial = np.zeros(GATE_FRAME_SAMPLES, dtype=np.float32)
+        self._partial_len = 0
+        self.last_frame_speech = False
+    
+    def _classify(self, frame: np.ndarray) -> bool:
+        """Classify one frame and update the noise floor."""
+        energy_db = 10.0 * np.log10(float(np.dot(frame, frame)) / GATE_FRAME_SAMPLES + 1e-10)
+        if energy_db < self.noise_floor_db:
+            # Follow drops in background noise quickly...
+            self.noise_floor_db = 0.5 * self.noise_floor_db + 0.5 * energy_db
+        else:
+            # ...and rises slowly, so speech doesn't drag the floor up
+            self.noise_floor_db += 0.005 * (energy_db - self.noise_floor_db)
+        self.noise_floor_db = max(self.noise_floor_db, -100.0)
+        
+        is_speech = energy_db >= max(self.threshold_db, self.noise_floor_db + self.snr_db)
+        if is_speech and self._vad is not None:
+            pcm16 = (frame * 32767.0).astype(np.int16).tobytes()
+            is_speech = self._vad.is_speech(pcm16, WHISPER_SAMPLE_RATE)
+        self.last_frame_speech = is_speech
+        return is_speech
+    
+    def process(self, samples: np.ndarray) -> int:
+        """
+        Classify 16kHz mono float32 samples in 20ms frames.
+        
+        Returns:
+            Number of complete frames classified as speech
+        """
+        return sum(self.classify(samples))
+    
+    def classify(self, samples: np.ndarray) -> List[bool]:
+        """
+        Classify 16kHz mono float32 samples in 20ms frames.
+        
+        Returns:
+            One speech/non-speech decision per completed frame, in order
+        """
+        decisions = []
+        if self._partial_len:
+            # Complete the frame left over from the previous call first
+            take = min(GATE_FRAME_SAMPLES - self._partial_len, len(samples))
+            self._partial[self._partial_len:self._partial_len + take] = samples[:take]
+            self._partial_len += take
+            samples = samples[take:]
+            if self._partial_len < GATE_FRAME_SAMPLES:
+                return decisions
+            self._partial_len = 0
+            decisions.append(self._classify(self._partial))
+        
+        n_frames = len(samples) // GATE_FRAME_SAMPLES
+        for frame in samples[:n_frames * GATE_FRAME_SAMPLES].reshape(-1, GATE_FRAME_SAMPLES):
+            decisions.append(self._classify(frame))
+        
+        rest = len(samples) - n_frames * GATE_FRAME_SAMPLES
+        if rest:
+            self._partial[:rest] = samples[n_frames * GATE_FRAME_SAMPLES:]
+            self._partial_len = rest
+        return decisions
+
+
+class UtteranceSegmenter:
+    """
+    Endpointing state machine driven by per-frame speech decisions.
+    
+    An utterance opens once ``min_speech_ms`` of consecutive speech is seen and
+    closes after ``trailing_silence_ms`` of silence, or is split when it reaches
+    ``max_ms`` so long monologues still get transcribed.
+    """
+    
+    START = 'start'
+    END = 'end'
+    SPLIT = 'split'  # Max length reached mid-speech: end this utterance and start the next
+    
+    def __init__(self, trailing_silence_ms: int = 400, max_ms: int = 8000, min_speech_ms: int = 60):
+        """
+        Initialize the segmenter.
+        
+        Args:
+            trailing_silence_ms: Silence that closes an utterance
+            max_ms: Maximum utterance length before it is force-split
+            min_speech_ms: Consecutive speech needed to open an utterance
+        """
+        self.trailing_silence_frames = max(1, trailing_silence_ms // GATE_FRAME_MS)
+        self.max_frames = max(1, max_ms // GATE_FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // GATE_FRAME_MS)
+        self.in_utterance = False
+        self.utterance_frames = 0
+        self._speech_run = 0
+        self._silence_run = 0
+    
+    def push(self, is_speech: bool) -> Optional[str]:
+        """Feed one frame decision; returns START, END, SPLIT or None."""
+        if not self.in_utterance:
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self.min_speech_frames:
+                self.in_utterance = True
+                self.utterance_frames = self._speech_run
+                self._silence_run = 0
+                return self.START
+            return None
+        
+        self.utterance_frames += 1
+        self._silence_run = 0 if is_speech else self._silence_run + 1
+        if self._silence_run >= self.trailing_silence_frames:
+            self.reset()
+            return self.END
+        if self.utterance_frames >= self.max_frames:
+            self.utterance_frames = 0
+            return self.SPLIT
+        return None
+    
+    def reset(self) -> None:
+        """Return to the idle state."""
+        self.in_utterance = False
+        self.utterance_frames = 0
+        self._speech_run = 0
+        self._silence_run = 0
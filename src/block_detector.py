@@ -1,15 +1,106 @@
 """Block word detection from transcripts."""
 import json
 import logging
+import os
 import re
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 
 from .config import Config
+from .phonetic import FuzzyIndex
 
 logger = logging.getLogger(__name__)
 
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Spoken numbers Whisper may write out instead of digits ("five blocks")
+_NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18,
+    'nineteen': 19, 'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50,
+}
+# Words announcing a radius before the number ("radius 5", "within five")
+_RADIUS_BEFORE = frozenset(('radius', 'range', 'within'))
+# Words marking a radius after the number ("5 blocks")
+_RADIUS_AFTER = frozenset(('block', 'blocks'))
+
+
+def _number(tokens: Tuple[str, ...], i: int) -> Optional[Tuple[int, int]]:
+    """
+    Number starting at token i.
+    
+    Returns:
+        (value, tokens used), or None if tokens[i] isn't a number
+    """
+    token = tokens[i]
+    if token.isdigit():
+        return int(token), 1
+    value = _NUMBER_WORDS.get(token)
+    if value is None:
+        return None
+    # "twenty five"
+    if value >= 20 and i + 1 < len(tokens) and 0 < _NUMBER_WORDS.get(tokens[i + 1], 0) < 10:
+        return value + _NUMBER_WORDS[tokens[i + 1]], 2
+    return value, 1
+
+
+@lru_cache(maxsize=256)
+def _parse_radius(tokens: Tuple[str, ...]) -> Optional[int]:
+    """
+    First radius stated in normalized tokens, in one pass.
+    
+    A number counts only next to a radius word ("radius 5", "radius of five",
+    "within five", "in 5 blocks", "five blocks"). Cached because streaming mode checks the
+    same transcript more than once.
+    """
+    for i in range(len(tokens)):
+        number = _number(tokens, i)
+        if number is None:
+            continue
+        value, used = number
+        after = i + used
+        if i > 0 and tokens[i - 1] in _RADIUS_BEFORE:
+            return value
+        if i > 1 and tokens[i - 1] == 'of' and tokens[i - 2] in _RADIUS_BEFORE:  # "radius of 5"
+            return value
+        if after < len(tokens) and tokens[after] in _RADIUS_AFTER:
+            return value
+    return None
+
+
+class _TrieNode:
+    """Node in the word-token trie; word is the block word key ending here."""
+    
+    __slots__ = ('children', 'word')
+    
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.word: Optional[str] = None
+
+
+class _CompiledWords:
+    """Block words and the indexes built from them; replaced whole, never mutated."""
+    
+    __slots__ = ('block_words', 'trie', 'fuzzy', 'fuzzy_words', 'max_tokens')
+    
+    def __init__(
+        self,
+        block_words: Dict[str, str],
+        trie: _TrieNode,
+        fuzzy: Optional[FuzzyIndex] = None,
+        fuzzy_words: Optional[Dict[str, str]] = None,
+        max_tokens: int = 0,
+    ):
+        self.block_words = block_words
+        self.trie = trie
+        self.fuzzy = fuzzy
+        self.fuzzy_words = fuzzy_words or {}  # Fuzzy index entry (letters, no spaces) -> block word
+        self.max_tokens = max_tokens
+
 
 class BlockDetector:
     """Detects Minecraft block names from transcribed text."""
@@ -17,16 +108,29 @@ class BlockDetector:
     def __init__(self, block_words_file: Path):
         """Initialize the block detector with block word mappings."""
         self.block_words_file = block_words_file
-        self.block_words: Dict[str, str] = {}
+        # Opt-in fallback for near-misses ("obsidean", "cobble stone"): phonetic + edit-distance index
+        self.fuzzy_matching = getattr(Config, 'BLOCK_FUZZY_MATCHING', False)
+        # Block words compiled into a trie over normalized word tokens. Rebuilt whenever they
+        # change and swapped in with one assignment, so detection never sees a half-built index.
+        self._compiled = _CompiledWords({}, _TrieNode())
+        self._write_lock = threading.Lock()  # Serializes reload/add/remove; detection never waits
+        self._file_signature: Optional[Tuple[int, int]] = None  # (mtime_ns, size) when last loaded or written
         self.load_block_words()
     
+    @property
+    def block_words(self) -> Dict[str, str]:
+        """Current word -> block ID mappings (replaced, not mutated, on change)."""
+        return self._compiled.block_words
+    
     def load_block_words(self):
         """Load block word mappings from JSON file."""
         try:
             if self.block_words_file.exists():
+                signature = self._stat()
                 with open(self.block_words_file, 'r', encoding='utf-8') as f:
-                    self.block_words = json.load(f)
-                logger.info(f"Loaded {len(self.block_words)} block word mappings")
+                    block_words = json.load(f)
+                self._install(block_words, signature)
+                logger.info(f"Loaded {len(block_words)} block word mappings")
             else:
                 logger.warning(f"Block words file not found: {self.block_words_file}")
                 # Create default file
@@ -44,22 +148,81 @@ class BlockDetector:
             "diamond block": "minecraft:diamond_block",
             "gold block": "minecraft:gold_block"
         }
-        self.block_words = default_words
+        self._install(default_words)
         try:
-            self.block_words_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.block_words_file, 'w', encoding='utf-8') as f:
-                json.dump(default_words, f, indent=2)
+            self._save(default_words)
             logger.info("Created default block words file")
         except Exception as e:
             logger.error(f"Error creating default block words file: {e}", exc_info=True)
     
+    def reload(self) -> bool:
+        """
+        Re-read the block words file and swap in the rebuilt matcher.
+        
+        Blocking (file I/O and index build), so call it off the event loop. Detection
+        keeps using the previous words until the new ones are compiled. A missing or
+        malformed file keeps the current words.
+        
+        Returns:
+            True if new words were loaded
+        """
+        with self._write_lock:
+            signature = self._stat()
+            try:
+                with open(self.block_words_file, 'r', encoding='utf-8') as f:
+                    block_words = json.load(f)
+                if not isinstance(block_words, dict):
+                    raise ValueError("expected a JSON object of word -> block ID")
+            except Exception as e:
+                # Remember the bad file so the watcher doesn't retry until it changes again
+                self._file_signature = signature
+                logger.error(f"Error reloading block words, keeping the current ones: {e}")
+                return False
+            self._install(block_words, signature)
+        logger.info(f"Reloaded {len(block_words)} block word mappings")
+        return True
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Reload if the file changed since it was last loaded or written.
+        
+        Costs one stat() when nothing changed, so it can be polled.
+        
+        Returns:
+            True if new words were loaded
+        """
+        if self._stat() == self._file_signature:
+            return False
+        return self.reload()
+    
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the block words file, None if it doesn't exist."""
+        try:
+            stat = os.stat(self.block_words_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _install(self, block_words: Dict[str, str], signature: Optional[Tuple[int, int]] = None) -> None:
+        """Compile block words and make them current."""
+        self._compiled = self._compile(block_words)
+        self._file_signature = signature
+    
+    def _save(self, block_words: Dict[str, str]) -> None:
+        """Write block words to the file atomically (a reload never sees a partial file)."""
+        self.block_words_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.block_words_file.with_name(self.block_words_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(block_words, f, indent=2)
+        os.replace(tmp_path, self.block_words_file)
+    
     def normalize_text(self, text: str) -> str:
         """
         Normalize text for matching.
         
         Args:
             text: Raw transcript text
-            
+        
         Returns:
             Normalized text (lowercase, punctuation removed)
         """
@@ -67,7 +230,7 @@ class BlockDetector:
         text = text.lower()
         
         # Remove punctuation but keep spaces
-        text = re.sub(r'[^\w\s]', '', text)
+        text = _PUNCTUATION.sub('', text)
         
         # Normalize whitespace
         text = ' '.join(text.split())
@@ -86,67 +249,208 @@ class BlockDetector:
         Args:
             text: Transcribed text
             user_id: Discord user ID who spoke
-            
+        
         Returns:
-            Dictionary with block_id, user_id, radius if detected, None otherwise
+            Dictionary with block_id, user_id, radius (spoken_radius: None unless the
+            speaker gave one) if detected, None otherwise
         """
         normalized = self.normalize_text(text)
+        compiled = self._compiled  # One snapshot, even if a reload swaps words meanwhile
+        word = self._match_word(normalized, compiled)
+        if word is None:
+            return None
         
-        # Longer phrases first so e.g. "diamond block" wins over "diamond"
-        sorted_words = sorted(self.block_words.items(), key=lambda x: len(x[0]), reverse=True)
+        block_id = compiled.block_words[word]
+        # Try to extract radius if specified
+        radius = self._extract_radius(normalized)
         
-        for word, block_id in sorted_words:
-            normalized_word = self.normalize_text(word)
-            
-            # Whole-word match only: key must appear as a full word (not inside another word)
-            # so "sandstone" from noise doesn't trigger "sand" or "stone"
-            pattern = r'\b' + re.escape(normalized_word) + r'\b'
-            if re.search(pattern, normalized):
-                # Try to extract radius if specified
-                radius = self._extract_radius(normalized)
-                
-                logger.info(f"Detected block: {block_id} (triggered by user {user_id}, radius: {radius})")
-                
-                return {
-                    'block_id': block_id,
-                    'user_id': user_id,
-                    'radius': radius or Config.DEFAULT_RADIUS,
-                    'original_text': text,
-                    'matched_word': word,
-                    'timestamp': datetime.now()
-                }
+        logger.info(f"Detected block: {block_id} (triggered by user {user_id}, radius: {radius})")
         
-        return None
+        return {
+            'block_id': block_id,
+            'user_id': user_id,
+            'radius': radius or Config.DEFAULT_RADIUS,
+            'spoken_radius': radius,
+            'original_text': text,
+            'matched_word': word,
+            'timestamp': datetime.now()
+        }
+    
+    def detect_blocks(self, text: str, user_id: Optional[int] = None) -> List[Dict]:
+        """
+        Detect every block name in the transcribed text.
+        
+        Scans left to right, taking the longest block word at each position and
+        skipping words that overlap an earlier match, so "stone and dirt and
+        sand" yields stone, dirt and sand while "diamond block" stays one match.
+        
+        Args:
+            text: Transcribed text
+            user_id: Discord user ID who spoke
+        
+        Returns:
+            One dictionary per match, in spoken order (same fields as detect_block,
+            plus 'span': character offsets of the match in the normalized text)
+        """
+        normalized = self.normalize_text(text)
+        # Character offset of every token in the normalized (single-spaced) text
+        tokens = normalized.split()
+        offsets = []
+        position = 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token) + 1
+        
+        compiled = self._compiled  # One snapshot, even if a reload swaps words meanwhile
+        matches = []
+        end_token = 0
+        for start, end, word in self._scan(normalized, compiled):
+            if start < end_token:
+                continue  # Overlaps the previous match
+            end_token = end
+            matches.append((word, (offsets[start], offsets[end - 1] + len(tokens[end - 1]))))
+        if not matches:
+            return []
+        
+        radius = self._extract_radius(normalized)
+        timestamp = datetime.now()
+        results = []
+        for word, span in matches:
+            results.append({
+                'block_id': compiled.block_words[word],
+                'user_id': user_id,
+                'radius': radius or Config.DEFAULT_RADIUS,
+                'spoken_radius': radius,
+                'original_text': text,
+                'matched_word': word,
+                'span': span,
+                'timestamp': timestamp,
+            })
+        logger.info(
+            f"Detected blocks: {', '.join(str(r['block_id']) for r in results)} "
+            f"(triggered by user {user_id}, radius: {radius})"
+        )
+        return results
+    
+    def find_block_word(self, text: str) -> Optional[str]:
+        """
+        Return the block word that detect_block would match in the text, without side effects.
+        
+        Used by streaming transcription to check partial hypotheses cheaply.
+        """
+        return self._match_word(self.normalize_text(text))
+    
+    def _compile(self, block_words: Dict[str, str]) -> _CompiledWords:
+        """Build the token trie and the fuzzy index for block words."""
+        root = _TrieNode()
+        fuzzy_words = {}
+        max_tokens = 0
+        # Longer keys first so that of two keys normalizing alike, the longer spelling wins
+        for word in sorted(block_words, key=len, reverse=True):
+            tokens = self.normalize_text(word).split()
+            if not tokens:
+                continue
+            node = root
+            for token in tokens:
+                node = node.children.setdefault(token, _TrieNode())
+            if node.word is None:
+                node.word = word
+            fuzzy_words.setdefault(''.join(tokens), word)
+            max_tokens = max(max_tokens, len(tokens))
+        fuzzy = None
+        if self.fuzzy_matching:
+            fuzzy = FuzzyIndex(
+                fuzzy_words,
+                max_edits=getattr(Config, 'BLOCK_FUZZY_MAX_EDITS', 1),
+                min_length=getattr(Config, 'BLOCK_FUZZY_MIN_LENGTH', 7),
+            )
+        return _CompiledWords(block_words, root, fuzzy, fuzzy_words, max_tokens)
+    
+    def _scan(self, normalized: str, compiled: Optional[_CompiledWords] = None) -> List[Tuple[int, int, str]]:
+        """
+        Longest block word starting at each token of normalized text.
+        
+        Matching walks whole tokens, so a key only matches complete words
+        ("sandstone" from noise doesn't trigger "sand" or "stone"). Cost depends on
+        the transcript length and the longest phrase, not on the vocabulary size.
+        
+        Where no block word starts exactly, token n-grams (up to one token longer
+        than the longest phrase, for words split in two: "cobble stone") are looked
+        up in the fuzzy index. A fuzzy match may only swallow exact matches naming
+        shorter block words.
+        
+        Returns:
+            (start token, end token, word) per token where a block word starts, in order
+        """
+        compiled = compiled or self._compiled
+        tokens = normalized.split()
+        root = compiled.trie
+        exact = {}
+        for start in range(len(tokens)):
+            node = root
+            for end in range(start, len(tokens)):
+                node = node.children.get(tokens[end])
+                if node is None:
+                    break
+                if node.word is not None:
+                    exact[start] = (start, end + 1, node.word)
+        if compiled.fuzzy is None:
+            return list(exact.values())
+        
+        matches = []
+        for start in range(len(tokens)):
+            if start in exact:
+                matches.append(exact[start])
+                continue
+            fuzzy = self._match_fuzzy(compiled, tokens, start, min(len(tokens), start + compiled.max_tokens + 1))
+            if fuzzy is None:
+                continue
+            _, end, word = fuzzy
+            if all(len(exact[i][2]) < len(word) for i in range(start, end) if i in exact):
+                matches.append(fuzzy)
+        return matches
     
-    def _extract_radius(self, text: str) -> Optional[int]:
+    def _match_fuzzy(
+        self, compiled: _CompiledWords, tokens: List[str], start: int, stop: int
+    ) -> Optional[Tuple[int, int, str]]:
+        """Longest token n-gram in tokens[start:stop] starting at start that the fuzzy index maps to a block word."""
+        if tokens[start].isdigit() or len(tokens[start]) < 2:
+            return None
+        query = ''
+        best = None
+        for end in range(start, stop):
+            query += tokens[end]
+            entry = compiled.fuzzy.lookup(query)
+            if entry is not None:
+                best = (start, end + 1, compiled.fuzzy_words[entry])
+        if best is not None:
+            logger.debug(f"Fuzzy match: '{' '.join(tokens[best[0]:best[1]])}' -> {best[2]}")
+        return best
+    
+    def _match_word(self, normalized: str, compiled: Optional[_CompiledWords] = None) -> Optional[str]:
+        """Find the longest block word appearing as whole words in normalized text."""
+        best = None
+        for _, _, word in self._scan(normalized, compiled):
+            # Longest phrase wins so e.g. "diamond block" beats "diamond"; ties go to the earliest
+            if best is None or len(word) > len(best):
+                best = word
+        return best
+    
+    def _extract_radius(self, normalized: str) -> Optional[int]:
         """
-        Extract radius from text if specified.
+        Extract radius from normalized text if specified.
         
         Examples:
             "replace with stone in 5 blocks" -> 5
-            "stone radius 3" -> 3
-            "diamond block 10" -> 10
-        """
-        # Look for patterns like "in X blocks", "radius X", "X blocks"
-        patterns = [
-            r'in\s+(\d+)\s+blocks?',
-            r'radius\s+(\d+)',
-            r'(\d+)\s+blocks?',
-            r'(\d+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    radius = int(match.group(1))
-                    # Clamp to max radius
-                    radius = min(radius, Config.MAX_RADIUS)
-                    return radius
-                except ValueError:
-                    continue
-        
-        return None
+            "stone radius three" -> 3
+            "dirt within ten" -> 10
+            "i found 2 diamonds" -> None (a number alone isn't a radius)
+        """
+        radius = _parse_radius(tuple(normalized.split()))
+        if radius is None:
+            return None
+        # Clamp to max radius
+        return min(radius, Config.MAX_RADIUS)
     
     def add_block_word(self, word: str, block_id: str) -> bool:
         """
@@ -155,18 +459,19 @@ class BlockDetector:
         Args:
             word: Word or phrase to detect
             block_id: Minecraft block ID (e.g., "minecraft:stone")
-            
+        
         Returns:
             True if successful, False otherwise
         """
         try:
             normalized_word = self.normalize_text(word)
-            self.block_words[normalized_word] = block_id
-            
-            # Save to file
-            self.block_words_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.block_words_file, 'w', encoding='utf-8') as f:
-                json.dump(self.block_words, f, indent=2)
+            with self._write_lock:
+                block_words = dict(self.block_words)
+                block_words[normalized_word] = block_id
+                
+                # Save to file, then swap in the new words
+                self._save(block_words)
+                self._install(block_words, self._stat())
             
             logger.info(f"Added block word mapping: {word} -> {block_id}")
             return True
@@ -180,22 +485,24 @@ class BlockDetector:
         
         Args:
             word: Word or phrase to remove
-            
+        
         Returns:
             True if successful, False otherwise
         """
         try:
             normalized_word = self.normalize_text(word)
             
-            if normalized_word not in self.block_words:
-                logger.warning(f"Block word not found: {word}")
-                return False
-            
-            del self.block_words[normalized_word]
-            
-            # Save to file
-            with open(self.block_words_file, 'w', encoding='utf-8') as f:
-                json.dump(self.block_words, f, indent=2)
+            with self._write_lock:
+                if normalized_word not in self.block_words:
+                    logger.warning(f"Block word not found: {word}")
+                    return False
+                
+                block_words = dict(self.block_words)
+                del block_words[normalized_word]
+                
+                # Save to file, then swap in the new words
+                self._save(block_words)
+                self._install(block_words, self._stat())
             
             logger.info(f"Removed block word mapping: {word}")
             return True
@@ -14,7 +14,8 @@ from .config import Config
 from .discord_client import VoiceClient, create_voice_client
 from .transcription import get_transcription_service
 from .block_detector import get_block_detector
-from .minecraft_rcon import get_rcon_client
+from .datapack import NAMESPACE, PACK_NAME, get_datapack_manager
+from .minecraft_rcon import CHUNK_RADIUS, get_rcon_client
 
 # Set up logging: console = what the bot hears + connection details (INFO);
 # file = full debug for troubleshooting (DEBUG).
@@ -56,18 +57,30 @@ class MinecraftBot(commands.Bot):
         self.transcription_service = get_transcription_service()
         self.block_detector = get_block_detector()
         self.rcon_client = get_rcon_client()
+        self.datapack = get_datapack_manager()
         self.audio_processing_tasks: dict[int, asyncio.Task] = {}
+        self.block_words_watcher: Optional[asyncio.Task] = None
+        self.datapack_install_attempted = False  # on_ready fires again after every gateway reconnect
         
         # Set up transcription callback
         self.transcription_service.set_transcript_callback(self._on_transcript)
-        # Bias transcription toward Minecraft block names
-        block_words = list(self.block_detector.get_block_words().keys())
-        self.transcription_service.set_hotwords(block_words)
+        # Lets streaming mode trigger on partial hypotheses that contain a block word
+        self.transcription_service.set_keyword_matcher(self.block_detector.find_block_word)
+        # Bias transcription toward Minecraft block names (keyword-spotting mode decodes only these)
+        self.transcription_service.set_vocabulary(list(self.block_detector.get_block_words().keys()))
     
     async def setup_hook(self):
         """Called when the bot is starting up."""
         logger.info("Setting up bot...")
         
+        # Load and warm up Whisper in the background so the first /start_transcribe doesn't stall
+        if self.config.WHISPER_PRELOAD:
+            self.transcription_service.start_preload()
+        
+        # Pick up edits to block_words.json without a restart
+        if getattr(self.config, 'BLOCK_WORDS_RELOAD_SECONDS', 0) > 0:
+            self.block_words_watcher = asyncio.create_task(self._watch_block_words())
+        
         # Sync commands globally (available in all servers)
         # This ensures commands appear in all servers the bot is invited to
         await self.tree.sync()
@@ -96,6 +109,12 @@ class MinecraftBot(commands.Bot):
                 logger.info("RCON connection established")
             else:
                 logger.warning("Failed to connect to RCON. Some features may not work.")
+        
+        # Block tags let multi-block words ("ore") clear with one fill per segment. Only on the
+        # first ready: block word edits reinstall it themselves, so reconnects needn't reload the server
+        if not self.datapack_install_attempted:
+            self.datapack_install_attempted = True
+            await self.install_datapack()
     
     async def on_error(self, event, *args, **kwargs):
         """Handle errors."""
@@ -114,7 +133,40 @@ class MinecraftBot(commands.Bot):
             logger.info("Reconnecting to RCON...")
             self.rcon_client.connect()
     
-    async def _on_transcript(self, text: str, user_id: Optional[int] = None, timestamp=None):
+    async def _watch_block_words(self):
+        """Poll block_words.json and apply changes; file reads and index builds run in a thread."""
+        interval = self.config.BLOCK_WORDS_RELOAD_SECONDS
+        logger.info(f"Watching {self.block_detector.block_words_file} for changes (every {interval}s)")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.block_detector.reload_if_changed):
+                    await self.apply_block_words()
+            except Exception as e:
+                logger.error(f"Error reloading block words: {e}", exc_info=True)
+    
+    async def apply_block_words(self):
+        """Push the detector's current block words to transcription (hotwords, keywords) off the event loop."""
+        block_words = list(self.block_detector.get_block_words().keys())
+        await asyncio.to_thread(self.transcription_service.set_vocabulary, block_words)
+        await self.install_datapack()
+    
+    async def install_datapack(self):
+        """Regenerate the block tag datapack and have the server reload it (no-op without MINECRAFT_DATAPACK_DIR)."""
+        if not self.datapack.enabled:
+            return
+        try:
+            tags = await asyncio.to_thread(self.datapack.write, self.block_detector.get_block_words())
+            if await self.rcon_client.reload_datapack_async(PACK_NAME):
+                self.datapack.mark_installed(tags)
+                logger.info(f"Datapack {PACK_NAME} loaded ({len(tags)} block tags)")
+            else:
+                # Tags whose block IDs changed fall back to per-ID fills until a reload succeeds
+                logger.warning(f"Server did not load datapack {PACK_NAME}; clearing one block ID at a time")
+        except Exception as e:
+            logger.error(f"Error installing datapack: {e}", exc_info=True)
+    
+    async def _on_transcript(self, text: str, user_id: Optional[int] = None, timestamp=None, guild_id: Optional[int] = None):
         """
         Callback when a transcript is received.
         
@@ -122,6 +174,7 @@ class MinecraftBot(commands.Bot):
             text: Transcribed text
             user_id: Discord user ID
             timestamp: Timestamp of transcript
+            guild_id: Guild whose voice channel the speech came from
         """
         try:
             # Validate input
@@ -129,31 +182,41 @@ class MinecraftBot(commands.Bot):
                 return
             
             # Display what we heard (clear one-line format)
-            logger.info(f"Heard: \"{text}\" (user {user_id})")
+            logger.info(f"Heard: \"{text}\" (user {user_id}, guild {guild_id})")
             
-            # Detect block in transcript
-            block_info = self.block_detector.detect_block(text, user_id)
+            # Detect every block named in the transcript ("stone and dirt" clears both)
+            detections = self.block_detector.detect_blocks(text, user_id)
             
-            if block_info:
+            if detections:
                 # Act on any block word from block_words.json - no extra phrase required
-                logger.info(f"Block detected: {block_info['block_id']} by user {user_id}")
+                logger.info(f"Blocks detected: {', '.join(d['matched_word'] for d in detections)} by user {user_id}")
                 
-                # Resolve block_id - may be single (minecraft:stone) or list (ore array)
-                raw_block_id = block_info['block_id']
-                block_ids = [raw_block_id] if isinstance(raw_block_id, str) else list(raw_block_id)
+                # Resolve block_ids - each may be single (minecraft:stone) or list (ore array);
+                # a list becomes its datapack tag (#mcvoice:ore) once the server has loaded it
+                block_ids = []
+                block_names = []
+                for block_info in detections:
+                    ids = self.datapack.resolve(block_info['matched_word'], block_info['block_id'])
+                    for bid in ids:
+                        if bid not in block_ids:
+                            block_ids.append(bid)
+                    if ids and block_info['matched_word'] not in block_names:
+                        block_names.append(block_info['matched_word'])
                 if not block_ids:
                     return
                 
-                # Validate: block IDs or tags
+                # Validate: block IDs or tags (ours included)
                 def is_valid_block_id(bid):
                     return isinstance(bid, str) and (
-                        bid.startswith('minecraft:') or bid.startswith('#minecraft:')
+                        bid.startswith('minecraft:') or bid.startswith('#minecraft:') or bid.startswith(f'#{NAMESPACE}:')
                     )
                 if not all(is_valid_block_id(bid) for bid in block_ids):
                     logger.error(f"Invalid block_id format: {block_ids}")
                     return
                 
-                if not self.rcon_client.connected:
+                # Gate on the client that runs the clear: the asyncio pool connects on demand
+                # and falls back to mcrcon itself, so only the sync-only path needs mcrcon up front
+                if not self.config.RCON_ASYNC and not self.rcon_client.connected:
                     logger.warning("RCON not connected, attempting to reconnect...")
                     if not self.rcon_client.connect():
                         logger.warning(
@@ -161,7 +224,15 @@ class MinecraftBot(commands.Bot):
                         )
                         return
                 
-                block_name = block_info.get("matched_word", block_ids[0].replace("minecraft:", "").replace("#minecraft:", "").replace("_", " "))
+                async def _say(message):
+                    if self.config.RCON_ASYNC and await self.rcon_client.say_async(message):
+                        return
+                    self.rcon_client.say(message)
+                
+                block_name = ", ".join(block_names)
+                # "stone within five blocks" narrows the clear; otherwise the full chunk (~±8)
+                spoken_radius = detections[0].get('spoken_radius')
+                radius = CHUNK_RADIUS if spoken_radius is None else spoken_radius
                 # Try to get user from cache first, then fetch if not cached
                 user = self.get_user(user_id)
                 if not user and user_id:
@@ -171,17 +242,61 @@ class MinecraftBot(commands.Bot):
                         logger.warning(f"Failed to fetch user {user_id}: {e}")
                 user_name = user.display_name if user else f"User {user_id}"
                 
+                # With the datapack loaded the whole clear is one round trip: feedback, one function
+                # per word (runs as every player, covers every Y segment), feedback
+                function_commands = []
+                if self.config.RCON_ASYNC:
+                    for block_info in detections:
+                        command = self.datapack.function_command(
+                            block_info['matched_word'], block_info['block_id'], radius
+                        )
+                        if command is None:
+                            function_commands = []
+                            break
+                        if command not in function_commands:
+                            function_commands.append(command)
+                announced = False
+                if function_commands:
+                    responses = await self.rcon_client.execute_in_order_async([
+                        self.rcon_client.say_command(f"Clearing {block_name}..."),
+                        *function_commands,
+                        self.rcon_client.say_command(f"{user_name} said {block_name}"),
+                    ])
+                    failed = [
+                        command for command, response in zip(function_commands, responses[1:-1])
+                        if response is None or response.startswith('Unknown')
+                    ]
+                    if not failed:
+                        logger.info(f"Cleared {block_name} with {len(function_commands)} function call(s)")
+                        return
+                    logger.warning(f"Clear functions failed ({', '.join(failed)}), falling back to fills")
+                    announced = responses[0] is not None
+                
                 # Immediate feedback so users see a response right away
-                self.rcon_client.say(f"Clearing {block_name}...")
+                if not announced:
+                    await _say(f"Clearing {block_name}...")
                 
-                # Run blocking RCON commands in thread pool to avoid blocking the Discord event loop
-                def _do_clear():
+                # All blocks go out as one batch (one player lookup, then every fill). The asyncio
+                # client spreads the fills over its pool on the event loop; mcrcon blocks, so it runs in a thread.
+                async def _do_clear():
                     any_success = False
-                    for block_id in block_ids:
-                        results = self.rcon_client.replace_blocks_in_chunk_around_all_players(
-                            target_block=block_id,
+                    batch = None
+                    if self.config.RCON_ASYNC:
+                        batch = await self.rcon_client.replace_many_in_chunk_around_all_players_async(
+                            target_blocks=block_ids,
                             replacement_block="minecraft:air",
+                            radius=radius,
                         )
+                        if batch is None:
+                            logger.warning("Async RCON pool failed, retrying the clear with the sync client")
+                    if batch is None:
+                        batch = await asyncio.to_thread(
+                            self.rcon_client.replace_many_in_chunk_around_all_players,
+                            target_blocks=block_ids,
+                            replacement_block="minecraft:air",
+                            radius=radius,
+                        )
+                    for block_id, results in batch.items():
                         successful_players = [p for p, success in results.items() if success]
                         failed_players = [p for p, success in results.items() if not success]
                         if successful_players:
@@ -192,9 +307,9 @@ class MinecraftBot(commands.Bot):
                     return any_success
                 
                 try:
-                    any_success = await asyncio.to_thread(_do_clear)
-                    if any_success:
-                        self.rcon_client.say(f"{user_name} said {block_name}")
+                    any_success = await _do_clear()
+                    if any_success and not announced:
+                        await _say(f"{user_name} said {block_name}")
                 except Exception as e:
                     logger.error(f"Error clearing chunk: {e}", exc_info=True)
                     self.rcon_client.connected = False
@@ -209,7 +324,7 @@ class MinecraftBot(commands.Bot):
         
         # Start transcription session
         try:
-            await self.transcription_service.start_session()
+            await self.transcription_service.start_session(guild_id)
         except Exception as e:
             logger.error(f"Failed to start transcription session: {e}", exc_info=True)
             return
@@ -220,46 +335,48 @@ class MinecraftBot(commands.Bot):
         try:
             while self.transcribing.get(guild_id, False) and voice_client.is_capturing_flag:
                 try:
-                    # Get audio chunk with shorter timeout for faster processing
-                    audio_chunk = await voice_client.get_audio_chunk(timeout=0.05)
+                    # Block until audio arrives (no polling while the channel is silent),
+                    # then handle every batch of packets that queued up since the last wakeup
+                    batches = await voice_client.get_audio_batches()
                     
-                    if audio_chunk:
-                        # Validate audio chunk
-                        audio_data = audio_chunk.get('audio', b'')
-                        if not isinstance(audio_data, bytes) or len(audio_data) == 0:
-                            continue
-                        
-                        # Validate PCM data format (should be multiple of 2 bytes for int16)
-                        if len(audio_data) % 2 != 0:
-                            logger.warning(f"Invalid PCM data length: {len(audio_data)} bytes (not multiple of 2)")
-                            continue
-                        
-                        user_id = audio_chunk.get('user_id')
-                        ssrc = audio_chunk.get('ssrc')
-                        
-                        # Process audio chunk for transcription
+                    for batch in batches:
                         try:
-                            await self.transcription_service.process_audio_chunk(
-                                audio_data=audio_data,
-                                user_id=user_id,
-                                ssrc=ssrc
-                            )
-                            consecutive_errors = 0  # Reset error counter on success
-                        except Exception as e:
-                            consecutive_errors += 1
-                            logger.error(f"Error processing audio chunk: {e}", exc_info=True)
-                            
-                            # Stop if too many consecutive errors
-                            if consecutive_errors >= max_errors:
-                                logger.error(f"Too many consecutive errors ({consecutive_errors}), stopping audio processing")
-                                break
-                    else:
-                        # No audio available, sleep briefly
-                        await asyncio.sleep(0.01)
+                            for packet in batch:
+                                # Validate audio chunk
+                                audio_data = packet.audio
+                                if len(audio_data) == 0:
+                                    continue
+                                
+                                # Validate PCM data format (should be multiple of 2 bytes for int16)
+                                if len(audio_data) % 2 != 0:
+                                    logger.warning(f"Invalid PCM data length: {len(audio_data)} bytes (not multiple of 2)")
+                                    continue
+                                
+                                # Process audio chunk for transcription
+                                try:
+                                    await self.transcription_service.process_audio_chunk(
+                                        audio_data=audio_data,
+                                        user_id=packet.user_id,
+                                        ssrc=packet.ssrc,
+                                        guild_id=guild_id
+                                    )
+                                    consecutive_errors = 0  # Reset error counter on success
+                                except Exception as e:
+                                    consecutive_errors += 1
+                                    logger.error(f"Error processing audio chunk: {e}", exc_info=True)
+                                    if consecutive_errors >= max_errors:
+                                        break
+                        finally:
+                            # PCM has been copied out by the converter; recycle the batch
+                            voice_client.release_batch(batch)
+                        if consecutive_errors >= max_errors:
+                            break
+                    
+                    # Stop if too many consecutive errors
+                    if consecutive_errors >= max_errors:
+                        logger.error(f"Too many consecutive errors ({consecutive_errors}), stopping audio processing")
+                        break
                 
-                except asyncio.TimeoutError:
-                    # Timeout is normal, continue
-                    continue
                 except Exception as e:
                     consecutive_errors += 1
                     logger.error(f"Error in audio loop iteration: {e}", exc_info=True)
@@ -275,10 +392,9 @@ class MinecraftBot(commands.Bot):
         except Exception as e:
             logger.error(f"Fatal error in audio processing loop: {e}", exc_info=True)
         finally:
-            # Stop transcription session
+            # Flush the speakers' remaining audio, then stop the transcription session
             try:
-                await self.transcription_service.stop_session()
-                await self.transcription_service.flush_buffer()
+                await self.transcription_service.end_session(guild_id)
             except Exception as e:
                 logger.error(f"Error stopping transcription session: {e}", exc_info=True)
             
@@ -491,13 +607,41 @@ async def status(interaction: discord.Interaction):
         # Get block words count
         block_words = bot.block_detector.get_block_words()
         
+        # Whisper readiness
+        model_state = {
+            'ready': '✅ Ready',
+            'loading': '⏳ Loading',
+            'failed': '❌ Failed to load',
+            'idle': '💤 Not loaded',
+        }.get(bot.transcription_service.load_state, bot.transcription_service.load_state)
+        quality = bot.transcription_service.quality
+        if quality is not None:
+            model_state += f" ({quality.tier.model_size}, beam {quality.tier.beam_size})"
+        
+        # Inference backlog
+        inference = bot.transcription_service.scheduler.stats()
+        dropped = inference['dropped_full'] + inference['dropped_stale']
+        
+        # This guild's session (other guilds transcribe independently)
+        session = bot.transcription_service.get_session(interaction.guild.id)
+        transcribing_state = '✅' if transcribing else '❌'
+        if session is not None:
+            session_stats = session.stats()
+            transcribing_state += (
+                f" ({session_stats['speakers']} speakers, {session_stats['windows_submitted']} windows, "
+                f"{session_stats['windows_skipped']} skipped)"
+            )
+        
         status_message = (
             f"**Bot Status**\n"
             f"Voice Connected: {'✅' if voice_connected else '❌'}\n"
-            f"Transcribing: {'✅' if transcribing else '❌'}\n"
+            f"Transcribing: {transcribing_state}\n"
             f"RCON Connected: {'✅' if rcon_connected else '❌'}\n"
+            f"Whisper Model: {model_state}\n"
             f"Online Players: {len(online_players)}\n"
             f"Block Words: {len(block_words)}\n"
+            f"Inference Queue: {inference['queue_depth']} waiting, {inference['lag_ms']:.0f}ms lag, {dropped} dropped "
+            f"({len(bot.transcription_service.sessions)} guilds active)\n"
             f"Cooldown: {Config.COOLDOWN_SECONDS}s"
         )
         
@@ -513,7 +657,7 @@ async def status(interaction: discord.Interaction):
         )
 
 
-@bot.tree.command(name='config_block_words', description='Add or remove block word mappings')
+@bot.tree.command(name='config_block_words', description='Add, remove or reload block word mappings')
 @app_commands.describe(
     action='Add or remove a block word',
     word='Word or phrase to detect',
@@ -522,7 +666,8 @@ async def status(interaction: discord.Interaction):
 @app_commands.choices(action=[
     app_commands.Choice(name='add', value='add'),
     app_commands.Choice(name='remove', value='remove'),
-    app_commands.Choice(name='list', value='list')
+    app_commands.Choice(name='list', value='list'),
+    app_commands.Choice(name='reload', value='reload')
 ])
 async def config_block_words(
     interaction: discord.Interaction,
@@ -541,24 +686,28 @@ async def config_block_words(
         return
     
     try:
+        # Applying new words rewrites the datapack and reloads the server, which can outlast
+        # Discord's 3 second interaction deadline: acknowledge now, answer with followups
+        await interaction.response.defer(ephemeral=True)
+        
         if action == 'list':
             block_words = bot.block_detector.get_block_words()
             if not block_words:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'No block words configured.',
                     ephemeral=True
                 )
                 return
             
             words_list = '\n'.join([f"**{w}** → `{b}`" for w, b in block_words.items()])
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 f"**Configured Block Words:**\n{words_list}",
                 ephemeral=True
             )
         
         elif action == 'add':
             if not word or not block_id:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Both word and block_id are required for adding.',
                     ephemeral=True
                 )
@@ -566,14 +715,14 @@ async def config_block_words(
             
             # Validate inputs
             if not isinstance(word, str) or len(word.strip()) == 0:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Word must be a non-empty string.',
                     ephemeral=True
                 )
                 return
             
             if not isinstance(block_id, str) or len(block_id.strip()) == 0:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Block ID must be a non-empty string.',
                     ephemeral=True
                 )
@@ -586,49 +735,68 @@ async def config_block_words(
             
             # Basic validation of block_id format
             if not re.match(r'^minecraft:[a-z0-9_]+$', block_id):
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Invalid block ID format. Must be like "minecraft:stone" or "stone".',
                     ephemeral=True
                 )
                 return
             
-            success = bot.block_detector.add_block_word(word.strip().lower(), block_id)
+            # File write and index rebuild run off the event loop so audio keeps flowing
+            success = await asyncio.to_thread(bot.block_detector.add_block_word, word.strip().lower(), block_id)
             if success:
-                await interaction.response.send_message(
+                await bot.apply_block_words()
+                await interaction.followup.send(
                     f'Added block word: **{word}** → `{block_id}`',
                     ephemeral=True
                 )
                 logger.info(f'Added block word: {word} -> {block_id} by {interaction.user} ({interaction.user.id})')
             else:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Failed to add block word. Check logs for details.',
                     ephemeral=True
                 )
         
         elif action == 'remove':
             if not word:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     'Word is required for removing.',
                     ephemeral=True
                 )
                 return
             
-            success = bot.block_detector.remove_block_word(word)
+            success = await asyncio.to_thread(bot.block_detector.remove_block_word, word)
             if success:
-                await interaction.response.send_message(
+                await bot.apply_block_words()
+                await interaction.followup.send(
                     f'Removed block word: **{word}**',
                     ephemeral=True
                 )
                 logger.info(f'Removed block word: {word} by {interaction.user}')
             else:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     f'Block word **{word}** not found.',
                     ephemeral=True
                 )
+        
+        elif action == 'reload':
+            success = await asyncio.to_thread(bot.block_detector.reload)
+            if success:
+                await bot.apply_block_words()
+                await interaction.followup.send(
+                    f'Reloaded {len(bot.block_detector.get_block_words())} block words.',
+                    ephemeral=True
+                )
+                logger.info(f'Reloaded block words by {interaction.user}')
+            else:
+                await interaction.followup.send(
+                    'Failed to reload block words. Check logs for details.',
+                    ephemeral=True
+                )
     
     except Exception as e:
         logger.error(f'Error configuring block words: {e}', exc_info=True)
-        await interaction.response.send_message(
+        send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+        await send(
             'Failed to configure block words. Check logs for details.',
             ephemeral=True
         )
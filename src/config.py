@@ -21,21 +21,78 @@ class Config:
     WHISPER_COMPUTE_TYPE: str = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')  # int8, int8_float16, float16, float32
     WHISPER_BEAM_SIZE: int = int(os.getenv('WHISPER_BEAM_SIZE', '5') or '5')  # 5=accurate, 1=fast
     WHISPER_CHUNK_SECONDS: int = int(os.getenv('WHISPER_CHUNK_SECONDS', '3') or '3')  # Audio context length
+    WHISPER_WINDOW_OVERLAP_SECONDS: float = float(os.getenv('WHISPER_WINDOW_OVERLAP_SECONDS', '0'))  # Fixed windows only; max half a window
+    STITCH_CARRY_WORDS: int = int(os.getenv('STITCH_CARRY_WORDS', '3') or '3')  # Stitched words kept so names split across windows match
     # Tuning for quiet Discord voice - adjust if speech is filtered out
     WHISPER_AUDIO_GAIN: float = float(os.getenv('WHISPER_AUDIO_GAIN', '3.0'))  # Amplify audio (1.0=no gain)
     WHISPER_VAD_THRESHOLD: float = float(os.getenv('WHISPER_VAD_THRESHOLD', '0.2'))  # Lower=more sensitive
     WHISPER_LOG_PROB_THRESHOLD: float = float(os.getenv('WHISPER_LOG_PROB_THRESHOLD', '-2.0'))  # More lenient
     WHISPER_NO_SPEECH_THRESHOLD: float = float(os.getenv('WHISPER_NO_SPEECH_THRESHOLD', '0.9'))  # Accept more
+    # Speech gate on the ingest path: windows without enough speech never reach Whisper
+    SPEECH_GATE_ENABLED: bool = os.getenv('SPEECH_GATE_ENABLED', 'true').lower() in ('true', '1', 'yes')
+    SPEECH_GATE_THRESHOLD_DB: float = float(os.getenv('SPEECH_GATE_THRESHOLD_DB', '-50'))  # Absolute floor (dBFS, after gain)
+    SPEECH_GATE_SNR_DB: float = float(os.getenv('SPEECH_GATE_SNR_DB', '10'))  # Margin above tracked noise floor
+    SPEECH_GATE_MIN_SPEECH_MS: int = int(os.getenv('SPEECH_GATE_MIN_SPEECH_MS', '100') or '100')  # Per window
+    SPEECH_GATE_VAD_MODE: int = int(os.getenv('SPEECH_GATE_VAD_MODE', '-1') or '-1')  # -1=energy only, 0-3=webrtcvad aggressiveness
+    # Segmentation: 'fixed' = WHISPER_CHUNK_SECONDS windows, 'utterance' = cut at speech endpoints
+    WHISPER_SEGMENTATION: str = os.getenv('WHISPER_SEGMENTATION', 'fixed').lower()
+    UTTERANCE_TRAILING_SILENCE_MS: int = int(os.getenv('UTTERANCE_TRAILING_SILENCE_MS', '400') or '400')  # Closes an utterance
+    UTTERANCE_MAX_SECONDS: int = int(os.getenv('UTTERANCE_MAX_SECONDS', '8') or '8')  # Force-split long speech
+    UTTERANCE_MIN_SPEECH_MS: int = int(os.getenv('UTTERANCE_MIN_SPEECH_MS', '60') or '60')  # Speech needed to open one
+    UTTERANCE_PREROLL_MS: int = int(os.getenv('UTTERANCE_PREROLL_MS', '200') or '200')  # Audio kept before speech onset
+    # Streaming (utterance mode only): re-decode the open utterance and trigger early on stable keywords
+    WHISPER_STREAMING: bool = os.getenv('WHISPER_STREAMING', 'false').lower() in ('true', '1', 'yes')
+    STREAMING_INTERVAL_MS: int = int(os.getenv('STREAMING_INTERVAL_MS', '500') or '500')  # Partial decode cadence
+    STREAMING_CONTEXT_SECONDS: int = int(os.getenv('STREAMING_CONTEXT_SECONDS', '4') or '4')  # Sliding context per partial
+    STREAMING_BEAM_SIZE: int = int(os.getenv('STREAMING_BEAM_SIZE', '1') or '1')  # Partials favour speed
+    STREAMING_STABLE_HITS: int = int(os.getenv('STREAMING_STABLE_HITS', '2') or '2')  # Consecutive partials agreeing
+    # Inference scheduling: bounded backlog so transcripts never arrive long after the words were spoken
+    INFERENCE_MAX_QUEUE: int = int(os.getenv('INFERENCE_MAX_QUEUE', '8') or '8')  # Waiting windows (oldest dropped)
+    INFERENCE_MAX_PENDING_PER_SPEAKER: int = int(os.getenv('INFERENCE_MAX_PENDING_PER_SPEAKER', '1') or '1')  # Then merged
+    INFERENCE_DEADLINE_SECONDS: float = float(os.getenv('INFERENCE_DEADLINE_SECONDS', '6'))  # Older windows are dropped
+    INFERENCE_DEGRADE_DEPTH: int = int(os.getenv('INFERENCE_DEGRADE_DEPTH', '4') or '4')  # Queue depth that triggers fallback
+    INFERENCE_DEGRADED_BEAM_SIZE: int = int(os.getenv('INFERENCE_DEGRADED_BEAM_SIZE', '1') or '1')  # Beam while overloaded
+    INFERENCE_MAX_BATCH: int = int(os.getenv('INFERENCE_MAX_BATCH', '4') or '4')  # Windows sharing one encoder pass (1 = off)
+    INFERENCE_BATCH_WINDOW_MS: int = int(os.getenv('INFERENCE_BATCH_WINDOW_MS', '30') or '30')  # Wait for more windows
+    # Decode mode: 'transcribe' = open-vocabulary text, 'keyword' = score only the block words (much cheaper)
+    WHISPER_DECODE_MODE: str = os.getenv('WHISPER_DECODE_MODE', 'transcribe').lower()
+    KWS_MIN_CONFIDENCE: float = float(os.getenv('KWS_MIN_CONFIDENCE', '0.3'))  # Phrase probability needed to trigger
+    # Adaptive quality: "model:beam" tiers, best first (e.g. small:5,base:2,tiny:1); empty = fixed WHISPER_MODEL_SIZE/BEAM_SIZE
+    WHISPER_QUALITY_TIERS: str = os.getenv('WHISPER_QUALITY_TIERS', '')  # Every tier's model stays loaded
+    QUALITY_DOWN_RTF: float = float(os.getenv('QUALITY_DOWN_RTF', '0.8'))  # Decode time / audio time that steps down
+    QUALITY_UP_RTF: float = float(os.getenv('QUALITY_UP_RTF', '0.3'))  # ...and that steps back up
+    QUALITY_MAX_LAG_MS: float = float(os.getenv('QUALITY_MAX_LAG_MS', '1500'))  # Queue lag that steps down
+    QUALITY_RECOVER_LAG_MS: float = float(os.getenv('QUALITY_RECOVER_LAG_MS', '300'))  # Queue lag allowed when stepping up
+    QUALITY_COOLDOWN_SECONDS: float = float(os.getenv('QUALITY_COOLDOWN_SECONDS', '20'))  # Between tier switches
+    WHISPER_PRELOAD: bool = os.getenv('WHISPER_PRELOAD', 'true').lower() in ('true', '1', 'yes')  # Load + warm up at startup
+    # Backend: 'thread' = one model shared by threads in the bot process, 'process' = one model per worker process
+    WHISPER_BACKEND: str = os.getenv('WHISPER_BACKEND', 'thread').lower()
+    WHISPER_PROCESS_WORKERS: int = int(os.getenv('WHISPER_PROCESS_WORKERS', '2') or '2')  # Each loads its own model
+    WHISPER_PROCESS_CPU_THREADS: int = int(os.getenv('WHISPER_PROCESS_CPU_THREADS', '0') or '0')  # Per worker, 0 = auto
+    WHISPER_WORKER_TIMEOUT: float = float(os.getenv('WHISPER_WORKER_TIMEOUT', '30'))  # Hung worker is restarted
     
     # Minecraft RCON Configuration
     MINECRAFT_RCON_HOST: str = os.getenv('MINECRAFT_RCON_HOST', 'localhost')
     MINECRAFT_RCON_PORT: int = int(os.getenv('MINECRAFT_RCON_PORT', '25575') or '25575')
     MINECRAFT_RCON_PASSWORD: str = os.getenv('MINECRAFT_RCON_PASSWORD', '')
+    # Clears go over a pool of asyncio RCON connections (false = mcrcon in a thread)
+    RCON_ASYNC: bool = os.getenv('RCON_ASYNC', 'true').lower() in ('true', '1', 'yes')
+    RCON_PIPELINE: bool = os.getenv('RCON_PIPELINE', 'false').lower() in ('true', '1', 'yes')  # Only for servers that accept several packets per read
+    RCON_TIMEOUT: float = float(os.getenv('RCON_TIMEOUT', '10'))  # Seconds to wait for a reply
+    RCON_POOL_SIZE: int = int(os.getenv('RCON_POOL_SIZE', '4') or '4')  # Connections a clear is spread over
+    # World's datapacks/ folder: a generated pack tags multi-block words (#mcvoice:ore) so each is one fill
+    MINECRAFT_DATAPACK_DIR: str = os.getenv('MINECRAFT_DATAPACK_DIR', '')  # Empty = one fill per block ID
+    MINECRAFT_PACK_FORMAT: int = int(os.getenv('MINECRAFT_PACK_FORMAT', '48') or '48')  # 48 = 1.21
+    RCON_CLEAR_FUNCTIONS: bool = os.getenv('RCON_CLEAR_FUNCTIONS', 'true').lower() in ('true', '1', 'yes')  # One function call per clear
     
     # Bot Configuration
     DEFAULT_RADIUS: int = int(os.getenv('DEFAULT_RADIUS', '3') or '3')
     MAX_RADIUS: int = int(os.getenv('MAX_RADIUS', '10') or '10')
     COOLDOWN_SECONDS: int = int(os.getenv('COOLDOWN_SECONDS', '5') or '5')
+    # Near-miss block words ("obsidean", "cobble stone") match via a phonetic + edit-distance index
+    BLOCK_FUZZY_MATCHING: bool = os.getenv('BLOCK_FUZZY_MATCHING', 'false').lower() in ('true', '1', 'yes')
+    BLOCK_FUZZY_MAX_EDITS: int = int(os.getenv('BLOCK_FUZZY_MAX_EDITS', '1') or '1')  # Spelling edits on top of a phonetic match
+    BLOCK_FUZZY_MIN_LENGTH: int = int(os.getenv('BLOCK_FUZZY_MIN_LENGTH', '7') or '7')  # Shorter words need exact entries
     # Fill Y range: smaller = fewer RCON commands = faster. Full world: -64 to 320 (4 segments).
     # Surface-only (0-128) uses 2 segments. Adjust if players stay in a known height range.
     FILL_WORLD_MIN_Y: int = int(os.getenv('FILL_WORLD_MIN_Y', '-64') or '-64')
@@ -45,6 +102,7 @@ class Config:
     BASE_DIR: Path = Path(__file__).parent.parent
     CONFIG_DIR: Path = BASE_DIR / 'config'
     BLOCK_WORDS_FILE: Path = CONFIG_DIR / 'block_words.json'
+    BLOCK_WORDS_RELOAD_SECONDS: float = float(os.getenv('BLOCK_WORDS_RELOAD_SECONDS', '2'))  # Poll for edits, 0 = off
     
     # Audio recording (save what the bot hears for debugging/review)
     SAVE_AUDIO: bool = os.getenv('SAVE_AUDIO', 'false').lower() in ('true', '1', 'yes')
@@ -0,0 +1,254 @@
+"""Generated datapack: block tags for multi-block words and one clear function per block word."""
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .config import Config
+from .minecraft_rcon import CHUNK_RADIUS, FILL_LIMIT_BLOCKS
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'mcvoice'
+PACK_NAME = 'mcvoice'  # Folder under the world's datapacks/ (the server lists it as "file/mcvoice")
+
+_TAG_UNSAFE = re.compile(r'[^a-z0-9_.-]+')
+
+MACRO_PACK_FORMAT = 18  # 1.20.2: function macros ("$fill ~-$(r) ..."), so one function serves every radius
+
+BlockId = Union[str, List[str]]
+
+
+def tag_name(word: str) -> str:
+    """Block tag file name for a block word ("nether brick" -> "nether_brick")."""
+    return _TAG_UNSAFE.sub('_', word.lower()).strip('_') or 'block'
+
+
+def block_tags(block_words: Dict[str, BlockId]) -> Dict[str, List[str]]:
+    """
+    Block tags to generate: one per word that maps to more than one block ID.
+    
+    Returns:
+        Tag name -> block IDs (entries may themselves be tags, e.g. "#minecraft:logs")
+    """
+    tags = {}
+    for word, block_id in block_words.items():
+        if isinstance(block_id, str) or len(block_id) < 2:
+            continue
+        tags.setdefault(tag_name(word), list(block_id))
+    return tags
+
+
+def clear_function(
+    target: str,
+    world_min_y: int,
+    world_max_y: int,
+    max_radius: int,
+    macro: bool,
+) -> str:
+    """
+    Body of a function that clears target around every player.
+    
+    Segments are sized for max_radius, so every radius up to it stays under the fill
+    limit. With macro the radius is the function's "r" argument, otherwise CHUNK_RADIUS.
+    
+    Args:
+        target: Block ID or tag to replace with air
+        world_min_y: World bottom Y
+        world_max_y: World top Y
+        max_radius: Largest radius the function is called with
+        macro: Generate a macro function (needs MACRO_PACK_FORMAT)
+    
+    Returns:
+        mcfunction source
+    """
+    h_blocks = max(max_radius, CHUNK_RADIUS) * 2 + 1
+    segment_height = FILL_LIMIT_BLOCKS // (h_blocks * h_blocks)
+    r = '$(r)' if macro else str(CHUNK_RADIUS)
+    prefix = '$' if macro else ''
+    lines = [f"# Generated: clears {target} around every player (edits are overwritten)"]
+    for y_start in range(world_min_y, world_max_y + 1, segment_height):
+        y_end = min(y_start + segment_height - 1, world_max_y)
+        lines.append(
+            f"{prefix}execute as @a at @s run fill ~-{r} {y_start} ~-{r} ~{r} {y_end} ~{r} "
+            f"minecraft:air replace {target}"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def write_datapack(
+    datapack_dir: Path,
+    tags: Dict[str, List[str]],
+    pack_format: int,
+    functions: Optional[Dict[str, str]] = None,
+) -> Path:
+    """
+    Write the datapack (replacing any previous version) into a world's datapacks folder.
+    
+    Tags and functions are written to both the 1.21+ folder names (tags/block,
+    function) and the older ones (tags/blocks, functions), so one pack works on
+    either side of the rename.
+    
+    Args:
+        datapack_dir: The world's datapacks/ folder
+        tags: Tag name -> block IDs
+        pack_format: pack.mcmeta pack_format for the server's version
+        functions: Function name under clear/ -> mcfunction source
+    
+    Returns:
+        Path of the pack folder
+    """
+    pack_dir = Path(datapack_dir) / PACK_NAME
+    staging = Path(datapack_dir) / f".{PACK_NAME}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    
+    meta = {
+        'pack': {
+            'pack_format': pack_format,
+            'supported_formats': {'min_inclusive': 4, 'max_inclusive': max(pack_format, 99)},
+            'description': 'Voice-triggered block clears (generated, edits are overwritten)',
+        }
+    }
+    staging.mkdir(parents=True)
+    (staging / 'pack.mcmeta').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+    for folder in ('block', 'blocks'):
+        tag_dir = staging / 'data' / NAMESPACE / 'tags' / folder
+        tag_dir.mkdir(parents=True)
+        for name, values in tags.items():
+            (tag_dir / f"{name}.json").write_text(
+                json.dumps({'replace': False, 'values': values}, indent=2), encoding='utf-8'
+            )
+    for folder in ('function', 'functions'):
+        function_dir = staging / 'data' / NAMESPACE / folder / 'clear'
+        function_dir.mkdir(parents=True)
+        for name, source in (functions or {}).items():
+            (function_dir / f"{name}.mcfunction").write_text(source, encoding='utf-8')
+    
+    # Swap the finished pack in so a server reload never sees a half-written one
+    old = Path(datapack_dir) / f".{PACK_NAME}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if pack_dir.exists():
+        os.replace(pack_dir, old)
+    os.replace(staging, pack_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return pack_dir
+
+
+class DatapackManager:
+    """
+    Keeps the generated datapack in step with the block words and tells clears
+    which words can use a tag or a clear function.
+    
+    A word's tag or function is only used once the server has reloaded the pack with
+    that exact list of block IDs; until then (or without a datapacks folder
+    configured) clears fall back to one fill per block ID.
+    """
+    
+    def __init__(self, datapack_dir: Optional[Path] = None, pack_format: Optional[int] = None):
+        """
+        Initialize the manager.
+        
+        Args:
+            datapack_dir: The world's datapacks/ folder (None = Config.MINECRAFT_DATAPACK_DIR; empty disables)
+            pack_format: pack.mcmeta pack_format (None = Config.MINECRAFT_PACK_FORMAT)
+        """
+        if datapack_dir is None:
+            configured = getattr(Config, 'MINECRAFT_DATAPACK_DIR', '')
+            datapack_dir = Path(configured) if configured else None
+        self.datapack_dir = datapack_dir
+        self.pack_format = pack_format or getattr(Config, 'MINECRAFT_PACK_FORMAT', 48)
+        self.functions = getattr(Config, 'RCON_CLEAR_FUNCTIONS', True)  # Generate clear/<word> functions
+        self.macros = self.pack_format >= MACRO_PACK_FORMAT
+        self.installed: Dict[str, List[str]] = {}  # Tag/function name -> block IDs the server has loaded
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether a datapacks folder is configured."""
+        return self.datapack_dir is not None
+    
+    def write(self, block_words: Dict[str, BlockId]) -> Dict[str, List[str]]:
+        """
+        Write the datapack for block words (blocking file I/O: call it off the event loop).
+        
+        Returns:
+            Name -> block IDs for every word written (not usable until the server
+            reloads, see mark_installed)
+        """
+        tags = block_tags(block_words)
+        contents = {}
+        functions = {}
+        for word, block_id in block_words.items():
+            block_ids = [block_id] if isinstance(block_id, str) else list(block_id)
+            if not block_ids:
+                continue
+            name = tag_name(word)
+            if name in contents:
+                continue
+            contents[name] = block_ids
+            if self.functions:
+                target = f"#{NAMESPACE}:{name}" if name in tags else block_ids[0]
+                functions[name] = clear_function(
+                    target, Config.FILL_WORLD_MIN_Y, Config.FILL_WORLD_MAX_Y, Config.MAX_RADIUS, self.macros
+                )
+        path = write_datapack(self.datapack_dir, tags, self.pack_format, functions)
+        logger.info(f"Wrote datapack with {len(tags)} block tags and {len(functions)} clear functions to {path}")
+        return contents
+    
+    def mark_installed(self, contents: Dict[str, List[str]]) -> None:
+        """Record what the server has loaded (replaces the previous set in one assignment)."""
+        self.installed = dict(contents)
+    
+    def resolve(self, word: str, block_id: BlockId) -> List[str]:
+        """
+        Targets to clear for a detected word: its tag if the server has it, else every block ID.
+        
+        Args:
+            word: Matched block word
+            block_id: The word's block ID or list of IDs
+        
+        Returns:
+            ["#mcvoice:<word>"] or the block IDs
+        """
+        block_ids = [block_id] if isinstance(block_id, str) else list(block_id)
+        name = tag_name(word)
+        if len(block_ids) > 1 and self.installed.get(name) == block_ids:
+            return [f"#{NAMESPACE}:{name}"]
+        return block_ids
+    
+    def function_command(self, word: str, block_id: BlockId, radius: int) -> Optional[str]:
+        """
+        Command running the word's clear function around every player, if the server has it.
+        
+        Args:
+            word: Matched block word
+            block_id: The word's block ID or list of IDs
+            radius: Horizontal reach around each player
+        
+        Returns:
+            "function mcvoice:clear/<word> {r:<radius>}", or None to clear with fills
+        """
+        if not self.functions:
+            return None
+        block_ids = [block_id] if isinstance(block_id, str) else list(block_id)
+        name = tag_name(word)
+        if self.installed.get(name) != block_ids:
+            return None
+        if self.macros:
+            return f"function {NAMESPACE}:clear/{name} {{r:{radius}}}"
+        # Without macros the function is fixed at CHUNK_RADIUS
+        return f"function {NAMESPACE}:clear/{name}" if radius == CHUNK_RADIUS else None
+
+
+# Global datapack manager instance
+_datapack_manager: Optional[DatapackManager] = None
+
+
+def get_datapack_manager() -> DatapackManager:
+    """Get or create the global datapack manager instance."""
+    global _datapack_manager
+    if _datapack_manager is None:
+        _datapack_manager = DatapackManager()
+    return _datapack_manager
@@ -1,7 +1,10 @@
 """Discord voice client for audio capture."""
 import asyncio
 import logging
-from typing import Optional
+import threading
+from array import array
+from collections import deque
+from typing import Iterator, List, NamedTuple, Optional
 
 import discord
 from discord.ext import voice_recv
@@ -30,59 +33,218 @@ _from_opus.PacketDecoder._decode_packet_original = _from_opus.PacketDecoder._dec
 _from_opus.PacketDecoder._decode_packet = _decode_packet_robust
 
 
+# One decoded 20ms frame: 960 samples x 2 channels x 16-bit
+FRAME_BYTES = discord.opus.Decoder.SAMPLES_PER_FRAME * discord.opus.Decoder.CHANNELS * 2
+# Frames per AudioPacketBatch (~0.6s of a single speaker)
+BATCH_MAX_PACKETS = 32
+# Queue bound in batches; full batches keep this at ~30 seconds of single-speaker audio
+AUDIO_QUEUE_MAX_BATCHES = 1500 // BATCH_MAX_PACKETS
+# Max delay before frames written on the voice_recv thread are handed to the event loop.
+# Frames arriving within this window are coalesced into one loop wakeup.
+HANDOFF_INTERVAL = 0.02
+# Stored in the batch arrays in place of a missing SSRC / user ID / timestamp
+_MISSING = -1
+
+
+class AudioPacket(NamedTuple):
+    """One decoded voice frame (a zero-copy view into an AudioPacketBatch)."""
+    ssrc: Optional[int]
+    user_id: Optional[int]
+    audio: memoryview  # PCM16 48kHz stereo
+    timestamp: Optional[int]
+
+
+class AudioPacketBatch:
+    """
+    Struct-of-arrays batch of decoded voice frames.
+    
+    PCM for every frame is appended to one preallocated bytearray, while SSRC,
+    user ID, RTP timestamp and PCM end offset go into parallel typed arrays.
+    The audio queue carries one of these per batch instead of one dict per frame,
+    and batches are recycled through the sink once the consumer is done.
+    """
+    
+    __slots__ = ('pcm', 'ssrcs', 'user_ids', 'timestamps', 'ends', '_used')
+    
+    def __init__(self, max_packets: int = BATCH_MAX_PACKETS, frame_bytes: int = FRAME_BYTES):
+        self.pcm = bytearray(max_packets * frame_bytes)
+        self.ssrcs = array('q')
+        self.user_ids = array('q')
+        self.timestamps = array('q')
+        self.ends = array('Q')
+        self._used = 0
+    
+    def __len__(self) -> int:
+        return len(self.ends)
+    
+    def append(self, ssrc: Optional[int], user_id: Optional[int], pcm: bytes, timestamp: Optional[int]) -> bool:
+        """Copy one frame into the batch. Returns False if it doesn't fit."""
+        end = self._used + len(pcm)
+        if end > len(self.pcm):
+            if self.ends:
+                return False
+            # Oversized frame into an empty batch: replace (never resize) the buffer
+            self.pcm = bytearray(len(pcm))
+        self.pcm[self._used:end] = pcm
+        self._used = end
+        self.ends.append(end)
+        self.ssrcs.append(_MISSING if ssrc is None else ssrc)
+        self.user_ids.append(_MISSING if user_id is None else user_id)
+        self.timestamps.append(_MISSING if timestamp is None else timestamp)
+        return True
+    
+    def clear(self) -> None:
+        """Empty the batch so it can be reused (the PCM buffer is kept)."""
+        del self.ssrcs[:], self.user_ids[:], self.timestamps[:], self.ends[:]
+        self._used = 0
+    
+    def __iter__(self) -> Iterator[AudioPacket]:
+        view = memoryview(self.pcm)
+        start = 0
+        for i, end in enumerate(self.ends):
+            ssrc = self.ssrcs[i]
+            user_id = self.user_ids[i]
+            timestamp = self.timestamps[i]
+            yield AudioPacket(
+                None if ssrc == _MISSING else ssrc,
+                None if user_id == _MISSING else user_id,
+                view[start:end],
+                None if timestamp == _MISSING else timestamp,
+            )
+            start = end
+
+
 class AudioQueueSink(voice_recv.AudioSink):
-    """Custom sink that queues audio data for processing."""
+    """
+    Custom sink that batches audio frames and queues them for processing.
+    
+    write() runs on discord-ext-voice-recv's router thread, while audio_queue is an
+    asyncio.Queue owned by the event loop and is not thread-safe. Frames are therefore
+    appended to a lock-protected pending batch, and a flush is scheduled on the loop
+    with call_soon_threadsafe (at most one every HANDOFF_INTERVAL). All queue
+    operations, including the drop-oldest backpressure path, run on the loop thread.
+    """
     
-    def __init__(self, audio_queue: asyncio.Queue, is_capturing_flag):
+    def __init__(self, audio_queue: asyncio.Queue, is_capturing_flag, loop: asyncio.AbstractEventLoop):
         super().__init__()
         self.audio_queue = audio_queue
         self.is_capturing_flag = is_capturing_flag
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._pending = AudioPacketBatch()
+        self._ready: List[AudioPacketBatch] = []  # Full batches waiting for the next flush
+        self._flush_scheduled = False
+        self._free: deque = deque()  # Recycled batches
     
     def wants_opus(self) -> bool:
         """We want PCM decoded audio, not Opus."""
         return False
     
+    def _new_batch(self) -> AudioPacketBatch:
+        """Take a recycled batch, or allocate one if none are free."""
+        try:
+            return self._free.pop()
+        except IndexError:
+            return AudioPacketBatch()
+    
+    def release(self, batch: AudioPacketBatch) -> None:
+        """Return a processed batch to the pool."""
+        batch.clear()
+        self._free.append(batch)
+    
+    def take_pending(self) -> List[AudioPacketBatch]:
+        """
+        Detach every batch not yet on the queue, oldest first. Thread-safe.
+        
+        Full batches still waiting for the next flush come before the batch being
+        filled, and both are taken under one lock, so frames never reach the
+        consumer out of order.
+        """
+        with self._lock:
+            batches = self._ready
+            self._ready = []
+            if len(self._pending):
+                batches.append(self._pending)
+                self._pending = self._new_batch()
+            return batches
+    
+    def _enqueue(self, batch: AudioPacketBatch) -> None:
+        """Put a batch on the audio queue (event loop thread only)."""
+        try:
+            self.audio_queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # If queue is full, try to drop oldest batch and add new one
+            try:
+                # Remove one old batch
+                dropped = self.audio_queue.get_nowait()
+                if dropped is not None:
+                    self.release(dropped)
+                # Add new batch
+                self.audio_queue.put_nowait(batch)
+                logger.debug("Audio queue full, dropped oldest batch")
+            except asyncio.QueueEmpty:
+                # Queue became empty, just add
+                try:
+                    self.audio_queue.put_nowait(batch)
+                except asyncio.QueueFull:
+                    logger.warning("Audio queue is full, dropping batch")
+                    self.release(batch)
+    
+    def _schedule_flush(self) -> None:
+        """Arm the coalescing timer (event loop thread)."""
+        self.loop.call_later(HANDOFF_INTERVAL, self._flush)
+    
+    def _flush(self) -> None:
+        """Move ready batches onto the audio queue (event loop thread)."""
+        with self._lock:
+            self._flush_scheduled = False
+            batches = self._ready
+            self._ready = []
+            # Hand the partial batch over right away if the consumer is idle (low latency);
+            # otherwise keep filling it - the consumer takes it once it drains the queue
+            if len(self._pending) and not batches and self.audio_queue.empty():
+                batches.append(self._pending)
+                self._pending = self._new_batch()
+        for batch in batches:
+            self._enqueue(batch)
+    
     def write(self, user: Optional[discord.User], data: voice_recv.VoiceData) -> None:
-        """Called when audio data is received."""
+        """Called on the voice_recv router thread when audio data is received."""
         if not self.is_capturing_flag[0]:
             return
         
+        # Validate PCM data before queuing
+        if not data.pcm or len(data.pcm) == 0:
+            return
+        
         # Get user ID
         user_id = user.id if user else None
         
-        # Get SSRC from packet if available
+        # Get SSRC and RTP timestamp from packet if available
         ssrc = None
+        timestamp = None
         if data.packet:
             ssrc = getattr(data.packet, 'ssrc', None)
+            timestamp = getattr(data.packet, 'timestamp', None)
         
-        # Queue audio data for processing
-        audio_data = {
-            'ssrc': ssrc,
-            'user_id': user_id,
-            'audio': data.pcm,  # Use decoded PCM data
-            'timestamp': getattr(data.packet, 'timestamp', None) if data.packet else None
-        }
-        
-        # Validate PCM data before queuing
-        if not data.pcm or len(data.pcm) == 0:
-            return
+        with self._lock:
+            # Append to the pending batch (use decoded PCM data)
+            if not self._pending.append(ssrc, user_id, data.pcm, timestamp):
+                self._ready.append(self._pending)
+                self._pending = self._new_batch()
+                self._pending.append(ssrc, user_id, data.pcm, timestamp)
+            if len(self._pending) >= BATCH_MAX_PACKETS:
+                self._ready.append(self._pending)
+                self._pending = self._new_batch()
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
         
-        try:
-            self.audio_queue.put_nowait(audio_data)
-        except asyncio.QueueFull:
-            # If queue is full, try to drop oldest item and add new one
+        if schedule:
             try:
-                # Remove one old item
-                self.audio_queue.get_nowait()
-                # Add new item
-                self.audio_queue.put_nowait(audio_data)
-                logger.debug("Audio queue full, dropped oldest packet")
-            except asyncio.QueueEmpty:
-                # Queue became empty, just add
-                try:
-                    self.audio_queue.put_nowait(audio_data)
-                except asyncio.QueueFull:
-                    logger.warning("Audio queue is full, dropping packet")
+                self.loop.call_soon_threadsafe(self._schedule_flush)
+            except RuntimeError:
+                # Event loop closed during shutdown
+                pass
     
     def cleanup(self) -> None:
         """Cleanup when sink is stopped."""
@@ -94,9 +256,9 @@ class VoiceClient(voice_recv.VoiceRecvClient):
     
     def __init__(self, client, channel):
         super().__init__(client, channel)
-        # Queue with larger maxsize to handle burst audio (about 30 seconds of audio at 20ms packets)
-        # Discord sends ~50 packets/second, so 1500 = ~30 seconds buffer
-        self.audio_queue: asyncio.Queue = asyncio.Queue(maxsize=1500)
+        # Queue of AudioPacketBatch objects, sized for burst audio (about 30 seconds at 20ms packets)
+        # Discord sends ~50 packets/second per speaker
+        self.audio_queue: asyncio.Queue = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_BATCHES)
         self.is_capturing = [False]  # Use list to allow reference passing
         self._sink: Optional[AudioQueueSink] = None
     
@@ -115,7 +277,7 @@ class VoiceClient(voice_recv.VoiceRecvClient):
                 self.is_capturing[0] = False
                 return
             
-            self._sink = AudioQueueSink(self.audio_queue, self.is_capturing)
+            self._sink = AudioQueueSink(self.audio_queue, self.is_capturing, self.loop)
             try:
                 self.listen(self._sink)
             except discord.ClientException as e:
@@ -128,6 +290,8 @@ class VoiceClient(voice_recv.VoiceRecvClient):
     def stop_capturing(self):
         """Stop capturing audio packets."""
         self.is_capturing[0] = False
+        # Wake a consumer blocked in get_audio_batch() so it can see capture stopped
+        self._wake_consumer()
         # Stop listening if we're listening
         if self.is_listening():
             self.stop_listening()
@@ -138,12 +302,44 @@ class VoiceClient(voice_recv.VoiceRecvClient):
         """Check if currently capturing audio."""
         return self.is_capturing[0]
     
-    async def get_audio_chunk(self, timeout: float = 1.0) -> Optional[dict]:
-        """Get the next audio chunk from the queue."""
+    def _wake_consumer(self):
+        """Queue a None sentinel that makes a pending get_audio_batch() return."""
         try:
-            return await asyncio.wait_for(self.audio_queue.get(), timeout=timeout)
-        except asyncio.TimeoutError:
-            return None
+            self.audio_queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # Queue is full, so the consumer isn't blocked waiting on it
+            pass
+    
+    async def get_audio_batches(self, max_batches: int = 8) -> List[AudioPacketBatch]:
+        """
+        Wait for audio, then return every batch queued so far (up to max_batches),
+        followed by the frames the sink hasn't flushed yet once the queue is empty.
+        
+        Blocks on the queue with no timeout, so a silent channel costs no wakeups.
+        Returns an empty (or short) list when woken by stop_capturing().
+        Pass each batch to release_batch() once its packets have been processed.
+        """
+        batch = await self.audio_queue.get()
+        batches = []
+        while batch is not None:
+            batches.append(batch)
+            if len(batches) >= max_batches:
+                break
+            try:
+                batch = self.audio_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+        # Queue drained: also take frames the sink is still holding. The sink keeps its
+        # partial batch while the queue is non-empty and schedules no further flush, so
+        # after a burst followed by silence (DTX) nothing else would ever deliver them.
+        if batch is not None and self.audio_queue.empty() and self._sink:
+            batches.extend(self._sink.take_pending())
+        return batches
+    
+    def release_batch(self, batch: AudioPacketBatch) -> None:
+        """Return a processed batch to the sink's pool."""
+        if self._sink:
+            self._sink.release(batch)
 
 
 async def convert_audio_to_pcm16(audio_data: bytes, sample_rate: int = 16000) -> bytes:
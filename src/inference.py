@@ -0,0 +1,338 @@
+"""Bounded scheduling of Whisper inference jobs."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set
+
+import numpy as np
+
+from .audio import WHISPER_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Decoder: (16kHz mono float32 audio, beam size or None for the default) -> transcript text
+DecodeFn = Callable[[np.ndarray, Optional[int]], Awaitable[str]]
+# Batch decoder: (windows, beam size) -> one transcript per window, in order
+BatchDecodeFn = Callable[[List[np.ndarray], Optional[int]], Awaitable[List[str]]]
+# Result handler: receives the text, or None when the job was dropped or failed
+ResultFn = Callable[[Optional[str]], Awaitable[None]]
+
+LAG_SMOOTHING = 0.2  # EWMA weight of the newest queue-lag sample
+
+
+class InferenceJob:
+    """One window of audio waiting for (or undergoing) inference."""
+    
+    __slots__ = ('key', 'audio', 'on_result', 'beam_size', 'droppable', 'created')
+    
+    def __init__(
+        self,
+        key: Hashable,
+        audio: np.ndarray,
+        on_result: ResultFn,
+        beam_size: Optional[int],
+        droppable: bool,
+    ):
+        self.key = key
+        self.audio = audio
+        self.on_result = on_result
+        self.beam_size = beam_size
+        self.droppable = droppable
+        self.created = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    Fixed pool of inference workers fed from a bounded queue.
+    
+    Windows beyond the per-speaker cap are merged into that speaker's waiting
+    window, the oldest job is dropped when the queue is full, jobs older than the
+    deadline are discarded unrun, and decoding falls back to a smaller beam while
+    the queue is backed up. With a batch decoder, windows from different speakers
+    that are ready within batch_window_ms of each other share one encoder pass.
+    """
+    
+    def __init__(
+        self,
+        decode: DecodeFn,
+        workers: int = 2,
+        max_queue: int = 8,
+        max_pending_per_speaker: int = 1,
+        deadline_seconds: float = 6.0,
+        degrade_depth: int = 4,
+        degraded_beam_size: int = 1,
+        max_merge_samples: int = WHISPER_SAMPLE_RATE * 30,
+        decode_batch: Optional[BatchDecodeFn] = None,
+        max_batch: int = 1,
+        batch_window_ms: float = 0.0,
+    ):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            decode: Coroutine function that transcribes audio with a given beam size
+            workers: Concurrent decodes (match the inference executor's thread count)
+            max_queue: Jobs allowed to wait; the oldest is dropped beyond this
+            max_pending_per_speaker: Waiting windows per speaker before new audio is merged into them
+            deadline_seconds: Jobs that waited longer than this are dropped unrun
+            degrade_depth: Queue depth at which decoding switches to degraded_beam_size
+            degraded_beam_size: Beam size used while overloaded
+            max_merge_samples: Longest merged window (Whisper sees at most 30s)
+            decode_batch: Coroutine function that transcribes several windows in one pass
+            max_batch: Most windows per batch (1 disables batching)
+            batch_window_ms: How long a worker waits for more windows before decoding
+        """
+        self._decode = decode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_pending_per_speaker = max_pending_per_speaker
+        self.deadline_seconds = deadline_seconds
+        self.degrade_depth = degrade_depth
+        self.degraded_beam_size = degraded_beam_size
+        self.max_merge_samples = max_merge_samples
+        self._decode_batch = decode_batch
+        self.max_batch = max_batch if decode_batch is not None else 1
+        self.batch_window = batch_window_ms / 1000.0
+        
+        self._queue: Deque[InferenceJob] = deque()
+        self._pending: Dict[Hashable, int] = {}  # key -> jobs waiting in the queue
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._callbacks: Set[asyncio.Task] = set()  # Rejection callbacks still running (kept alive until done)
+        self.running = 0
+        
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.merged = 0
+        self.dropped_full = 0
+        self.dropped_stale = 0
+        self.degraded = 0
+        self.batches = 0  # Decodes that covered more than one window
+        self.batched_windows = 0
+        self.lag_ms = 0.0  # Smoothed time from submission to decode start
+        self.max_lag_ms = 0.0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return len(self._queue)
+    
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of queue and latency metrics."""
+        return {
+            'queue_depth': self.queue_depth,
+            'running': self.running,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'merged': self.merged,
+            'dropped_full': self.dropped_full,
+            'dropped_stale': self.dropped_stale,
+            'degraded': self.degraded,
+            'batches': self.batches,
+            'batched_windows': self.batched_windows,
+            'lag_ms': round(self.lag_ms, 1),
+            'max_lag_ms': round(self.max_lag_ms, 1),
+        }
+    
+    def _start(self) -> None:
+        """Spawn the workers on the running loop (first submit)."""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    def submit(
+        self,
+        key: Hashable,
+        audio: np.ndarray,
+        on_result: ResultFn,
+        beam_size: Optional[int] = None,
+        droppable: bool = False,
+        mergeable: bool = True,
+    ) -> bool:
+        """
+        Queue audio for inference. Must be called from the event loop.
+        
+        Args:
+            key: Speaker identity used for the per-speaker cap
+            audio: 16kHz mono float32 window (owned by the scheduler from now on)
+            on_result: Coroutine function called with the text, or None if dropped/failed
+            beam_size: Beam size for this job (None = decoder default)
+            droppable: Best-effort job (e.g. a streaming partial) that never waits behind its speaker
+            mergeable: Whether the audio may be concatenated onto the speaker's waiting window
+                (False for overlapping windows, which would repeat the shared audio; such jobs
+                are not held to max_pending_per_speaker, only to max_queue and the deadline)
+        
+        Returns:
+            False if the job was rejected outright
+        """
+        if not self._tasks:
+            self._start()
+        self.submitted += 1
+        
+        pending = self._pending.get(key, 0)
+        if droppable:
+            if pending:
+                # The speaker already has work waiting; a partial would only add lag
+                self._reject(on_result)
+                return False
+        elif pending >= self.max_pending_per_speaker and mergeable:
+            if self._merge(key, audio, on_result):
+                return True
+        
+        if len(self._queue) >= self.max_queue:
+            self._evict_one()
+        
+        self._queue.append(InferenceJob(key, audio, on_result, beam_size, droppable))
+        self._pending[key] = self._pending.get(key, 0) + 1
+        self._wakeup.set()
+        return True
+    
+    def _merge(self, key: Hashable, audio: np.ndarray, on_result: ResultFn) -> bool:
+        """Append audio to the speaker's newest waiting window; partials are superseded."""
+        for job in reversed(self._queue):
+            if job.key != key:
+                continue
+            if job.droppable:
+                self._remove(job)
+                return False
+            if len(job.audio) + len(audio) > self.max_merge_samples:
+                return False
+            job.audio = np.concatenate((job.audio, audio))
+            previous, job.on_result = job.on_result, on_result
+            self.merged += 1
+            self._reject(previous)
+            return True
+        return False
+    
+    def _evict_one(self) -> None:
+        """Drop the oldest best-effort job, else the oldest job."""
+        victim = next((job for job in self._queue if job.droppable), self._queue[0])
+        self._remove(victim)
+        self.dropped_full += 1
+        logger.warning(f"Inference queue full ({self.max_queue}); dropped a {len(victim.audio) / WHISPER_SAMPLE_RATE:.1f}s window")
+    
+    def _remove(self, job: InferenceJob) -> None:
+        """Take a waiting job out of the queue and tell its owner."""
+        self._unlink(job)
+        self._reject(job.on_result)
+    
+    def _unlink(self, job: InferenceJob) -> None:
+        """Take a waiting job out of the queue."""
+        self._queue.remove(job)
+        self._pending[job.key] -= 1
+        if not self._pending[job.key]:
+            del self._pending[job.key]
+    
+    def _reject(self, on_result: ResultFn) -> None:
+        """Notify a job owner that its audio will not be decoded."""
+        task = asyncio.create_task(self._deliver(on_result, None))
+        # The loop only keeps weak references to tasks: hold this one until it finishes
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+    
+    @staticmethod
+    async def _deliver(on_result: ResultFn, text: Optional[str]) -> None:
+        """Hand a job's result to its owner, logging (not raising) the owner's errors."""
+        try:
+            await on_result(text)
+        except Exception as e:
+            logger.error(f"Error handling transcript: {e}", exc_info=True)
+    
+    async def _next_job(self) -> InferenceJob:
+        """Wait for the oldest job and take it out of the queue."""
+        while not self._queue:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        job = self._queue[0]
+        self._unlink(job)
+        return job
+    
+    def _expired(self, job: InferenceJob) -> bool:
+        """Drop a job that has waited past the deadline; record lag for the rest."""
+        waited = time.monotonic() - job.created
+        if waited > self.deadline_seconds:
+            self.dropped_stale += 1
+            logger.debug(f"Dropped stale {len(job.audio) / WHISPER_SAMPLE_RATE:.1f}s window after {waited:.1f}s in queue")
+            self._reject(job.on_result)
+            return True
+        
+        lag_ms = waited * 1000.0
+        self.lag_ms += LAG_SMOOTHING * (lag_ms - self.lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        return False
+    
+    def _take_batch(self, first: InferenceJob) -> List[InferenceJob]:
+        """Collect waiting jobs that can share a decode with the first (same beam size)."""
+        jobs = [first]
+        for job in list(self._queue):
+            if len(jobs) >= self.max_batch:
+                break
+            if job.beam_size != first.beam_size:
+                continue
+            self._unlink(job)
+            if not self._expired(job):
+                jobs.append(job)
+        return jobs
+    
+    async def _worker(self) -> None:
+        """Decode jobs (alone or batched) until cancelled."""
+        while True:
+            job = await self._next_job()
+            if self._expired(job):
+                continue
+            
+            jobs = [job]
+            if self.max_batch > 1:
+                if len(self._queue) < self.max_batch - 1 and self.batch_window > 0:
+                    # Give other speakers' windows a moment to arrive
+                    await asyncio.sleep(self.batch_window)
+                jobs = self._take_batch(job)
+            
+            beam_size = job.beam_size
+            if len(self._queue) >= self.degrade_depth:
+                # Backed up: trade accuracy for throughput until the queue drains
+                beam_size = self.degraded_beam_size
+                self.degraded += 1
+            
+            self.running += len(jobs)
+            texts: List[Optional[str]] = [None] * len(jobs)
+            try:
+                if len(jobs) == 1:
+                    texts = [await self._decode(job.audio, beam_size)]
+                else:
+                    texts = await self._decode_batch([j.audio for j in jobs], beam_size)
+                    self.batches += 1
+                    self.batched_windows += len(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error transcribing audio chunk: {e}", exc_info=True)
+            finally:
+                self.running -= len(jobs)
+            self.completed += len(jobs)
+            
+            for done, text in zip(jobs, texts):
+                await self._deliver(done.on_result, text)
+    
+    def cancel(self, keys: Set[Hashable]) -> int:
+        """
+        Drop every waiting job for the given keys (e.g. one guild's speakers); workers keep running.
+        
+        Returns:
+            Number of jobs dropped
+        """
+        victims = [job for job in self._queue if job.key in keys]
+        for job in victims:
+            self._remove(job)
+        return len(victims)
+    
+    async def stop(self) -> None:
+        """Cancel the workers and drop everything still waiting."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue:
+            self._remove(self._queue[0])
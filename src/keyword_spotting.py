@@ -0,0 +1,224 @@
+"""Keyword spotting: decode only the configured block words instead of free-form text."""
+import logging
+import string
+from typing import Dict, List, Optional, Tuple
+
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+END_PUNCTUATION = (".", "!", "?", ",")  # Tokens allowed to close a spotted phrase
+
+
+class _TrieNode:
+    """Node in the token trie; word is set where a phrase ends."""
+    
+    __slots__ = ('children', 'word')
+    
+    def __init__(self):
+        self.children: Dict[int, '_TrieNode'] = {}
+        self.word: Optional[str] = None
+
+
+class KeywordSpotter:
+    """
+    Constrained Whisper decoder over a fixed phrase list.
+    
+    Each window gets one encoder pass and two short decoding stages:
+    
+    1. Greedy decoding restricted to the phrase tokens plus end-of-text.
+       The output is walked through a prefix trie of the tokenized phrases,
+       which yields the longest phrase it spells.
+    2. A forced pass over that phrase with no restriction. It measures how
+       likely Whisper itself is to say the phrase (and end the word there),
+       which gives a calibrated confidence. It is one single-step decode per
+       phrase token plus one: CTranslate2 only returns logits for generated
+       steps, so the phrase is forced by growing the prompt a token at a time.
+    
+    This costs a fraction of open-vocabulary beam search.
+    """
+    
+    def __init__(
+        self,
+        model: WhisperModel,
+        words: List[str],
+        min_confidence: float = 0.3,
+        no_speech_threshold: float = 0.6,
+    ):
+        """
+        Build the phrase trie for a loaded model.
+        
+        Args:
+            model: Loaded Faster-Whisper model (its tokenizer defines the trie)
+            words: Phrases to spot (e.g. block words)
+            min_confidence: Lowest phrase probability reported as a match
+            no_speech_threshold: Windows Whisper thinks are silence above this are skipped
+        """
+        self.model = model
+        self.min_confidence = min_confidence
+        self.no_speech_threshold = no_speech_threshold
+        self.tokenizer = Tokenizer(
+            model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en"
+        )
+        self.prompt = model.get_prompt(self.tokenizer, [], without_timestamps=True)
+        
+        self._root = _TrieNode()
+        self._max_tokens = 0
+        allowed = {self.tokenizer.eot}
+        for word in words:
+            for variant in self._variants(word):
+                tokens = self.tokenizer.encode(" " + variant)
+                self._insert(tokens, word)
+                allowed.update(tokens)
+                self._max_tokens = max(self._max_tokens, len(tokens))
+        for mark in END_PUNCTUATION:
+            allowed.update(self.tokenizer.encode(mark))
+        
+        # Static logit mask: everything outside the phrase vocabulary is suppressed
+        vocab_size = model.hf_tokenizer.get_vocab_size()
+        self._suppress = [token for token in range(vocab_size) if token not in allowed]
+        # Tokens that would extend the last word (e.g. "stone" -> "stonework")
+        self._continues = np.zeros(vocab_size, dtype=bool)
+        pieces = model.hf_tokenizer.decode_batch([[token] for token in range(vocab_size)])
+        for token, piece in enumerate(pieces):
+            self._continues[token] = bool(piece) and piece[0] not in string.whitespace + string.punctuation
+    
+    @staticmethod
+    def _variants(word: str) -> List[str]:
+        """Casings Whisper commonly emits for a phrase."""
+        lower = word.lower()
+        return list(dict.fromkeys((lower, lower.capitalize(), lower.title())))
+    
+    def _insert(self, tokens: List[int], word: str) -> None:
+        """Add a tokenized phrase to the trie (first phrase wins on identical tokens)."""
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _TrieNode())
+        if node.word is None:
+            node.word = word
+    
+    def _longest_phrase(self, tokens: List[int]) -> Tuple[Optional[str], List[int]]:
+        """Longest phrase spelled from the start of a token sequence."""
+        node = self._root
+        best: Tuple[Optional[str], List[int]] = (None, [])
+        for i, token in enumerate(tokens):
+            node = node.children.get(token)
+            if node is None:
+                break
+            if node.word is not None:
+                best = (node.word, tokens[:i + 1])
+        return best
+    
+    @staticmethod
+    def _log_softmax(logits: np.ndarray) -> np.ndarray:
+        """Log-probabilities from raw logits."""
+        shifted = logits - logits.max()
+        return shifted - np.log(np.exp(shifted).sum())
+    
+    def _confidence(self, step_logits: list, tokens: List[int]) -> float:
+        """
+        Probability of the phrase followed by a word boundary.
+        
+        Args:
+            step_logits: Distribution over token i at step i, plus one step for the token after the phrase
+            tokens: The phrase's tokens
+        """
+        total = 0.0
+        for i, token in enumerate(tokens):
+            total += self._log_softmax(np.asarray(step_logits[i], dtype=np.float32))[token]
+        after = np.exp(self._log_softmax(np.asarray(step_logits[len(tokens)], dtype=np.float32)))
+        boundary = 1.0 - after[:len(self._continues)][self._continues[:len(after)]].sum()
+        return float(np.exp(total) * max(boundary, 0.0))
+    
+    def spot(self, windows: List[np.ndarray]) -> List[Optional[Tuple[str, float]]]:
+        """
+        Spot the configured phrases in 16kHz mono float32 windows (up to 30s each).
+        
+        Returns:
+            Per window, (phrase, confidence) or None when nothing matched confidently
+        """
+        if self._max_tokens == 0:
+            return [None] * len(windows)
+        features = np.stack([
+            pad_or_trim(self.model.feature_extractor(window)[..., :-1]) for window in windows
+        ])
+        encoder_output = self.model.encode(features)
+        
+        # Pass 1: greedy decode inside the phrase vocabulary
+        constrained = self.model.model.generate(
+            encoder_output,
+            [list(self.prompt) for _ in windows],
+            beam_size=1,
+            max_length=len(self.prompt) + self._max_tokens + 1,
+            suppress_blank=False,
+            suppress_tokens=self._suppress,
+            return_no_speech_prob=True,
+        )
+        
+        results: List[Optional[Tuple[str, float]]] = [None] * len(windows)
+        candidates = []  # (window index, phrase, tokens)
+        for i, result in enumerate(constrained):
+            if result.no_speech_prob > self.no_speech_threshold:
+                continue
+            word, tokens = self._longest_phrase(result.sequences_ids[0])
+            if word is not None:
+                candidates.append((i, word, tokens))
+        if not candidates:
+            return results
+        
+        # Pass 2: score the candidates against the unrestricted vocabulary
+        encoded = np.asarray(encoder_output) if encoder_output.device == "cpu" else np.asarray(
+            encoder_output.to_device(ctranslate2.Device.cpu)
+        )
+        forced = self._forced_logits(encoded, candidates)
+        for (i, word, tokens), step_logits in zip(candidates, forced):
+            confidence = self._confidence(step_logits, tokens)
+            logger.debug(f"Keyword candidate '{word}' confidence {confidence:.2f}")
+            if confidence >= self.min_confidence:
+                results[i] = (word, confidence)
+        return results
+    
+    def _forced_logits(
+        self, encoded: np.ndarray, candidates: List[Tuple[int, str, List[int]]]
+    ) -> List[List[np.ndarray]]:
+        """
+        Step logits for each candidate phrase, forced one token at a time.
+        
+        CTranslate2 treats the whole prompt as the start sequence and returns logits
+        only for generated steps, so a phrase can't simply be appended to the prompt.
+        Step k instead runs a one-step decode with the phrase's first k tokens in the
+        prompt: its logits are the distribution over token k (for the last step, over
+        the token after the phrase). Candidates still needing step k share one batch.
+        
+        Args:
+            encoded: Encoder output of every window, on the CPU
+            candidates: (window index, phrase, tokens) per candidate
+        
+        Returns:
+            Per candidate, len(tokens) + 1 step logits
+        """
+        steps: List[List[np.ndarray]] = [[] for _ in candidates]
+        for k in range(max(len(tokens) for _, _, tokens in candidates) + 1):
+            active = [n for n, (_, _, tokens) in enumerate(candidates) if k <= len(tokens)]
+            results = self.model.model.generate(
+                ctranslate2.StorageView.from_array(
+                    np.ascontiguousarray(encoded[[candidates[n][0] for n in active]])
+                ),
+                [list(self.prompt) + candidates[n][2][:k] for n in active],
+                beam_size=1,
+                max_length=len(self.prompt) + k + 1,
+                suppress_blank=False,
+                suppress_tokens=[],
+                return_logits_vocab=True,
+            )
+            for n, result in zip(active, results):
+                steps[n].append(result.logits[0][0])
+        return steps
+    
+    def transcribe(self, windows: List[np.ndarray]) -> List[str]:
+        """Spot phrases and return them as transcripts ("" when nothing matched)."""
+        return [match[0] if match else "" for match in self.spot(windows)]
@@ -11,6 +11,7 @@ except ImportError:
     logger.warning("mcrcon not available, using basic RCON implementation")
     MCRcon = None
 
+from .async_rcon import AsyncRCONPool, RCONError
 from .config import Config
 
 logger = logging.getLogger(__name__)
@@ -36,6 +37,8 @@ class MinecraftRCON:
         self.connected = False
         self.last_command_time: Dict[str, datetime] = {}
         self.cooldown_seconds = Config.COOLDOWN_SECONDS
+        # Asyncio connections for batched fills (opened on first use, on the bot's event loop)
+        self.async_pool: Optional[AsyncRCONPool] = None
     
     def connect(self) -> bool:
         """Connect to the Minecraft server via RCON."""
@@ -146,7 +149,11 @@ class MinecraftRCON:
             List of player names
         """
         # Bypass cooldown for internal operations
-        response = self.execute_command("list", bypass_cooldown=True)
+        return self._parse_player_list(self.execute_command("list", bypass_cooldown=True))
+    
+    @staticmethod
+    def _parse_player_list(response: Optional[str]) -> List[str]:
+        """Player names from a "list" reply."""
         if not response:
             return []
         
@@ -170,13 +177,14 @@ class MinecraftRCON:
         replacement_block: str = "minecraft:air",
         world_min_y: int = -64,
         world_max_y: int = 320,
+        radius: int = CHUNK_RADIUS,
     ) -> bool:
         """
         Replace a specific block type in a chunk centered on the player (~-8 to ~8 in X and Z),
         breaking into multiple fill commands to stay under the 32,768 block limit.
         
-        Chunk is from ~-8 to ~8 in X and Z (all directions around player), full world height.
-        Uses relative X/Z and absolute Y.
+        Chunk is from ~-radius to ~radius in X and Z (all directions around player), full world
+        height. Uses relative X/Z and absolute Y.
         
         Args:
             player: Player name
@@ -184,50 +192,67 @@ class MinecraftRCON:
             replacement_block: Block to replace with (default: "minecraft:air" for deletion)
             world_min_y: World bottom Y (e.g. -64 for 1.18+, 0 for older)
             world_max_y: World top Y (e.g. 320 for 1.18+, 255 for older)
+            radius: Horizontal reach around the player (default: CHUNK_RADIUS)
             
         Returns:
             True if all fill commands succeeded, False otherwise
         """
-        # 17x17 horizontal (from -8 to +8); segment height so 17*17*height <= 32768
-        h_blocks = CHUNK_RADIUS * 2 + 1
-        segment_height = FILL_LIMIT_BLOCKS // (h_blocks * h_blocks)
-        height_span = world_max_y - world_min_y + 1
-        num_segments = (height_span + segment_height - 1) // segment_height
-        
-        for i in range(num_segments):
-            y_start = world_min_y + i * segment_height
-            y_end = min(world_min_y + (i + 1) * segment_height - 1, world_max_y)
-            # execute as <player> at @s run fill ~-8 y_start ~-8 ~8 y_end ~8 <replacement> replace <target>
-            command = (
-                f"execute as {player} at @s run fill "
-                f"~-{CHUNK_RADIUS} {y_start} ~-{CHUNK_RADIUS} ~{CHUNK_RADIUS} {y_end} ~{CHUNK_RADIUS} "
-                f"{replacement_block} replace {target_block}"
-            )
+        commands = self._fill_commands(player, target_block, replacement_block, world_min_y, world_max_y, radius)
+        for i, command in enumerate(commands):
             response = self.execute_command(command, bypass_cooldown=True)
             # Some servers/RCON libs may return an empty string on success.
             # Treat only None (exception/connection failure) as a failed execution.
             if response is None:
                 logger.error(
-                    f"Failed to replace {target_block} in chunk segment {i + 1}/{num_segments} "
-                    f"around {player} (Y {y_start}-{y_end})"
+                    f"Failed to replace {target_block} in chunk segment {i + 1}/{len(commands)} "
+                    f"around {player}"
                 )
                 return False
         
         logger.info(
-            f"Replaced {target_block} with {replacement_block} in chunk (~±{CHUNK_RADIUS}) "
+            f"Replaced {target_block} with {replacement_block} in chunk (~±{radius}) "
             f"(Y {world_min_y} to {world_max_y}) around {player}"
         )
         return True
     
+    @staticmethod
+    def _fill_commands(
+        player: str,
+        target_block: str,
+        replacement_block: str,
+        world_min_y: int,
+        world_max_y: int,
+        radius: int = CHUNK_RADIUS,
+    ) -> List[str]:
+        """Fill commands covering ~±radius around the player, split to stay under the fill limit."""
+        # 17x17 horizontal at the default radius (-8 to +8); segment height so 17*17*height <= 32768
+        h_blocks = radius * 2 + 1
+        segment_height = FILL_LIMIT_BLOCKS // (h_blocks * h_blocks)
+        height_span = world_max_y - world_min_y + 1
+        num_segments = (height_span + segment_height - 1) // segment_height
+        
+        commands = []
+        for i in range(num_segments):
+            y_start = world_min_y + i * segment_height
+            y_end = min(world_min_y + (i + 1) * segment_height - 1, world_max_y)
+            # execute as <player> at @s run fill ~-8 y_start ~-8 ~8 y_end ~8 <replacement> replace <target>
+            commands.append(
+                f"execute as {player} at @s run fill "
+                f"~-{radius} {y_start} ~-{radius} ~{radius} {y_end} ~{radius} "
+                f"{replacement_block} replace {target_block}"
+            )
+        return commands
+    
     def replace_blocks_in_chunk_around_all_players(
         self,
         target_block: str,
         replacement_block: str = "minecraft:air",
         world_min_y: Optional[int] = None,
         world_max_y: Optional[int] = None,
+        radius: int = CHUNK_RADIUS,
     ) -> Dict[str, bool]:
         """
-        Replace a specific block type in a 16x16 chunk around all online players.
+        Replace a specific block type in a chunk (~±radius) around all online players.
         Returns dict of player -> success.
         Uses Config.FILL_WORLD_MIN_Y/MAX_Y if world_min_y/world_max_y not specified.
         """
@@ -238,11 +263,167 @@ class MinecraftRCON:
         players = self.get_online_players()
         return {
             player: self.replace_blocks_in_chunk_around_player(
-                player, target_block, replacement_block, world_min_y, world_max_y
+                player, target_block, replacement_block, world_min_y, world_max_y, radius
             )
             for player in players
         }
     
+    def replace_many_in_chunk_around_all_players(
+        self,
+        target_blocks: List[str],
+        replacement_block: str = "minecraft:air",
+        world_min_y: Optional[int] = None,
+        world_max_y: Optional[int] = None,
+        radius: int = CHUNK_RADIUS,
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Replace several block types around all online players as one batch.
+        The player list is fetched once and every fill is sent back to back.
+        Returns dict of target block -> (player -> success).
+        """
+        if world_min_y is None:
+            world_min_y = Config.FILL_WORLD_MIN_Y
+        if world_max_y is None:
+            world_max_y = Config.FILL_WORLD_MAX_Y
+        players = self.get_online_players()
+        return {
+            target_block: {
+                player: self.replace_blocks_in_chunk_around_player(
+                    player, target_block, replacement_block, world_min_y, world_max_y, radius
+                )
+                for player in players
+            }
+            for target_block in target_blocks
+        }
+    
+    def _get_async_pool(self) -> AsyncRCONPool:
+        """Pool of asyncio RCON connections to this server (created on first use)."""
+        if self.async_pool is None:
+            self.async_pool = AsyncRCONPool(
+                self.host,
+                self.port,
+                self.password,
+                size=getattr(Config, 'RCON_POOL_SIZE', 4),
+                timeout=getattr(Config, 'RCON_TIMEOUT', 10.0),
+                pipeline=getattr(Config, 'RCON_PIPELINE', False),
+            )
+        return self.async_pool
+    
+    async def execute_commands_async(self, commands: List[str]) -> List[Optional[str]]:
+        """
+        Execute commands concurrently across the asyncio connection pool (internal operations, no cooldown).
+        
+        Args:
+            commands: Minecraft commands that don't depend on each other's order
+        
+        Returns:
+            Responses in the same order; None for commands whose connection failed
+        """
+        return await self._get_async_pool().commands(commands)
+    
+    async def execute_in_order_async(self, commands: List[str]) -> List[Optional[str]]:
+        """
+        Execute commands in order on one pooled connection (internal operations, no cooldown).
+        
+        With RCON_PIPELINE the whole sequence costs about one round trip.
+        
+        Args:
+            commands: Minecraft commands that must run in the given order
+        
+        Returns:
+            Responses in the same order; None for every command if the connection failed
+        """
+        async with self._get_async_pool().connection() as connection:
+            try:
+                return list(await connection.commands(commands))
+            except RCONError as e:
+                await connection.close()  # Reopened on its next checkout
+                logger.error(f"Error executing {len(commands)} RCON commands in order: {e}")
+                return [None] * len(commands)
+    
+    async def replace_many_in_chunk_around_all_players_async(
+        self,
+        target_blocks: List[str],
+        replacement_block: str = "minecraft:air",
+        world_min_y: Optional[int] = None,
+        world_max_y: Optional[int] = None,
+        radius: int = CHUNK_RADIUS,
+    ) -> Optional[Dict[str, Dict[str, bool]]]:
+        """
+        Async replace_many_in_chunk_around_all_players: every fill for every block and
+        player is spread over the connection pool, whose connections run their slices
+        concurrently (pipelined too with RCON_PIPELINE, so the batch costs about two
+        round trips however many players are online).
+        Returns dict of target block -> (player -> success), or None if the pool couldn't
+        deliver the player list or a fill (the caller can fall back to the sync client).
+        """
+        if world_min_y is None:
+            world_min_y = Config.FILL_WORLD_MIN_Y
+        if world_max_y is None:
+            world_max_y = Config.FILL_WORLD_MAX_Y
+        listing = (await self.execute_commands_async(["list"]))[0]
+        if listing is None:
+            return None
+        players = self._parse_player_list(listing)
+        
+        commands = []
+        for target_block in target_blocks:
+            for player in players:
+                commands.extend(
+                    self._fill_commands(player, target_block, replacement_block, world_min_y, world_max_y, radius)
+                )
+        responses = await self.execute_commands_async(commands)
+        if any(response is None for response in responses):
+            return None
+        
+        for target_block in target_blocks:
+            if players:
+                logger.info(
+                    f"Replaced {target_block} with {replacement_block} in chunk (~±{radius}) "
+                    f"(Y {world_min_y} to {world_max_y}) around {', '.join(players)}"
+                )
+        return {target_block: {player: True for player in players} for target_block in target_blocks}
+    
+    async def replace_blocks_in_chunk_around_all_players_async(
+        self,
+        target_block: str,
+        replacement_block: str = "minecraft:air",
+        world_min_y: Optional[int] = None,
+        world_max_y: Optional[int] = None,
+        radius: int = CHUNK_RADIUS,
+    ) -> Optional[Dict[str, bool]]:
+        """
+        Async replace_blocks_in_chunk_around_all_players, with fills spread over the pool.
+        Returns dict of player -> success, or None if the pool failed.
+        """
+        results = await self.replace_many_in_chunk_around_all_players_async(
+            [target_block], replacement_block, world_min_y, world_max_y, radius
+        )
+        return None if results is None else results[target_block]
+    
+    async def reload_datapack_async(self, pack: str) -> bool:
+        """
+        Reload the server's datapacks and make sure a pack in the world's datapacks folder is enabled.
+        
+        The three commands depend on each other's order, so they share one connection.
+        
+        Args:
+            pack: Folder name of the pack (the server lists it as "file/<pack>")
+        
+        Returns:
+            True if the server lists the pack as enabled afterwards
+        """
+        # "datapack enable" on an already enabled pack only answers with an error message
+        responses = await self.execute_in_order_async(
+            ["reload", f'datapack enable "file/{pack}"', "datapack list enabled"]
+        )
+        return responses[-1] is not None and f"file/{pack}" in responses[-1]
+    
+    async def close_async(self) -> None:
+        """Close the asyncio connections, if open."""
+        if self.async_pool is not None:
+            await self.async_pool.close()
+    
     def test_connection(self) -> bool:
         """Test the RCON connection."""
         response = self.execute_command("list")
@@ -250,11 +431,20 @@ class MinecraftRCON:
     
     def say(self, message: str, bypass_cooldown: bool = True) -> bool:
         """Broadcast a message to all players on the server (shows as [Server] message)."""
+        response = self.execute_command(self.say_command(message), bypass_cooldown=bypass_cooldown)
+        return response is not None
+    
+    async def say_async(self, message: str) -> bool:
+        """Broadcast a message through the asyncio connection pool."""
+        responses = await self.execute_in_order_async([self.say_command(message)])
+        return responses[0] is not None
+    
+    @staticmethod
+    def say_command(message: str) -> str:
+        """The say command broadcasting message."""
         # Escape quotes in message
         escaped = message.replace('\\', '\\\\').replace('"', '\\"')
-        command = f'say "{escaped}"'
-        response = self.execute_command(command, bypass_cooldown=bypass_cooldown)
-        return response is not None
+        return f'say "{escaped}"'
 
 
 # Global RCON instance
@@ -0,0 +1,193 @@
+"""Phonetic keys and a bounded edit-distance index for matching misheard block words."""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+_VOWELS = frozenset('aeiou')
+_FRONT_VOWELS = frozenset('eiy')
+
+# Silent or simplified leading letter pairs ("knight", "gnome", "wrap", ...)
+_INITIAL = (('kn', 'n'), ('gn', 'n'), ('pn', 'n'), ('ps', 's'), ('wr', 'r'), ('wh', 'w'))
+
+
+@lru_cache(maxsize=8192)
+def phonetic_key(word: str) -> str:
+    """
+    Metaphone-style key: words that sound alike get the same key.
+    
+    Vowels after the first letter are dropped and consonants are folded into
+    sound classes ("ph" -> F, soft "c" -> S, "th" -> 0, ...), so spelling
+    variants an ASR model produces for the same sounds ("kobblestone",
+    "cobble stone") collapse together.
+    
+    Args:
+        word: Word or phrase (non-letters are ignored)
+    
+    Returns:
+        Uppercase key ("" if the word has no letters)
+    """
+    w = ''.join(c for c in word.lower() if 'a' <= c <= 'z')
+    if not w:
+        return ''
+    for prefix, replacement in _INITIAL:
+        if w.startswith(prefix):
+            w = replacement + w[2:]
+            break
+    if w[0] == 'x':
+        w = 's' + w[1:]
+    
+    key = []
+    n = len(w)
+    for i, c in enumerate(w):
+        prev = w[i - 1] if i > 0 else ''
+        nxt = w[i + 1] if i + 1 < n else ''
+        nxt2 = w[i + 2] if i + 2 < n else ''
+        if c == prev and c != 'c':
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                key.append('A')
+        elif c == 'b':
+            if not (prev == 'm' and i == n - 1):  # "lamb"
+                key.append('B')
+        elif c == 'c':
+            if nxt == 'h' or (nxt == 'i' and nxt2 == 'a'):
+                key.append('K' if prev == 's' else 'X')
+            elif nxt in _FRONT_VOWELS:
+                key.append('S')
+            elif nxt != 'k':  # "ck" sounds once, as the k
+                key.append('K')
+        elif c == 'd':
+            key.append('J' if nxt == 'g' and nxt2 in _FRONT_VOWELS else 'T')
+        elif c == 'g':
+            if nxt == 'h' and nxt2 and nxt2 not in _VOWELS:
+                continue  # "light"
+            if nxt == 'n' and i + 2 >= n:
+                continue  # "sign"
+            if prev == 'd' and nxt in _FRONT_VOWELS:
+                continue  # "edge": the d already said J
+            key.append('J' if nxt in _FRONT_VOWELS else 'K')
+        elif c == 'h':
+            if prev and prev in 'cspgt':
+                continue  # Part of ch/sh/ph/gh/th
+            if prev in _VOWELS and nxt not in _VOWELS:
+                continue
+            key.append('H')
+        elif c == 'p':
+            key.append('F' if nxt == 'h' else 'P')
+        elif c == 'q':
+            key.append('K')
+        elif c == 's':
+            if nxt == 'h' or (nxt == 'i' and nxt2 in ('o', 'a')):
+                key.append('X')
+            else:
+                key.append('S')
+        elif c == 't':
+            if nxt == 'i' and nxt2 in ('o', 'a'):
+                key.append('X')
+            elif nxt == 'h':
+                key.append('0')
+            elif not (nxt == 'c' and nxt2 == 'h'):  # "tch" sounds as the ch
+                key.append('T')
+        elif c == 'v':
+            key.append('F')
+        elif c in 'wy':
+            if nxt in _VOWELS:
+                key.append(c.upper())
+        elif c == 'x':
+            key.append('KS')
+        elif c == 'z':
+            key.append('S')
+        else:
+            key.append(c.upper())
+    
+    # Collapse repeats produced by folding ("ck", "ss", "dt", ...)
+    out = []
+    for part in ''.join(key):
+        if not out or out[-1] != part:
+            out.append(part)
+    return ''.join(out)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insert, delete, substitute, swap neighbours).
+    
+    Stops early once the distance must exceed limit.
+    
+    Returns:
+        The distance, or limit + 1 if it is larger than limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class FuzzyIndex:
+    """
+    Finds the vocabulary entry a misheard word or phrase was meant to be.
+    
+    A query matches an entry only if both sound alike (same phonetic key) AND
+    are spelled within max_edits edits of each other. Either test alone lets
+    everyday words through: vowel-stripped keys collide freely ("cross" and
+    "grass"), and one edit turns plenty of short words into others ("class",
+    "glass"). Short entries are left out entirely for the same reason.
+    
+    Entries are bucketed by phonetic key, so a lookup is one dict probe plus a
+    bounded edit distance per entry in the bucket.
+    """
+    
+    def __init__(self, entries: Iterable[str], max_edits: int = 1, min_length: int = 7):
+        """
+        Build the index.
+        
+        Args:
+            entries: Vocabulary entries (letters only, spaces removed)
+            max_edits: Spelling edits tolerated on top of a phonetic match
+            min_length: Entries and queries shorter than this never match fuzzily
+                (short words collide too easily: "waiter" is one edit from "water")
+        """
+        self.max_edits = max_edits
+        self.min_length = min_length
+        self._phonetic: Dict[str, List[str]] = {}
+        self._max_length = 0
+        for entry in entries:
+            if len(entry) < min_length:
+                continue
+            self._max_length = max(self._max_length, len(entry))
+            key = phonetic_key(entry)
+            if key:
+                self._phonetic.setdefault(key, []).append(entry)
+    
+    def lookup(self, query: str) -> Optional[str]:
+        """
+        Closest entry to query that sounds the same and is within max_edits spelling edits.
+        
+        Ties go to the smaller edit distance, then the longer entry.
+        
+        Returns:
+            The entry, or None if nothing is close enough
+        """
+        if len(query) < self.min_length or len(query) > self._max_length + self.max_edits:
+            return None
+        best = None
+        best_score = None
+        for entry in self._phonetic.get(phonetic_key(query), ()):
+            distance = edit_distance(query, entry, self.max_edits)
+            if distance > self.max_edits:
+                continue
+            score = (distance, -len(entry))
+            if best_score is None or score < best_score:
+                best, best_score = entry, score
+        return best
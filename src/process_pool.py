@@ -0,0 +1,330 @@
+"""Multi-process Whisper inference: one model per worker process, audio handed over in shared memory."""
+import asyncio
+import logging
+import multiprocessing
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from .audio import WHISPER_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+MAX_WINDOW_SAMPLES = WHISPER_SAMPLE_RATE * 30  # Whisper's encoder sees at most 30s
+POLL_INTERVAL = 0.5  # Seconds between liveness checks while waiting on a worker
+HEALTH_CHECK_INTERVAL = 10.0  # Seconds between pings of idle workers
+PING_TIMEOUT = 5.0
+
+
+class WorkerError(RuntimeError):
+    """A worker process crashed, hung, or failed to load its model."""
+
+
+def _worker_main(conn, shm_name: str, model_sizes: List[str], device: str, compute_type: str, cpu_threads: int):
+    """Worker process: load the models, then transcribe requests until told to stop."""
+    # Imported here so the parent never pulls in transcription from this module
+    from faster_whisper import WhisperModel
+    from .transcription import (
+        make_keyword_spotter, spotted_words, transcribe_window, transcribe_window_words, transcribe_windows, warm_up,
+    )
+    
+    shm = SharedMemory(name=shm_name)
+    samples = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+    models = {}
+    try:
+        for model_size in model_sizes:
+            models[model_size] = WhisperModel(
+                model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads
+            )
+    except Exception as e:
+        conn.send(('error', repr(e)))
+        return
+    for model in models.values():
+        try:
+            warm_up(model)
+        except Exception as e:
+            logger.warning(f"Whisper worker warm-up failed: {e}")
+    conn.send(('ready', None))
+    spotters, spotter_words = {}, None
+    
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break  # Parent went away
+            if message[0] == 'stop':
+                break
+            if message[0] == 'ping':
+                conn.send(('pong', None))
+                continue
+            
+            _, lengths, beam_size, hotwords, keywords, model_size, word_timestamps = message
+            try:
+                model = models.get(model_size) or models[model_sizes[0]]
+                offsets = np.cumsum([0] + lengths)
+                windows = [samples[offsets[i]:offsets[i + 1]] for i in range(len(lengths))]
+                if keywords:
+                    if keywords != spotter_words:
+                        spotters, spotter_words = {}, keywords
+                    if model_size not in spotters:
+                        spotters[model_size] = make_keyword_spotter(model, keywords)
+                    texts = spotters[model_size].transcribe(windows)
+                    if word_timestamps:
+                        texts = spotted_words(texts, windows)
+                elif word_timestamps:
+                    texts = [transcribe_window_words(model, window, beam_size, hotwords) for window in windows]
+                elif len(windows) == 1:
+                    texts = [transcribe_window(model, windows[0], beam_size, hotwords)]
+                else:
+                    texts = transcribe_windows(model, windows, beam_size, hotwords)
+                conn.send(('ok', texts))
+            except Exception as e:
+                conn.send(('error', repr(e)))
+    finally:
+        del samples
+        shm.close()
+
+
+class _Worker:
+    """Parent-side handle: process, pipe and the shared audio buffer it reads from."""
+    
+    def __init__(self, index: int, capacity: int):
+        self.index = index
+        self.shm = SharedMemory(create=True, size=capacity * 4)
+        self.samples = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf)
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.restarts = 0
+
+
+class WhisperProcessPool:
+    """
+    Pool of worker processes, each with its own WhisperModel.
+    
+    Decoding runs outside the bot's process, so it doesn't contend for the GIL
+    and scales with the number of workers. Audio is copied once into a
+    per-worker shared-memory buffer; only lengths and options go over the pipe.
+    Crashed or hung workers are restarted.
+    """
+    
+    def __init__(
+        self,
+        model_size: str,
+        device: str = "cpu",
+        compute_type: str = "int8",
+        workers: int = 2,
+        cpu_threads: int = 0,
+        max_batch: int = 1,
+        timeout: float = 30.0,
+        extra_models: Sequence[str] = (),
+        worker_target: Callable = _worker_main,
+    ):
+        """
+        Initialize the pool (processes are started by start()).
+        
+        Args:
+            model_size: Whisper model size loaded by every worker
+            device: Device to use ('cpu' or 'cuda')
+            compute_type: CTranslate2 compute type
+            workers: Number of worker processes
+            cpu_threads: CTranslate2 threads per worker (0 = library default)
+            max_batch: Most windows per request (sizes the shared buffers)
+            timeout: Seconds a request may take before its worker is considered hung
+            extra_models: Further model sizes every worker keeps resident (quality tiers)
+            worker_target: Function run in each worker process (module level, so spawn can import it)
+        """
+        self.model_size = model_size
+        self.model_sizes = list(dict.fromkeys([model_size, *extra_models]))
+        self.device = device
+        self.compute_type = compute_type
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.max_batch = max(1, max_batch)
+        self.timeout = timeout
+        self.worker_target = worker_target
+        self._context = multiprocessing.get_context('spawn')
+        self._handles: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+    
+    @property
+    def ready(self) -> bool:
+        """Whether all workers have been started."""
+        return self._idle is not None
+    
+    @property
+    def restarts(self) -> int:
+        """Total worker restarts since the pool started."""
+        return sum(handle.restarts for handle in self._handles)
+    
+    def _spawn(self, handle: _Worker) -> None:
+        """Start a worker process and wait for its model to load and warm up (blocking)."""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=self.worker_target,
+            args=(child_conn, handle.shm.name, self.model_sizes, self.device, self.compute_type, self.cpu_threads),
+            name=f"whisper-worker-{handle.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        handle.process = process
+        handle.conn = parent_conn
+        
+        # Model load (or first download) can take a while
+        status, detail = self._receive(handle, timeout=None)
+        if status != 'ready':
+            raise WorkerError(f"Worker {handle.index} failed to load model: {detail}")
+        logger.info(f"Whisper worker {handle.index} ready (pid {process.pid})")
+    
+    def _restart(self, handle: _Worker) -> None:
+        """Kill and respawn a worker (blocking)."""
+        handle.restarts += 1
+        logger.warning(f"Restarting Whisper worker {handle.index} (restart #{handle.restarts})")
+        self._kill(handle)
+        self._spawn(handle)
+    
+    @staticmethod
+    def _kill(handle: _Worker) -> None:
+        """Terminate a worker process and close its pipe."""
+        if handle.process is not None and handle.process.is_alive():
+            handle.process.terminate()
+            handle.process.join(timeout=5)
+            if handle.process.is_alive():
+                handle.process.kill()
+                handle.process.join()
+        if handle.conn is not None:
+            handle.conn.close()
+        handle.process = None
+        handle.conn = None
+    
+    @staticmethod
+    def _receive(handle: _Worker, timeout: Optional[float]):
+        """Wait for a worker's reply, checking that it is still alive (blocking)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if handle.conn.poll(POLL_INTERVAL):
+                    return handle.conn.recv()
+            except (EOFError, OSError):
+                raise WorkerError(f"Worker {handle.index} pipe closed")
+            if not handle.process.is_alive():
+                raise WorkerError(f"Worker {handle.index} exited with code {handle.process.exitcode}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise WorkerError(f"Worker {handle.index} did not answer within {timeout:.0f}s")
+    
+    async def start(self) -> None:
+        """Start all workers and wait for their models to load."""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            capacity = MAX_WINDOW_SAMPLES * self.max_batch
+            self._handles = [_Worker(i, capacity) for i in range(self.workers)]
+            logger.info(f"Starting {self.workers} Whisper worker processes ({', '.join(self.model_sizes)} on {self.device})")
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self._spawn, handle) for handle in self._handles),
+                return_exceptions=True,
+            )
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                await self.stop()
+                raise errors[0]
+            self._idle = asyncio.Queue()
+            for handle in self._handles:
+                self._idle.put_nowait(handle)
+            self._health_task = asyncio.create_task(self._health_loop())
+    
+    async def transcribe(
+        self,
+        windows: List[np.ndarray],
+        beam_size: Optional[int],
+        hotwords: str,
+        keywords: Optional[List[str]] = None,
+        model_size: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> list:
+        """
+        Transcribe windows on the next idle worker.
+        
+        Args:
+            windows: 16kHz mono float32 windows (each clipped to 30s)
+            beam_size: Beam size (None = configured default)
+            hotwords: Space-separated terms to bias decoding toward
+            keywords: Phrases to spot instead of transcribing (keyword-spotting mode)
+            model_size: Resident model to decode with (None = the pool's main model)
+            word_timestamps: Return (start, end, word) lists instead of text (overlapping windows)
+        
+        Returns:
+            One transcript (or word list) per window
+        """
+        await self.start()
+        handle = await self._idle.get()
+        try:
+            if handle.process is None or not handle.process.is_alive():
+                # Died while idle (or an earlier restart failed)
+                await asyncio.to_thread(self._restart, handle)
+            # Copy the windows back to back into the worker's shared buffer
+            lengths = []
+            offset = 0
+            for window in windows[:self.max_batch]:
+                n = min(len(window), MAX_WINDOW_SAMPLES)
+                handle.samples[offset:offset + n] = window[:n]
+                lengths.append(n)
+                offset += n
+            handle.conn.send(('transcribe', lengths, beam_size, hotwords, keywords, model_size or self.model_size, word_timestamps))
+            try:
+                status, result = await asyncio.to_thread(self._receive, handle, self.timeout)
+            except WorkerError as e:
+                logger.error(f"{e}; restarting it")
+                await asyncio.to_thread(self._restart, handle)
+                raise
+            if status != 'ok':
+                raise WorkerError(f"Worker {handle.index} failed: {result}")
+            return result
+        finally:
+            self._idle.put_nowait(handle)
+    
+    async def _health_loop(self) -> None:
+        """Ping idle workers periodically and restart any that died."""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            for _ in range(self._idle.qsize()):
+                handle = self._idle.get_nowait()
+                try:
+                    if handle.conn is None:
+                        # An earlier restart failed: nothing to ping, try to bring it back
+                        raise WorkerError(f"Worker {handle.index} is not running")
+                    handle.conn.send(('ping',))
+                    await asyncio.to_thread(self._receive, handle, PING_TIMEOUT)
+                except Exception as e:
+                    # Anything short of cancellation must not end the loop
+                    logger.error(f"Health check failed: {e}")
+                    try:
+                        await asyncio.to_thread(self._restart, handle)
+                    except Exception as restart_error:
+                        logger.error(f"Could not restart worker {handle.index}: {restart_error}")
+                finally:
+                    self._idle.put_nowait(handle)
+    
+    async def stop(self) -> None:
+        """Stop all workers and release shared memory."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for handle in self._handles:
+            try:
+                if handle.conn is not None:
+                    handle.conn.send(('stop',))
+                    await asyncio.to_thread(handle.process.join, 2)
+            except OSError:
+                pass
+            await asyncio.to_thread(self._kill, handle)
+            del handle.samples
+            handle.shm.close()
+            handle.shm.unlink()
+        self._handles = []
+        self._idle = None
@@ -0,0 +1,134 @@
+"""Adaptive quality: step between model/beam tiers as the measured real-time factor changes."""
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+RTF_SMOOTHING = 0.3  # EWMA weight of the newest real-time-factor sample
+
+
+class QualityTier(NamedTuple):
+    """One operating point: which resident model decodes, and with how wide a beam."""
+    model_size: str
+    beam_size: int
+
+
+def parse_tiers(spec: str) -> List[QualityTier]:
+    """
+    Parse a tier list such as "small:5,base:2,tiny:1" (best first).
+    
+    Returns:
+        Tiers in order; empty when spec is blank
+    """
+    tiers = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        model_size, _, beam = item.partition(':')
+        tiers.append(QualityTier(model_size.strip(), int(beam) if beam.strip() else 1))
+    return tiers
+
+
+class QualityController:
+    """
+    Picks the decoding tier from live measurements.
+    
+    Every decode reports its real-time factor (decode time / audio time) and the
+    scheduler's queue lag. When the smoothed RTF or the lag says the box is
+    falling behind, the controller steps down to a cheaper tier; once both have
+    been comfortably low for a while it steps back up. Each tier keeps its own
+    RTF estimate, and a cooldown after every switch stops it flapping.
+    """
+    
+    def __init__(
+        self,
+        tiers: List[QualityTier],
+        down_rtf: float = 0.8,
+        up_rtf: float = 0.3,
+        max_lag_ms: float = 1500.0,
+        recover_lag_ms: float = 300.0,
+        cooldown_seconds: float = 20.0,
+        min_samples: int = 3,
+    ):
+        """
+        Initialize the controller at the best tier.
+        
+        Args:
+            tiers: Tiers ordered best (slowest) first
+            down_rtf: Smoothed RTF above which the next cheaper tier is used
+            up_rtf: Smoothed RTF below which the next better tier is tried
+            max_lag_ms: Queue lag that forces a step down regardless of RTF
+            recover_lag_ms: Queue lag must be below this to step up
+            cooldown_seconds: Minimum time between switches
+            min_samples: Decodes measured on a tier before it can be left
+        """
+        if not tiers:
+            raise ValueError("At least one quality tier is required")
+        self.tiers = tiers
+        self.down_rtf = down_rtf
+        self.up_rtf = up_rtf
+        self.max_lag_ms = max_lag_ms
+        self.recover_lag_ms = recover_lag_ms
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+        
+        self.index = 0
+        self.rtf: Dict[int, float] = {}  # Tier index -> smoothed RTF
+        self._samples = 0  # Decodes measured since the last switch
+        self._switched_at = time.monotonic()
+        self.switches = 0
+    
+    @property
+    def tier(self) -> QualityTier:
+        """Tier new decodes should use."""
+        return self.tiers[self.index]
+    
+    def record(self, audio_seconds: float, decode_seconds: float, lag_ms: float, tier: QualityTier) -> Optional[QualityTier]:
+        """
+        Feed one decode's timing and maybe switch tiers.
+        
+        Args:
+            audio_seconds: Audio covered by the decode (sum over a batch)
+            decode_seconds: Wall time the decode took
+            lag_ms: Current smoothed queue lag
+            tier: Tier the decode ran on (may be stale if a switch happened meanwhile)
+        
+        Returns:
+            The new tier if this sample caused a switch, else None
+        """
+        if audio_seconds <= 0:
+            return None
+        index = self.tiers.index(tier) if tier in self.tiers else self.index
+        rtf = decode_seconds / audio_seconds
+        previous = self.rtf.get(index)
+        self.rtf[index] = rtf if previous is None else previous + RTF_SMOOTHING * (rtf - previous)
+        if index != self.index:
+            return None  # Finished on an older tier; don't judge the current one by it
+        
+        self._samples += 1
+        if self._samples < self.min_samples or time.monotonic() - self._switched_at < self.cooldown_seconds:
+            return None
+        
+        current = self.rtf[self.index]
+        if (current > self.down_rtf or lag_ms > self.max_lag_ms) and self.index < len(self.tiers) - 1:
+            return self._switch(self.index + 1, f"RTF {current:.2f}, lag {lag_ms:.0f}ms")
+        if current < self.up_rtf and lag_ms < self.recover_lag_ms and self.index > 0:
+            return self._switch(self.index - 1, f"RTF {current:.2f}, lag {lag_ms:.0f}ms")
+        return None
+    
+    def _switch(self, index: int, reason: str) -> QualityTier:
+        """Move to another tier and restart the cooldown."""
+        old = self.tier
+        direction = 'down' if index > self.index else 'up'
+        self.index = index
+        self._samples = 0
+        self._switched_at = time.monotonic()
+        self.switches += 1
+        new = self.tier
+        logger.info(
+            f"Quality {direction}: "
+            f"{old.model_size}/beam{old.beam_size} -> {new.model_size}/beam{new.beam_size} ({reason})"
+        )
+        return new
@@ -0,0 +1,96 @@
+"""Stitch word-timestamped transcripts of overlapping windows into one stream of words."""
+import math
+import string
+from collections import deque
+from typing import Deque, List, Tuple
+
+# (start, end, text): seconds relative to the window start, as faster-whisper reports them
+Word = Tuple[float, float, str]
+
+_STRIP = string.punctuation + string.whitespace
+
+
+def _normalize(text: str) -> str:
+    """Lowercase word without surrounding punctuation, for duplicate checks."""
+    return text.strip(_STRIP).lower()
+
+
+class TranscriptStitcher:
+    """
+    Merges per-window word lists from one speaker's overlapping windows.
+    
+    Consecutive windows share overlap_seconds of audio. Each window owns the
+    words whose midpoint falls between the middles of its two overlaps, so a
+    word cut by one window's edge is taken from the neighbour that heard it
+    whole. Ownership ranges are widened by jitter_seconds (timestamps of the
+    same word differ slightly between windows); a word that lands in both is
+    recognised by its text and time and emitted once. Windows may arrive out of
+    order.
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float,
+        overlap_seconds: float,
+        jitter_seconds: float = 0.25,
+        history_seconds: float = 30.0,
+    ):
+        """
+        Initialize the stitcher.
+        
+        Args:
+            window_seconds: Length of each window
+            overlap_seconds: Audio shared by consecutive windows
+            jitter_seconds: Timestamp disagreement tolerated between windows
+            history_seconds: How long emitted words are remembered for dedup
+        """
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.jitter_seconds = jitter_seconds
+        self.history_seconds = history_seconds
+        self._emitted: Deque[Tuple[float, float, str]] = deque()  # (start, end, normalized), absolute
+        self.duplicates = 0  # Words dropped as already emitted
+    
+    def stitch(self, window_start: float, words: List[Word], final: bool = False) -> str:
+        """
+        Take one window's words and return the ones not emitted before.
+        
+        Args:
+            window_start: Stream time of the window's first sample, in seconds
+            words: The window's words with window-relative timestamps
+            final: Last window of the stream (owns everything up to its end)
+        
+        Returns:
+            New words joined into text ("" if none)
+        """
+        half = self.overlap_seconds / 2
+        low = window_start + half - self.jitter_seconds if window_start > 0 else -math.inf
+        high = math.inf if final else window_start + self.window_seconds - half + self.jitter_seconds
+        
+        kept = []
+        for start, end, text in words:
+            start += window_start
+            end += window_start
+            normalized = _normalize(text)
+            if not normalized or not low <= (start + end) / 2 < high:
+                continue
+            if self._seen(start, end, normalized):
+                self.duplicates += 1
+                continue
+            self._emitted.append((start, end, normalized))
+            kept.append(text.strip())
+        
+        if self._emitted:
+            newest = max(end for _, end, _ in self._emitted)
+            while self._emitted and self._emitted[0][1] < newest - self.history_seconds:
+                self._emitted.popleft()
+        return " ".join(kept)
+    
+    def _seen(self, start: float, end: float, normalized: str) -> bool:
+        """Whether the same word was already emitted at (about) the same time."""
+        for seen_start, seen_end, seen_text in self._emitted:
+            if (seen_text == normalized
+                    and start < seen_end + self.jitter_seconds
+                    and seen_start < end + self.jitter_seconds):
+                return True
+        return False
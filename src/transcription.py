@@ -2,29 +2,273 @@
 import asyncio
 import io
 import logging
+import time
 import wave
+from collections import deque
 from pathlib import Path
-from typing import Optional, Callable, Dict
+from typing import Optional, Callable, Deque, Dict, List, Set, Tuple, Union
 from datetime import datetime
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
 
 from .config import Config
+from .audio import (
+    DiscordPcmConverter,
+    GATE_FRAME_MS,
+    SpeakerRingBuffer,
+    SpeechGate,
+    UtteranceSegmenter,
+    WHISPER_SAMPLE_RATE,
+)
+from .inference import InferenceScheduler
+from .keyword_spotting import KeywordSpotter
+from .process_pool import WhisperProcessPool
+from .quality import QualityController, QualityTier, parse_tiers
+from .stitching import TranscriptStitcher, Word
 
 logger = logging.getLogger(__name__)
 
-# Discord voice sends PCM at 48kHz STEREO (2 channels); Whisper expects 16kHz mono
-DISCORD_PCM_RATE = 48000
-DISCORD_CHANNELS = 2  # Discord sends stereo
-WHISPER_SAMPLE_RATE = 16000
-# Resample ratio: 48k -> 16k = 1/3 (take every 3rd sample)
-RESAMPLE_RATIO = DISCORD_PCM_RATE // WHISPER_SAMPLE_RATE  # 3
+WHISPER_WORKERS = 2  # Inference threads (CTranslate2 already parallelizes within a decode)
+
+
+def _transcribe_segments(
+    model: WhisperModel,
+    audio_numpy: np.ndarray,
+    beam_size: Optional[int],
+    hotwords: str,
+    word_timestamps: bool = False,
+) -> list:
+    """Run model.transcribe on one window with the configured VAD and thresholds."""
+    # Validate audio array
+    if len(audio_numpy) == 0:
+        logger.warning("Empty audio array provided for transcription")
+        return []
+    
+    # Check if audio is all zeros (silence)
+    if np.all(audio_numpy == 0):
+        logger.debug("Audio array contains only silence")
+        return []
+    
+    # Use Faster-Whisper's transcribe method (audio must be 16kHz mono float32)
+    # beam_size=5 improves accuracy; hotwords bias toward Minecraft block names
+    vad_threshold = getattr(Config, 'WHISPER_VAD_THRESHOLD', 0.2)
+    log_prob_threshold = getattr(Config, 'WHISPER_LOG_PROB_THRESHOLD', -1.5)
+    no_speech_threshold = getattr(Config, 'WHISPER_NO_SPEECH_THRESHOLD', 0.7)
+    if beam_size is None:
+        beam_size = getattr(Config, 'WHISPER_BEAM_SIZE', 5)
+    segments, info = model.transcribe(
+        audio_numpy,
+        language="en",
+        beam_size=beam_size,  # 5 = more accurate, 1 = faster
+        vad_filter=True,
+        vad_parameters=dict(
+            min_silence_duration_ms=200,
+            threshold=vad_threshold,
+            min_speech_duration_ms=100,
+            speech_pad_ms=300,
+        ),
+        log_prob_threshold=log_prob_threshold,
+        no_speech_threshold=no_speech_threshold,
+        hotwords=hotwords or None,  # Biases model toward block names
+        word_timestamps=word_timestamps,
+    )
+    return list(segments)
+
+
+def transcribe_window(
+    model: WhisperModel,
+    audio_numpy: np.ndarray,
+    beam_size: Optional[int] = None,
+    hotwords: str = "",
+) -> str:
+    """
+    Transcribe one 16kHz mono float32 window and return the joined text.
+    
+    Module-level so inference worker processes can run it against their own model.
+    """
+    segments = _transcribe_segments(model, audio_numpy, beam_size, hotwords)
+    # Combine segments into full text
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def transcribe_window_words(
+    model: WhisperModel,
+    audio_numpy: np.ndarray,
+    beam_size: Optional[int] = None,
+    hotwords: str = "",
+) -> List[Word]:
+    """Transcribe one window and return its words with window-relative timestamps (for stitching)."""
+    segments = _transcribe_segments(model, audio_numpy, beam_size, hotwords, word_timestamps=True)
+    return [
+        (word.start, word.end, word.word)
+        for segment in segments
+        for word in (segment.words or [])
+    ]
+
+
+def spotted_words(texts: List[str], windows: List[np.ndarray]) -> List[List[Word]]:
+    """Keyword-spotter results as words spanning their whole window (the spotter has no timestamps)."""
+    return [
+        [(0.0, len(window) / WHISPER_SAMPLE_RATE, text)] if text else []
+        for text, window in zip(texts, windows)
+    ]
+
+
+def transcribe_windows(
+    model: WhisperModel,
+    windows: List[np.ndarray],
+    beam_size: Optional[int] = None,
+    hotwords: str = "",
+) -> List[str]:
+    """Transcribe up to 30s windows with one batched encode + generate."""
+    if beam_size is None:
+        beam_size = getattr(Config, 'WHISPER_BEAM_SIZE', 5)
+    log_prob_threshold = getattr(Config, 'WHISPER_LOG_PROB_THRESHOLD', -1.5)
+    no_speech_threshold = getattr(Config, 'WHISPER_NO_SPEECH_THRESHOLD', 0.7)
+    
+    # Log-Mel features padded to the encoder's fixed 30s input, stacked into one batch
+    features = np.stack([
+        pad_or_trim(model.feature_extractor(window)[..., :-1]) for window in windows
+    ])
+    tokenizer = Tokenizer(
+        model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en"
+    )
+    prompt = model.get_prompt(
+        tokenizer, [], without_timestamps=True, hotwords=hotwords or None
+    )
+    
+    encoder_output = model.encode(features)
+    results = model.model.generate(
+        encoder_output,
+        [list(prompt) for _ in windows],
+        beam_size=beam_size,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        return_scores=True,
+        return_no_speech_prob=True,
+    )
+    
+    texts = []
+    for result in results:
+        tokens = result.sequences_ids[0]
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        # Same silence rule transcribe() applies per segment
+        if result.no_speech_prob > no_speech_threshold and avg_logprob < log_prob_threshold:
+            texts.append("")
+            continue
+        texts.append(tokenizer.decode(tokens).strip())
+    return texts
+
+
+def warm_up(model: WhisperModel) -> None:
+    """Decode one second of synthetic audio so the first real window doesn't pay cold-start costs."""
+    t = np.arange(WHISPER_SAMPLE_RATE, dtype=np.float32) / WHISPER_SAMPLE_RATE
+    tone = (0.05 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+    started = time.monotonic()
+    # Batched path: runs the encoder and decoder unconditionally (transcribe() would VAD the tone away)
+    transcribe_windows(model, [tone])
+    logger.info(f"Whisper warm-up decode took {time.monotonic() - started:.2f}s")
+
+
+def make_keyword_spotter(model: WhisperModel, words: List[str]) -> KeywordSpotter:
+    """Build a keyword spotter for the given phrases with the configured thresholds."""
+    return KeywordSpotter(
+        model,
+        words,
+        min_confidence=getattr(Config, 'KWS_MIN_CONFIDENCE', 0.3),
+        no_speech_threshold=getattr(Config, 'WHISPER_NO_SPEECH_THRESHOLD', 0.7),
+    )
+
+
+class _SpeakerStream:
+    """Per-speaker audio state: PCM converter (with filter history), 16kHz ring buffer, speech gate and endpointer."""
+    
+    __slots__ = (
+        'session', 'converter', 'buffer', 'gate', 'speech_frames', 'segmenter',
+        'consumed', 'speech_history', 'stitcher', 'carry',
+        'utterance_id', 'samples_since_partial', 'partial_inflight', 'partial_word', 'partial_hits', 'fired',
+        'endpoint_timer',
+    )
+    
+    def __init__(
+        self,
+        session: 'TranscriptionSession',
+        buffer_samples: int,
+        gain: float,
+        stitcher: Optional[TranscriptStitcher] = None,
+    ):
+        self.session = session  # Owning guild session (results are discarded once it stops)
+        self.converter = DiscordPcmConverter(gain=gain)
+        self.buffer = SpeakerRingBuffer(buffer_samples, dtype=np.float32)
+        self.gate = SpeechGate(
+            threshold_db=getattr(Config, 'SPEECH_GATE_THRESHOLD_DB', -50.0),
+            snr_db=getattr(Config, 'SPEECH_GATE_SNR_DB', 10.0),
+            vad_mode=getattr(Config, 'SPEECH_GATE_VAD_MODE', -1),
+        )
+        self.speech_frames = 0  # Speech frames seen since the last window was cut
+        # Overlapping windows: stream position, per-chunk speech frames still in the ring, stitcher
+        self.consumed = 0  # Samples consumed from the ring so far
+        self.speech_history: Deque[Tuple[int, int]] = deque()  # (chunk end position, speech frames)
+        self.stitcher = stitcher
+        self.carry: List[str] = []  # Last stitched words, so a block name split across windows still matches
+        self.segmenter = UtteranceSegmenter(
+            trailing_silence_ms=getattr(Config, 'UTTERANCE_TRAILING_SILENCE_MS', 400),
+            max_ms=getattr(Config, 'UTTERANCE_MAX_SECONDS', 8) * 1000,
+            min_speech_ms=getattr(Config, 'UTTERANCE_MIN_SPEECH_MS', 60),
+        )
+        # Streaming state for the open utterance
+        self.utterance_id = 0
+        self.samples_since_partial = 0
+        self.partial_inflight = False
+        self.partial_word: Optional[str] = None  # Keyword found in the latest partial
+        self.partial_hits = 0  # Consecutive partials agreeing on partial_word
+        self.fired: Dict[int, Set[str]] = {}  # utterance_id -> keywords already triggered
+        # Closes the open utterance when packets stop (Discord sends none during silence)
+        self.endpoint_timer: Optional[asyncio.TimerHandle] = None
+
+
+class TranscriptionSession:
+    """One guild's transcription: its speakers' streams, recording and stats. Models are shared."""
+    
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.active = True
+        # Per-speaker audio streams keyed by SSRC (or user ID when SSRC is unknown)
+        self.streams: Dict[int, _SpeakerStream] = {}
+        self.user_id_map: Dict[int, int] = {}  # SSRC -> User ID
+        self.recording_dir: Optional[Path] = None
+        self.chunk_counter: int = 0
+        self.started = time.monotonic()
+        
+        # Stats
+        self.windows_submitted: int = 0  # Windows handed to the scheduler
+        self.windows_skipped: int = 0  # Windows dropped by the speech gate (no inference)
+        self.transcripts: int = 0  # Non-empty transcripts delivered
+    
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of this session's counters."""
+        return {
+            'speakers': len(self.streams),
+            'windows_submitted': self.windows_submitted,
+            'windows_skipped': self.windows_skipped,
+            'transcripts': self.transcripts,
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+        }
 
 
 class TranscriptionService:
-    """Service for real-time speech-to-text transcription using Faster-Whisper."""
+    """
+    Service for real-time speech-to-text transcription using Faster-Whisper.
+    
+    Hosts one isolated session per guild; the model(s), executor and inference
+    queue are shared between them.
+    """
     
     def __init__(self, model_size: str = "base", device: str = "cpu", compute_type: str = "int8"):
         """
@@ -41,23 +285,75 @@ class TranscriptionService:
         self.device = device
         self.compute_type = compute_type
         self.model: Optional[WhisperModel] = None
-        self.is_transcribing = False
+        self.models: Dict[str, WhisperModel] = {}  # Every resident model, by size (one per quality tier)
+        self.sessions: Dict[int, TranscriptionSession] = {}  # Guild ID -> active session
         self.transcript_callback: Optional[Callable] = None
-        self.audio_buffer: bytes = b''
-        self.user_id_map: Dict[int, int] = {}  # SSRC -> User ID
+        # Returns the trigger keyword in a transcript (or None); enables early triggering in streaming mode
+        self.keyword_matcher: Optional[Callable[[str], Optional[str]]] = None
         self.hotwords: str = ""  # Bias model toward these terms (e.g. Minecraft block names)
-        self._recording_dir: Optional[Path] = None
-        self._chunk_counter: int = 0
-        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="whisper")
+        self.keywords: List[str] = []  # Phrases scored in keyword-spotting mode
+        self._spotters: Dict[Tuple[str, Tuple[str, ...]], KeywordSpotter] = {}  # Per resident model and keywords
+        self.executor = ThreadPoolExecutor(max_workers=WHISPER_WORKERS, thread_name_prefix="whisper")
         self._model_lock = asyncio.Lock()
+        self.load_state = "idle"  # idle -> loading -> ready | failed (shown in /status)
+        self.load_error: Optional[str] = None
+        self._preload_task: Optional[asyncio.Task] = None
+        # Adaptive quality: switch model/beam tiers with the measured real-time factor
+        self.quality: Optional[QualityController] = None
+        tiers = parse_tiers(getattr(Config, 'WHISPER_QUALITY_TIERS', ''))
+        if tiers:
+            self.quality = QualityController(
+                tiers,
+                down_rtf=getattr(Config, 'QUALITY_DOWN_RTF', 0.8),
+                up_rtf=getattr(Config, 'QUALITY_UP_RTF', 0.3),
+                max_lag_ms=getattr(Config, 'QUALITY_MAX_LAG_MS', 1500),
+                recover_lag_ms=getattr(Config, 'QUALITY_RECOVER_LAG_MS', 300),
+                cooldown_seconds=getattr(Config, 'QUALITY_COOLDOWN_SECONDS', 20),
+            )
+        # 'process' backend: models live in worker processes instead of self.model
+        self.process_pool: Optional[WhisperProcessPool] = None
+        workers = WHISPER_WORKERS
+        if getattr(Config, 'WHISPER_BACKEND', 'thread') == 'process':
+            workers = getattr(Config, 'WHISPER_PROCESS_WORKERS', 2)
+            model_sizes = self._model_sizes()
+            self.process_pool = WhisperProcessPool(
+                model_sizes[0],
+                device=device,
+                compute_type=compute_type,
+                workers=workers,
+                cpu_threads=getattr(Config, 'WHISPER_PROCESS_CPU_THREADS', 0),
+                max_batch=getattr(Config, 'INFERENCE_MAX_BATCH', 4),
+                timeout=getattr(Config, 'WHISPER_WORKER_TIMEOUT', 30.0),
+                extra_models=model_sizes[1:],
+            )
+        self.scheduler = InferenceScheduler(
+            self._decode,
+            workers=workers,
+            max_queue=getattr(Config, 'INFERENCE_MAX_QUEUE', 8),
+            max_pending_per_speaker=getattr(Config, 'INFERENCE_MAX_PENDING_PER_SPEAKER', 1),
+            deadline_seconds=getattr(Config, 'INFERENCE_DEADLINE_SECONDS', 6.0),
+            degrade_depth=getattr(Config, 'INFERENCE_DEGRADE_DEPTH', 4),
+            degraded_beam_size=getattr(Config, 'INFERENCE_DEGRADED_BEAM_SIZE', 1),
+            decode_batch=self._decode_batch,
+            max_batch=getattr(Config, 'INFERENCE_MAX_BATCH', 4),
+            batch_window_ms=getattr(Config, 'INFERENCE_BATCH_WINDOW_MS', 30),
+        )
+    
+    def _model_sizes(self) -> List[str]:
+        """Models to keep resident: one per quality tier, or just the configured size."""
+        if self.quality is None:
+            return [self.model_size]
+        return list(dict.fromkeys(tier.model_size for tier in self.quality.tiers))
     
     def _load_model(self):
-        """Load the Whisper model (lazy loading)."""
-        if self.model is None:
-            logger.info(f"Loading Faster-Whisper model: {self.model_size} on {self.device}")
+        """Load the Whisper model(s) (lazy loading)."""
+        for model_size in self._model_sizes():
+            if model_size in self.models:
+                continue
+            logger.info(f"Loading Faster-Whisper model: {model_size} on {self.device}")
             try:
-                self.model = WhisperModel(
-                    self.model_size,
+                model = WhisperModel(
+                    model_size,
                     device=self.device,
                     compute_type=self.compute_type
                 )
@@ -65,256 +361,692 @@ class TranscriptionService:
             except Exception as e:
                 logger.error(f"Error loading Whisper model: {e}", exc_info=True)
                 raise
+            try:
+                warm_up(model)
+            except Exception as e:
+                logger.warning(f"Whisper warm-up failed: {e}")
+            self.models[model_size] = model
+        if self.model is None:
+            self.model = self.models[self._model_sizes()[0]]
+    
+    def start_preload(self) -> None:
+        """Load (and warm up) the model in the background so the first session starts instantly."""
+        if self._preload_task is None:
+            self._preload_task = asyncio.create_task(self._preload())
+    
+    async def _preload(self) -> None:
+        """Background preload; failures are reported through load_state."""
+        try:
+            await self._ensure_model()
+        except Exception:
+            pass  # Logged by the loader; start_session will retry
+    
+    @property
+    def is_transcribing(self) -> bool:
+        """Whether any guild has an active session."""
+        return bool(self.sessions)
+    
+    def get_session(self, guild_id: int = 0) -> Optional[TranscriptionSession]:
+        """Active session for a guild, if any."""
+        return self.sessions.get(guild_id)
     
     def set_transcript_callback(self, callback: Callable):
         """Set callback function for when transcripts are received."""
         self.transcript_callback = callback
     
+    def set_keyword_matcher(self, matcher: Callable[[str], Optional[str]]) -> None:
+        """Set function that returns the trigger keyword found in a transcript, or None."""
+        self.keyword_matcher = matcher
+    
     def set_hotwords(self, words: list) -> None:
         """Set hotwords to bias transcription (e.g. block names for Minecraft)."""
         self.hotwords = " ".join(str(w).lower() for w in words) if words else ""
     
-    async def start_session(self, sample_rate: int = 16000):
-        """Start a new transcription session."""
-        if self.is_transcribing:
-            logger.warning("Transcription session already active")
+    def set_keywords(self, words: list) -> None:
+        """Set the phrases decoded in keyword-spotting mode (WHISPER_DECODE_MODE=keyword)."""
+        self.keywords = [str(w).lower() for w in words] if words else []
+        self._spotters = {}
+    
+    def set_vocabulary(self, words: list) -> None:
+        """
+        Replace hotwords and keywords together, e.g. after the block words file changes.
+        
+        In keyword mode the spotters for resident models are rebuilt before the swap,
+        so this blocks: call it off the event loop. Windows already decoding finish
+        with the old words; the process backend sends keywords with every job, so its
+        workers pick up the new ones on their next window.
+        """
+        keywords = [str(w).lower() for w in words] if words else []
+        spotters = {}
+        if keywords and self.process_pool is None and getattr(Config, 'WHISPER_DECODE_MODE', 'transcribe') == 'keyword':
+            for model_size, model in list(self.models.items()):
+                spotters[(model_size, tuple(keywords))] = make_keyword_spotter(model, keywords)
+        self._spotters = spotters
+        self.keywords = keywords
+        self.hotwords = " ".join(keywords)
+        logger.info(f"Transcription vocabulary updated ({len(keywords)} words)")
+    
+    def _keyword_mode(self) -> bool:
+        """Whether windows are decoded against the keyword list instead of transcribed."""
+        return getattr(Config, 'WHISPER_DECODE_MODE', 'transcribe') == 'keyword' and bool(self.keywords)
+    
+    def _get_model(self, model_size: Optional[str]) -> WhisperModel:
+        """Resident model of the given size (the main model when None or not loaded)."""
+        return self.models.get(model_size) or self.model
+    
+    def _get_spotter(self, model_size: Optional[str] = None) -> KeywordSpotter:
+        """Keyword spotter for a resident model and the current keywords."""
+        spotters = self._spotters
+        keywords = self.keywords
+        # Keyed by the keywords too, so a vocabulary swap mid-decode can't cache a stale spotter
+        key = (model_size or self.model_size, tuple(keywords))
+        spotter = spotters.get(key)
+        if spotter is None:
+            spotter = spotters[key] = make_keyword_spotter(self._get_model(model_size), keywords)
+        return spotter
+    
+    def _select_tier(self, beam_size: Optional[int]) -> Tuple[Optional[QualityTier], Optional[str], Optional[int]]:
+        """
+        Apply the current quality tier to a job's beam size.
+        
+        Returns:
+            (tier or None, model size or None, beam size)
+        """
+        if self.quality is None:
+            return None, None, beam_size
+        tier = self.quality.tier
+        # Partials and overload fallback ask for a narrower beam; never widen it
+        beam_size = tier.beam_size if beam_size is None else min(beam_size, tier.beam_size)
+        return tier, tier.model_size, beam_size
+    
+    def _record_quality(self, tier: Optional[QualityTier], samples: int, started: float) -> None:
+        """Report a finished decode's real-time factor to the quality controller."""
+        if tier is None:
             return
+        self.quality.record(
+            samples / WHISPER_SAMPLE_RATE,
+            time.monotonic() - started,
+            self.scheduler.lag_ms,
+            tier,
+        )
+    
+    async def start_session(self, guild_id: int = 0, sample_rate: int = 16000) -> TranscriptionSession:
+        """Start a transcription session for one guild (other guilds' sessions are unaffected)."""
+        session = self.sessions.get(guild_id)
+        if session is not None:
+            logger.warning(f"Transcription session already active for guild {guild_id}")
+            return session
         
         try:
             # Load model if not already loaded
-            async with self._model_lock:
-                if self.model is None:
-                    # Run model loading in executor to avoid blocking
-                    await asyncio.get_event_loop().run_in_executor(
-                        self.executor, self._load_model
-                    )
+            await self._ensure_model()
             
-            self.is_transcribing = True
-            self.audio_buffer = b''
-            self._chunk_counter = 0
+            session = TranscriptionSession(guild_id)
             # Create recording directory if saving audio
             if getattr(Config, 'SAVE_AUDIO', False):
-                self._recording_dir = Config.SAVE_AUDIO_DIR
-                self._recording_dir.mkdir(parents=True, exist_ok=True)
-                session_name = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-                self._recording_dir = self._recording_dir / session_name
-                self._recording_dir.mkdir(parents=True, exist_ok=True)
-                logger.info(f"Saving audio to {self._recording_dir}")
-            else:
-                self._recording_dir = None
-            logger.info("Started transcription session")
+                recording_dir = Config.SAVE_AUDIO_DIR
+                recording_dir.mkdir(parents=True, exist_ok=True)
+                session_name = datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + f"_guild{guild_id}"
+                session.recording_dir = recording_dir / session_name
+                session.recording_dir.mkdir(parents=True, exist_ok=True)
+                logger.info(f"Saving audio to {session.recording_dir}")
+            self.sessions[guild_id] = session
+            logger.info(f"Started transcription session (guild {guild_id}, {len(self.sessions)} active)")
+            return session
         except Exception as e:
             logger.error(f"Error starting transcription session: {e}", exc_info=True)
-            self.is_transcribing = False
             raise
     
-    async def stop_session(self):
-        """Stop the transcription session."""
-        if not self.is_transcribing:
+    async def stop_session(self, guild_id: int = 0):
+        """Stop one guild's transcription session."""
+        session = self.sessions.pop(guild_id, None)
+        if session is None:
             return
         
-        self.is_transcribing = False
-        self.audio_buffer = b''
-        self._recording_dir = None
-        logger.info("Stopped transcription session")
-    
-    def _stereo_to_mono(self, pcm_stereo: bytes) -> bytes:
-        """Convert interleaved stereo PCM16 to mono (average L+R). Discord sends 48kHz stereo."""
-        if len(pcm_stereo) < 4:
-            return b''
-        arr = np.frombuffer(pcm_stereo, dtype=np.int16)
-        if len(arr) % 2 != 0:
-            arr = arr[:-1]
-        frames = arr.reshape(-1, 2)
-        mono = ((frames[:, 0].astype(np.int32) + frames[:, 1].astype(np.int32)) // 2).astype(np.int16)
-        return mono.tobytes()
-    
-    def _save_audio_chunk(self, pcm_48k: bytes, user_id: Optional[int] = None) -> None:
-        """Save a PCM chunk to a WAV file (48kHz mono 16-bit)."""
-        if not self._recording_dir:
+        session.active = False
+        for stream in session.streams.values():
+            if stream.endpoint_timer is not None:
+                stream.endpoint_timer.cancel()
+        if self.sessions:
+            # Other guilds keep the workers; just drop this guild's waiting windows
+            self.scheduler.cancel(set(session.streams.values()))
+        else:
+            await self.scheduler.stop()
+        session.streams.clear()
+        logger.info(f"Stopped transcription session (guild {guild_id}, {len(self.sessions)} active)")
+    
+    async def end_session(self, guild_id: int = 0):
+        """
+        Finish one guild's transcription: flush each speaker's remaining audio, then stop the session.
+        
+        The flush needs the session (stop_session removes it), so this order is what lets
+        the last overlapping window of every stream emit its trailing words.
+        """
+        try:
+            await self.flush_buffer(guild_id)
+        finally:
+            await self.stop_session(guild_id)
+    
+    def _save_audio_chunk(self, session: TranscriptionSession, audio_16k: np.ndarray, user_id: Optional[int] = None) -> None:
+        """Save a converted chunk to a WAV file (16kHz mono 16-bit, as Whisper hears it)."""
+        if not session.recording_dir:
             return
         try:
-            self._chunk_counter += 1
+            session.chunk_counter += 1
             user_suffix = f"_user{user_id}" if user_id else ""
-            wav_path = self._recording_dir / f"chunk_{self._chunk_counter:04d}{user_suffix}.wav"
+            wav_path = session.recording_dir / f"chunk_{session.chunk_counter:04d}{user_suffix}.wav"
             with wave.open(str(wav_path), 'wb') as wf:
                 wf.setnchannels(1)
                 wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(DISCORD_PCM_RATE)
-                wf.writeframes(pcm_48k)
+                wf.setframerate(WHISPER_SAMPLE_RATE)
+                wf.writeframes((audio_16k * 32767.0).astype(np.int16).tobytes())
         except Exception as e:
             logger.warning(f"Failed to save audio chunk: {e}")
     
-    def _resample_48k_to_16k(self, pcm_48k: bytes) -> bytes:
-        """Resample PCM16 48kHz mono to 16kHz by decimating (take every 3rd sample)."""
-        if len(pcm_48k) < 2:
-            return b''
-        arr = np.frombuffer(pcm_48k, dtype=np.int16)
-        # Decimate: 48k -> 16k = 1/3 samples
-        decimated = arr[::RESAMPLE_RATIO].copy()
-        return decimated.tobytes()
-
-    async def process_audio_chunk(self, audio_data: bytes, user_id: Optional[int] = None, ssrc: Optional[int] = None):
+    def _window_samples(self) -> int:
+        """Number of 16kHz mono samples in one transcription window."""
+        # Process in chunks (longer = more context for accuracy, but more latency)
+        chunk_secs = getattr(Config, 'WHISPER_CHUNK_SECONDS', 3)
+        return WHISPER_SAMPLE_RATE * chunk_secs
+    
+    def _utterance_mode(self) -> bool:
+        """Whether audio is cut at speech endpoints instead of fixed windows."""
+        return getattr(Config, 'WHISPER_SEGMENTATION', 'fixed') == 'utterance'
+    
+    def _streaming_mode(self) -> bool:
+        """Whether open utterances are re-decoded for early keyword triggers."""
+        return (
+            self._utterance_mode()
+            and getattr(Config, 'WHISPER_STREAMING', False)
+            and self.keyword_matcher is not None
+        )
+    
+    def _overlap_samples(self) -> int:
+        """Audio shared by consecutive fixed windows (0 = no overlap; at most half a window)."""
+        if self._utterance_mode():
+            return 0
+        overlap = int(WHISPER_SAMPLE_RATE * getattr(Config, 'WHISPER_WINDOW_OVERLAP_SECONDS', 0.0))
+        return max(0, min(overlap, self._window_samples() // 2))
+    
+    def _preroll_samples(self) -> int:
+        """Audio kept from before speech onset in utterance mode."""
+        return WHISPER_SAMPLE_RATE * getattr(Config, 'UTTERANCE_PREROLL_MS', 200) // 1000
+    
+    def _buffer_samples(self) -> int:
+        """Ring capacity: two windows, or the longest utterance plus pre-roll and slack."""
+        if self._utterance_mode():
+            max_secs = getattr(Config, 'UTTERANCE_MAX_SECONDS', 8)
+            return WHISPER_SAMPLE_RATE * (max_secs + 1) + self._preroll_samples()
+        # Room for two windows so a late consumer doesn't drop audio immediately
+        return self._window_samples() * 2
+    
+    def _get_stream(self, session: TranscriptionSession, key: int) -> _SpeakerStream:
+        """Get or create the audio stream for one speaker of a session."""
+        stream = session.streams.get(key)
+        if stream is None:
+            # Discord voice can be very quiet; gain is applied during conversion
+            gain = getattr(Config, 'WHISPER_AUDIO_GAIN', 3.0)
+            stitcher = None
+            overlap = self._overlap_samples()
+            if overlap:
+                stitcher = TranscriptStitcher(
+                    self._window_samples() / WHISPER_SAMPLE_RATE, overlap / WHISPER_SAMPLE_RATE
+                )
+            stream = _SpeakerStream(session, self._buffer_samples(), gain, stitcher)
+            session.streams[key] = stream
+        return stream
+    
+    async def process_audio_chunk(
+        self,
+        audio_data,
+        user_id: Optional[int] = None,
+        ssrc: Optional[int] = None,
+        guild_id: int = 0,
+    ):
         """
         Process an audio chunk and get transcription.
         
         Args:
-            audio_data: Raw audio bytes (PCM16 48kHz stereo from Discord)
+            audio_data: Raw PCM16 48kHz stereo from Discord (bytes or memoryview; copied immediately)
             user_id: Discord user ID
             ssrc: SSRC identifier
+            guild_id: Guild whose session the audio belongs to
         """
-        if not self.is_transcribing:
+        session = self.sessions.get(guild_id)
+        if session is None:
             return
         
+        # Buffer audio per speaker so overlapping talkers don't get interleaved
+        # (Discord sends 48kHz stereo PCM16); fall back to user ID when SSRC is unknown
+        key = ssrc if ssrc is not None else (user_id or 0)
+        
         # Map SSRC to user ID if provided
-        if ssrc and user_id:
-            self.user_id_map[ssrc] = user_id
+        if user_id:
+            session.user_id_map[key] = user_id
         
-        # Buffer audio data (Discord sends 48kHz stereo PCM)
-        self.audio_buffer += audio_data
+        # Convert 48kHz stereo -> 16kHz mono float32 on ingest (filter state kept per speaker)
+        stream = self._get_stream(session, key)
+        audio_16k = stream.converter.process(audio_data)
+        stream.buffer.write(audio_16k)
         
-        # Process in chunks (longer = more context for accuracy, but more latency)
-        # Discord sends 48kHz stereo, so bytes = rate * channels * secs * 2 (16-bit)
-        chunk_secs = getattr(Config, 'WHISPER_CHUNK_SECONDS', 3)
-        chunk_48k_bytes = DISCORD_PCM_RATE * DISCORD_CHANNELS * chunk_secs * 2
+        if self._utterance_mode():
+            self._segment_utterances(stream, audio_16k, user_id)
+        else:
+            self._segment_fixed(stream, audio_16k, user_id)
+    
+    def _segment_fixed(self, stream: _SpeakerStream, audio_16k: np.ndarray, user_id: Optional[int]) -> None:
+        """Cut fixed WHISPER_CHUNK_SECONDS windows (overlapping if configured), skipping those without speech."""
+        buffer = stream.buffer
+        frames = stream.gate.process(audio_16k)
+        stream.speech_frames += frames
+        overlap = self._overlap_samples()
+        if overlap:
+            # Remember where this chunk's speech sits so frames in the overlap count for the next window too
+            stream.speech_history.append((self._stream_position(stream) + len(buffer), frames))
         
-        if len(self.audio_buffer) >= chunk_48k_bytes:
-            chunk_stereo = self.audio_buffer[:chunk_48k_bytes]
-            self.audio_buffer = self.audio_buffer[chunk_48k_bytes:]
-            
-            # Convert stereo to mono (Discord sends 48kHz stereo; we need mono)
-            chunk_48k = self._stereo_to_mono(chunk_stereo)
-            if len(chunk_48k) == 0:
+        window = self._window_samples()
+        if len(buffer) >= window:
+            speech_ms = stream.speech_frames * GATE_FRAME_MS
+            window_start = self._stream_position(stream)
+            if (getattr(Config, 'SPEECH_GATE_ENABLED', True)
+                    and speech_ms < getattr(Config, 'SPEECH_GATE_MIN_SPEECH_MS', 100)):
+                # Silence or background noise only: skip inference entirely
+                self._advance(stream, window - overlap)
+                stream.session.windows_skipped += 1
+                logger.debug(f"Speech gate skipped window ({speech_ms}ms speech, User: {user_id})")
                 return
             
-            # Save to WAV file if recording is enabled
-            if self._recording_dir:
-                self._save_audio_chunk(chunk_48k, user_id)
-            
-            # Resample 48kHz -> 16kHz for Whisper
-            chunk_16k = self._resample_48k_to_16k(chunk_48k)
-            if len(chunk_16k) == 0:
+            # Copy the window out of the ring (the task runs later) and release all but the overlap
+            self._submit_window(
+                buffer.peek(window).copy(), user_id, stream,
+                window_start=window_start if overlap else None,
+            )
+            self._advance(stream, window - overlap)
+    
+    @staticmethod
+    def _stream_position(stream: _SpeakerStream) -> int:
+        """Stream time (in samples) of the oldest sample in the ring."""
+        return stream.consumed + stream.buffer.dropped_samples
+    
+    def _advance(self, stream: _SpeakerStream, samples: int) -> None:
+        """Release audio from the front of the ring and forget the speech it held."""
+        stream.buffer.consume(samples)
+        stream.consumed += samples
+        if not self._overlap_samples():
+            stream.speech_frames = 0
+            return
+        position = self._stream_position(stream)
+        history = stream.speech_history
+        while history and history[0][0] <= position:
+            stream.speech_frames -= history.popleft()[1]
+    
+    def _segment_utterances(self, stream: _SpeakerStream, audio_16k: np.ndarray, user_id: Optional[int]) -> None:
+        """Send each utterance to Whisper as soon as its trailing silence (or max length) is reached."""
+        buffer = stream.buffer
+        segmenter = stream.segmenter
+        for is_speech in stream.gate.classify(audio_16k):
+            event = segmenter.push(is_speech)
+            if event == UtteranceSegmenter.START:
+                logger.debug(f"Utterance started (User: {user_id})")
+                self._open_utterance(stream)
+            elif event in (UtteranceSegmenter.END, UtteranceSegmenter.SPLIT):
+                self._submit_utterance(stream, user_id)
+                if event == UtteranceSegmenter.SPLIT:
+                    self._open_utterance(stream)
+        
+        if segmenter.in_utterance and self._streaming_mode():
+            # Re-decode the growing utterance at a fixed cadence (one partial in flight at a time)
+            stream.samples_since_partial += len(audio_16k)
+            interval = WHISPER_SAMPLE_RATE * getattr(Config, 'STREAMING_INTERVAL_MS', 500) // 1000
+            if stream.samples_since_partial >= interval and not stream.partial_inflight:
+                stream.samples_since_partial = 0
+                stream.partial_inflight = True
+                context = WHISPER_SAMPLE_RATE * getattr(Config, 'STREAMING_CONTEXT_SECONDS', 4)
+                self.scheduler.submit(
+                    stream,
+                    buffer.peek_latest(context).copy(),
+                    partial(self._handle_partial, user_id, stream, stream.utterance_id),
+                    beam_size=getattr(Config, 'STREAMING_BEAM_SIZE', 1),
+                    droppable=True,
+                )
+        
+        if stream.endpoint_timer is not None:
+            stream.endpoint_timer.cancel()
+            stream.endpoint_timer = None
+        if segmenter.in_utterance:
+            # Discord stops sending packets a few silent frames after speech (DTX), so the
+            # trailing silence may never arrive as frames: also end the utterance on a timer
+            silence_ms = getattr(Config, 'UTTERANCE_TRAILING_SILENCE_MS', 400)
+            stream.endpoint_timer = asyncio.get_running_loop().call_later(
+                silence_ms / 1000, self._close_idle_utterance, stream, user_id
+            )
+        else:
+            # Idle: keep only the pre-roll so the next utterance's onset isn't clipped
+            excess = len(buffer) - self._preroll_samples()
+            if excess > 0:
+                buffer.consume(excess)
+    
+    def _submit_utterance(self, stream: _SpeakerStream, user_id: Optional[int]) -> None:
+        """Send the finished utterance (pre-roll, speech and any trailing silence in the ring) to Whisper."""
+        buffer = stream.buffer
+        self._submit_window(buffer.peek(len(buffer)).copy(), user_id, stream, stream.utterance_id)
+        buffer.clear()
+    
+    def _close_idle_utterance(self, stream: _SpeakerStream, user_id: Optional[int]) -> None:
+        """Endpoint timer: the speaker's packets stopped mid-utterance, so the utterance is over."""
+        stream.endpoint_timer = None
+        if not stream.session.active or not stream.segmenter.in_utterance:
+            return
+        logger.debug(f"Utterance ended: no packets for the trailing silence (User: {user_id})")
+        stream.segmenter.reset()
+        self._submit_utterance(stream, user_id)
+    
+    def _open_utterance(self, stream: _SpeakerStream) -> None:
+        """Start streaming/dedup bookkeeping for a new utterance."""
+        stream.utterance_id += 1
+        stream.samples_since_partial = 0
+        stream.partial_word = None
+        stream.partial_hits = 0
+        # Only utterances whose final transcript may still be in flight need dedup state
+        for old_id in [u for u in stream.fired if u < stream.utterance_id - 2]:
+            del stream.fired[old_id]
+    
+    def _submit_window(
+        self,
+        chunk_16k: np.ndarray,
+        user_id: Optional[int],
+        stream: _SpeakerStream,
+        utterance_id: int = 0,
+        window_start: Optional[int] = None,
+    ) -> None:
+        """Hand a window of 16kHz mono audio to the inference scheduler (window_start set = overlapping window)."""
+        session = stream.session
+        # Save to WAV file if recording is enabled
+        if session.recording_dir:
+            self._save_audio_chunk(session, chunk_16k, user_id)
+        
+        session.windows_submitted += 1
+        if window_start is not None:
+            # Overlapping windows can't be concatenated; their words are stitched instead. Each
+            # is its own job, so max_pending_per_speaker doesn't bound them - the queue size and
+            # deadline do (at most one window per hop, i.e. window minus overlap, per speaker)
+            self.scheduler.submit(
+                stream, chunk_16k, partial(self._handle_window_words, user_id, stream, window_start), mergeable=False
+            )
+            return
+        self.scheduler.submit(stream, chunk_16k, partial(self._handle_transcript, user_id, stream, utterance_id))
+    
+    async def _ensure_model(self) -> None:
+        """Load the model in the executor (or start the worker processes) if not done yet."""
+        if self.load_state == "ready":
+            return
+        async with self._model_lock:
+            if self.load_state == "ready":
                 return
-            
-            # Process chunk asynchronously
-            asyncio.create_task(self._transcribe_chunk(chunk_16k, user_id))
+            self.load_state = "loading"
+            started = time.monotonic()
+            try:
+                if self.process_pool is not None:
+                    await self.process_pool.start()
+                else:
+                    await asyncio.get_event_loop().run_in_executor(
+                        self.executor, self._load_model
+                    )
+            except Exception as e:
+                self.load_state = "failed"
+                self.load_error = str(e)
+                raise
+            self.load_state = "ready"
+            self.load_error = None
+            logger.info(f"Whisper ready after {time.monotonic() - started:.1f}s")
     
-    def _bytes_to_numpy(self, audio_bytes: bytes, sample_rate: int = 16000) -> np.ndarray:
-        """Convert PCM16 bytes to numpy array, with optional gain for quiet Discord audio."""
-        if len(audio_bytes) == 0:
-            return np.array([], dtype=np.float32)
+    async def _decode(self, audio_numpy: np.ndarray, beam_size: Optional[int] = None) -> Union[str, List[Word]]:
+        """
+        Run Faster-Whisper on 16kHz mono float32 audio.
         
-        # Ensure we have even number of bytes for int16
-        if len(audio_bytes) % 2 != 0:
-            audio_bytes = audio_bytes[:-1]  # Drop last byte if odd
+        Returns:
+            The joined text, or the timestamped words when windows overlap (for stitching)
+        """
+        await self._ensure_model()
         
-        # Convert bytes to int16 array
-        audio_array = np.frombuffer(audio_bytes, dtype=np.int16)
+        # Log audio stats for debugging
+        audio_rms = np.sqrt(np.mean(audio_numpy**2)) if len(audio_numpy) > 0 else 0.0
+        logger.debug(f"Processing audio chunk: {len(audio_numpy)} samples, RMS: {audio_rms:.4f}")
         
-        # Convert to float32 and normalize to [-1.0, 1.0]
-        audio_float = audio_array.astype(np.float32) / 32768.0
+        tier, model_size, beam_size = self._select_tier(beam_size)
+        started = time.monotonic()
+        if self.process_pool is not None:
+            texts = await self.process_pool.transcribe(
+                [audio_numpy], beam_size, self.hotwords,
+                self.keywords if self._keyword_mode() else None, model_size,
+                word_timestamps=self._overlap_samples() > 0,
+            )
+            text = texts[0]
+        else:
+            # Run transcription in executor to avoid blocking event loop
+            text = await asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                self._run_transcription,
+                audio_numpy,
+                beam_size,
+                model_size
+            )
+        self._record_quality(tier, len(audio_numpy), started)
+        return text
+    
+    async def _decode_batch(self, windows: list, beam_size: Optional[int] = None) -> list:
+        """Transcribe several windows (e.g. from different speakers) with one encoder pass."""
+        await self._ensure_model()
+        logger.debug(f"Decoding batch of {len(windows)} windows")
+        tier, model_size, beam_size = self._select_tier(beam_size)
+        started = time.monotonic()
+        if self.process_pool is not None:
+            texts = await self.process_pool.transcribe(
+                windows, beam_size, self.hotwords,
+                self.keywords if self._keyword_mode() else None, model_size,
+                word_timestamps=self._overlap_samples() > 0,
+            )
+        else:
+            texts = await asyncio.get_event_loop().run_in_executor(
+                self.executor,
+                self._run_batch_transcription,
+                windows,
+                beam_size,
+                model_size
+            )
+        self._record_quality(tier, sum(len(window) for window in windows), started)
+        return texts
+    
+    async def _handle_partial(
+        self,
+        user_id: Optional[int],
+        stream: _SpeakerStream,
+        utterance_id: int,
+        text: Optional[str],
+    ):
+        """Trigger early once a keyword is stable across partial hypotheses of the open utterance."""
+        stream.partial_inflight = False
+        if text is None or utterance_id != stream.utterance_id or not stream.session.active:
+            return  # A newer utterance has started (or the session ended); this hypothesis is stale
         
-        # Apply gain - Discord voice can be very quiet; amplify to improve VAD/transcription
-        gain = getattr(Config, 'WHISPER_AUDIO_GAIN', 3.0)
-        if gain != 1.0:
-            audio_float = audio_float * gain
-            audio_float = np.clip(audio_float, -1.0, 1.0)
+        # A keyword is stable once consecutive partials agree on it
+        word = self.keyword_matcher(text) if text else None
+        if word is not None and word == stream.partial_word:
+            stream.partial_hits += 1
+        else:
+            stream.partial_word = word
+            stream.partial_hits = 1 if word else 0
+        if word is None or stream.partial_hits < getattr(Config, 'STREAMING_STABLE_HITS', 2):
+            return
         
-        return audio_float
+        fired = stream.fired.setdefault(utterance_id, set())
+        if word in fired or not self.transcript_callback:
+            return
+        fired.add(word)
+        logger.debug(f"Early trigger on stable partial \"{text}\" (User: {user_id})")
+        stream.session.transcripts += 1
+        await self.transcript_callback(
+            text=text,
+            user_id=user_id,
+            timestamp=datetime.now(),
+            guild_id=stream.session.guild_id,
+        )
+    
+    async def _handle_window_words(
+        self,
+        user_id: Optional[int],
+        stream: _SpeakerStream,
+        window_start: int,
+        words: Optional[List[Word]],
+        final: bool = False,
+    ):
+        """Stitch an overlapping window's words into the speaker's transcript and deliver what's new."""
+        if words is None or not stream.session.active:
+            return
+        text = stream.stitcher.stitch(window_start / WHISPER_SAMPLE_RATE, words, final=final)
+        await self._handle_transcript(user_id, stream, 0, self._join_carry(stream, text))
     
-    async def _transcribe_chunk(self, audio_data: bytes, user_id: Optional[int]):
-        """Transcribe an audio chunk using Faster-Whisper."""
+    def _join_carry(self, stream: _SpeakerStream, text: str) -> str:
+        """
+        Prefix newly stitched text with the carried-over words a block name needs.
+        
+        The stitcher emits each word once, so a name split across two emissions
+        ("diamond" | "block") is never seen whole. Detection runs over the carry-over
+        plus the new text, and only the shortest tail of the carry-over that completes
+        a block name is delivered with it, so names already emitted don't fire again.
+        
+        Args:
+            stream: The speaker's stream (its carry-over is updated)
+            text: Newly stitched text
+        
+        Returns:
+            The text to deliver
+        """
+        tokens = text.split()
+        if not tokens:
+            return text
+        carry = stream.carry
+        keep = getattr(Config, 'STITCH_CARRY_WORDS', 3)
+        stream.carry = (carry + tokens)[-keep:] if keep > 0 else []
+        if not carry or self.keyword_matcher is None:
+            return text
+        alone = self.keyword_matcher(text)
+        for count in range(1, len(carry) + 1):
+            joined = " ".join(carry[-count:] + tokens)
+            word = self.keyword_matcher(joined)
+            # Only a name that neither side holds on its own spans the boundary
+            if word is not None and word != alone and word != self.keyword_matcher(" ".join(carry[-count:])):
+                return joined
+        return text
+    
+    async def _handle_transcript(
+        self,
+        user_id: Optional[int],
+        stream: _SpeakerStream,
+        utterance_id: int,
+        text: Optional[str],
+    ):
+        """Deliver a finished window's transcript (None = dropped by the scheduler or failed)."""
+        if text is None or not stream.session.active:
+            return
+        
+        if text and utterance_id and self.keyword_matcher:
+            # Don't trigger twice for an utterance a stable partial already fired on
+            word = self.keyword_matcher(text)
+            fired = stream.fired.setdefault(utterance_id, set())
+            if word is not None and word in fired:
+                logger.debug(f"Final transcript \"{text}\" already triggered early (User: {user_id})")
+                return
+            if word is not None:
+                fired.add(word)
+        
+        if text and self.transcript_callback:
+            stream.session.transcripts += 1
+            await self.transcript_callback(
+                text=text,
+                user_id=user_id,
+                timestamp=datetime.now(),
+                guild_id=stream.session.guild_id,
+            )
+            # Bot logs "Heard: ..." in callback; avoid duplicate log here
+        elif not text:
+            logger.debug(f"No speech in chunk (VAD filtered, User: {user_id})")
+    
+    async def _transcribe_chunk(
+        self,
+        audio_numpy: np.ndarray,
+        user_id: Optional[int],
+        stream: _SpeakerStream,
+        utterance_id: int = 0,
+        window_start: Optional[int] = None,
+    ):
+        """Transcribe an audio chunk (16kHz mono float32) immediately, bypassing the scheduler."""
         try:
-            # Ensure model is loaded
-            if self.model is None:
-                async with self._model_lock:
-                    if self.model is None:
-                        await asyncio.get_event_loop().run_in_executor(
-                            self.executor, self._load_model
-                        )
-            
-            # Convert bytes to numpy array
-            audio_numpy = self._bytes_to_numpy(audio_data)
-            
             if len(audio_numpy) == 0:
                 logger.debug("Skipping empty audio chunk")
                 return
             
-            # Log audio stats for debugging
-            audio_rms = np.sqrt(np.mean(audio_numpy**2)) if len(audio_numpy) > 0 else 0.0
-            logger.debug(f"Processing audio chunk: {len(audio_data)} bytes, {len(audio_numpy)} samples, RMS: {audio_rms:.4f}")
-            
-            # Run transcription in executor to avoid blocking event loop
-            segments, info = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._run_transcription,
-                audio_numpy
-            )
-            
-            # Combine segments into full text
-            text_parts = []
-            for segment in segments:
-                text_parts.append(segment.text.strip())
-            
-            text = " ".join(text_parts).strip()
-            
-            if text and self.transcript_callback:
-                await self.transcript_callback(
-                    text=text,
-                    user_id=user_id,
-                    timestamp=datetime.now()
-                )
-                # Bot logs "Heard: ..." in callback; avoid duplicate log here
-            elif not text:
-                logger.debug(f"No speech in chunk (VAD filtered, User: {user_id})")
-            
+            text = await self._decode(audio_numpy)
+            if window_start is not None:
+                # Last overlapping window of the stream: stitch, owning everything to its end
+                await self._handle_window_words(user_id, stream, window_start, text, final=True)
+                return
+            await self._handle_transcript(user_id, stream, utterance_id, text)
+        
         except Exception as e:
             logger.error(f"Error transcribing audio chunk: {e}", exc_info=True)
     
-    def _run_transcription(self, audio_numpy: np.ndarray):
+    def _run_transcription(
+        self,
+        audio_numpy: np.ndarray,
+        beam_size: Optional[int] = None,
+        model_size: Optional[str] = None,
+    ) -> str:
         """Run transcription (called in executor)."""
-        # Validate audio array
-        if len(audio_numpy) == 0:
-            logger.warning("Empty audio array provided for transcription")
-            return [], None
-        
-        # Check if audio is all zeros (silence)
-        if np.all(audio_numpy == 0):
-            logger.debug("Audio array contains only silence")
-            return [], None
-        
-        # Use Faster-Whisper's transcribe method (audio must be 16kHz mono float32)
-        # beam_size=5 improves accuracy; hotwords bias toward Minecraft block names
-        vad_threshold = getattr(Config, 'WHISPER_VAD_THRESHOLD', 0.2)
-        log_prob_threshold = getattr(Config, 'WHISPER_LOG_PROB_THRESHOLD', -1.5)
-        no_speech_threshold = getattr(Config, 'WHISPER_NO_SPEECH_THRESHOLD', 0.7)
-        beam_size = getattr(Config, 'WHISPER_BEAM_SIZE', 5)
-        hotwords = self.hotwords or None  # Biases model toward block names
-        segments, info = self.model.transcribe(
-            audio_numpy,
-            language="en",
-            beam_size=beam_size,  # 5 = more accurate, 1 = faster
-            vad_filter=True,
-            vad_parameters=dict(
-                min_silence_duration_ms=200,
-                threshold=vad_threshold,
-                min_speech_duration_ms=100,
-                speech_pad_ms=300,
-            ),
-            log_prob_threshold=log_prob_threshold,
-            no_speech_threshold=no_speech_threshold,
-            hotwords=hotwords,
-        )
-        
-        # Convert generator to list
-        return list(segments), info
+        if self._overlap_samples():
+            return self._run_batch_transcription([audio_numpy], beam_size, model_size)[0]
+        if self._keyword_mode():
+            return self._get_spotter(model_size).transcribe([audio_numpy])[0]
+        return transcribe_window(self._get_model(model_size), audio_numpy, beam_size, self.hotwords)
+    
+    def _run_batch_transcription(
+        self,
+        windows: list,
+        beam_size: Optional[int] = None,
+        model_size: Optional[str] = None,
+    ) -> list:
+        """Run batched transcription (called in executor)."""
+        overlap = self._overlap_samples() > 0
+        if self._keyword_mode():
+            texts = self._get_spotter(model_size).transcribe(windows)
+            return spotted_words(texts, windows) if overlap else texts
+        if overlap:
+            # Word timestamps need transcribe(); windows are decoded one after another
+            model = self._get_model(model_size)
+            return [transcribe_window_words(model, window, beam_size, self.hotwords) for window in windows]
+        return transcribe_windows(self._get_model(model_size), windows, beam_size, self.hotwords)
     
-    async def flush_buffer(self):
-        """Flush remaining audio buffer and transcribe."""
-        if self.audio_buffer and self.is_transcribing:
+    async def flush_buffer(self, guild_id: int = 0):
+        """Flush a session's remaining per-speaker audio and transcribe it."""
+        session = self.sessions.get(guild_id)
+        if session is None:
+            return
+        for key, stream in list(session.streams.items()):
+            buffer = stream.buffer
+            if self._utterance_mode():
+                has_speech = stream.segmenter.in_utterance
+            else:
+                has_speech = stream.speech_frames > 0 or not getattr(Config, 'SPEECH_GATE_ENABLED', True)
+            if len(buffer) == 0 or not has_speech:
+                continue
             # Process remaining buffer
-            await self._transcribe_chunk(self.audio_buffer, None)
-            self.audio_buffer = b''
+            window_start = self._stream_position(stream) if stream.stitcher is not None else None
+            chunk_16k = buffer.peek(len(buffer)).copy()
+            buffer.clear()
+            utterance_id = stream.utterance_id if self._utterance_mode() else 0
+            await self._transcribe_chunk(
+                chunk_16k, session.user_id_map.get(key), stream, utterance_id, window_start
+            )
 
 
 # Global transcription service instance
@@ -0,0 +1,277 @@
+"""Tests for the asyncio RCON client."""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.async_rcon import (
+    AsyncRCON, AsyncRCONPool, PacketDecoder, RCONError, SERVERDATA_AUTH, SERVERDATA_AUTH_RESPONSE,
+    SERVERDATA_EXECCOMMAND, SERVERDATA_RESPONSE_VALUE, encode_packet,
+)
+from src.minecraft_rcon import MinecraftRCON
+
+
+class _FakeServer:
+    """Minimal Minecraft-style RCON server: splits replies at 4096 UTF-8 bytes, answers unknown types."""
+    
+    def __init__(self, password="secret", drop_first=False, one_packet_per_read=False):
+        self.password = password
+        self.drop_first = drop_first  # Drop the first connection when it sends a command
+        self.one_packet_per_read = one_packet_per_read  # Drop connections that send several packets at once (vanilla)
+        self.connections = 0
+        self.commands = []
+        self.max_packets_per_read = 0
+        self.server = None
+        self.handlers = set()
+    
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        self.server.close()
+        for handler in self.handlers:
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+    
+    def _reply(self, command: str) -> str:
+        if command == "list":
+            return "There are 2 of a max of 20 players online: Alex, Steve"
+        if command == "datapack list enabled":
+            return "There are 2 data pack(s) enabled: [vanilla (built-in)], [file/mcvoice (world)]"
+        if command == "long":
+            return "x" * 5000
+        if command == "wide":
+            return "\u00e9" * 3000  # 6000 bytes in under 4096 characters
+        return f"ran {command}"
+    
+    async def _handle(self, reader, writer):
+        self.handlers.add(asyncio.current_task())
+        self.connections += 1
+        connection = self.connections
+        decoder = PacketDecoder()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            packets = decoder.feed(data)
+            self.max_packets_per_read = max(self.max_packets_per_read, len(packets))
+            if self.one_packet_per_read and len(packets) > 1:
+                writer.close()
+                return
+            for request_id, packet_type, body in packets:
+                if packet_type == SERVERDATA_AUTH:
+                    ok = body == self.password
+                    writer.write(encode_packet(request_id if ok else -1, SERVERDATA_AUTH_RESPONSE, ''))
+                elif packet_type == SERVERDATA_EXECCOMMAND:
+                    if self.drop_first and connection == 1:
+                        writer.close()
+                        return
+                    self.commands.append(body)
+                    reply = self._reply(body).encode('utf-8')
+                    for start in range(0, max(len(reply), 1), 4096):
+                        chunk = reply[start:start + 4096].decode('utf-8')
+                        writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, chunk))
+                else:
+                    writer.write(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, f"Unknown request {packet_type:x}"))
+            await writer.drain()
+        writer.close()
+
+
+class TestAsyncRCON:
+    """Test cases for AsyncRCON class."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the client and fake server."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    def _run(self, loop, scenario, password="secret", drop_first=False, one_packet_per_read=False):
+        """Run scenario(server, port) against a fresh fake server."""
+        async def main():
+            server = _FakeServer(password, drop_first, one_packet_per_read)
+            port = await server.start()
+            try:
+                return await scenario(server, port)
+            finally:
+                await server.stop()
+        return loop.run_until_complete(main())
+    
+    def test_decoder_handles_partial_and_merged_packets(self):
+        """Test that packets split across reads or sharing one read are decoded whole."""
+        data = encode_packet(7, SERVERDATA_EXECCOMMAND, "list") + encode_packet(8, 200, "")
+        decoder = PacketDecoder()
+        
+        assert decoder.feed(data[:5]) == []
+        assert decoder.feed(data[5:]) == [(7, SERVERDATA_EXECCOMMAND, "list"), (8, 200, "")]
+    
+    def test_pipelined_replies_matched_by_id(self, loop):
+        """Test that commands sent together get their own replies, including split ones."""
+        async def scenario(server, port):
+            client = AsyncRCON('127.0.0.1', port, "secret", pipeline=True)
+            replies = await client.commands(["say a", "long", "say b"])
+            await client.close()
+            return server, replies
+        
+        server, replies = self._run(loop, scenario)
+        
+        assert replies == ["ran say a", "x" * 5000, "ran say b"]
+        assert server.commands == ["say a", "long", "say b"]
+        assert server.max_packets_per_read > 1  # Sent without waiting for replies
+    
+    def test_without_pipelining_one_packet_at_a_time(self, loop):
+        """Test that pipeline=False never has two packets on the wire, yet reassembles split replies."""
+        async def scenario(server, port):
+            client = AsyncRCON('127.0.0.1', port, "secret", pipeline=False)
+            replies = await client.commands(["long", "say b"])
+            await client.close()
+            return server, replies
+        
+        server, replies = self._run(loop, scenario)
+        
+        assert replies == ["x" * 5000, "ran say b"]
+        assert server.max_packets_per_read == 1
+    
+    def test_reply_split_by_bytes_is_reassembled(self, loop):
+        """Test that a non-ASCII reply split at 4096 bytes (fewer characters) isn't cut short."""
+        async def scenario(server, port):
+            client = AsyncRCON('127.0.0.1', port, "secret", pipeline=False)
+            replies = await client.commands(["wide", "say b"])
+            await client.close()
+            return replies
+        
+        assert self._run(loop, scenario) == ["\u00e9" * 3000, "ran say b"]
+    
+    def test_pipelining_falls_back_to_serial_when_dropped(self, loop):
+        """Test that a server reading one packet at a time drops a pipelined batch only once."""
+        async def scenario(server, port):
+            client = AsyncRCON('127.0.0.1', port, "secret", pipeline=True)
+            with pytest.raises(RCONError):
+                await client.commands(["say a", "say b"])
+            pipeline = client.pipeline
+            replies = await client.commands(["say a", "long", "say b"])
+            await client.close()
+            return server, pipeline, replies
+        
+        server, pipeline, replies = self._run(loop, scenario, one_packet_per_read=True)
+        
+        assert pipeline is False
+        assert replies == ["ran say a", "x" * 5000, "ran say b"]
+    
+    def test_pool_retries_serially(self, loop):
+        """Test that a pipelined pool still gets every command through a one-packet-per-read server."""
+        async def scenario(server, port):
+            pool = AsyncRCONPool('127.0.0.1', port, "secret", size=2, pipeline=True)
+            replies = await pool.commands([f"say {i}" for i in range(4)])
+            pipelining = [connection.pipeline for connection in pool.connections]
+            await pool.close()
+            return server, replies, pipelining
+        
+        server, replies, pipelining = self._run(loop, scenario, one_packet_per_read=True)
+        
+        assert replies == [f"ran say {i}" for i in range(4)]
+        assert pipelining == [False, False]
+    
+    def test_wrong_password_raises(self, loop):
+        """Test that a refused login raises RCONError."""
+        async def scenario(server, port):
+            client = AsyncRCON('127.0.0.1', port, "wrong")
+            with pytest.raises(RCONError):
+                await client.command("list")
+        
+        self._run(loop, scenario)
+    
+    def test_replace_many_async_pipelines_every_fill(self, loop):
+        """Test that MinecraftRCON's async batch sends every fill for every player and block."""
+        async def scenario(server, port):
+            rcon = MinecraftRCON('127.0.0.1', port, "secret")
+            results = await rcon.replace_many_in_chunk_around_all_players_async(
+                ["minecraft:stone", "minecraft:dirt"], world_min_y=-64, world_max_y=320,
+            )
+            await rcon.close_async()
+            return server, results
+        
+        server, results = self._run(loop, scenario)
+        
+        assert results == {
+            "minecraft:stone": {"Alex": True, "Steve": True},
+            "minecraft:dirt": {"Alex": True, "Steve": True},
+        }
+        # One player list, then 2 blocks x 2 players x 4 Y-segments
+        assert server.commands[0] == "list"
+        assert len(server.commands) == 1 + 16
+    
+    def test_say_async_uses_the_pool(self, loop):
+        """Test that feedback messages go through the asyncio pool, not mcrcon."""
+        async def scenario(server, port):
+            rcon = MinecraftRCON('127.0.0.1', port, "secret")
+            said = await rcon.say_async('Clearing "stone"...')
+            await rcon.close_async()
+            return server, said, rcon
+        
+        server, said, rcon = self._run(loop, scenario)
+        
+        assert said is True
+        assert server.commands == ['say "Clearing \\"stone\\"..."']
+        assert rcon.connected is False
+    
+    def test_replace_many_async_reports_pool_failure(self, loop):
+        """Test that an unreachable server yields None so the caller can fall back to the sync client."""
+        async def scenario(server, port):
+            await server.stop()  # Nothing listens on the port any more
+            rcon = MinecraftRCON('127.0.0.1', port, "secret")
+            results = await rcon.replace_many_in_chunk_around_all_players_async(["minecraft:stone"])
+            await rcon.close_async()
+            return results
+        
+        assert self._run(loop, scenario) is None
+    
+    def test_pool_spreads_commands_over_connections(self, loop):
+        """Test that a batch is split across the pool and replies come back in order."""
+        async def scenario(server, port):
+            pool = AsyncRCONPool('127.0.0.1', port, "secret", size=3)
+            replies = await pool.commands([f"say {i}" for i in range(7)])
+            connected = pool.connected
+            await pool.close()
+            return server, replies, connected
+        
+        server, replies, connected = self._run(loop, scenario)
+        
+        assert replies == [f"ran say {i}" for i in range(7)]
+        assert server.connections == 3
+        assert connected == 3
+    
+    def test_pool_reconnects_a_failed_connection(self, loop):
+        """Test that a dropped connection is reopened and its commands retried."""
+        async def scenario(server, port):
+            pool = AsyncRCONPool('127.0.0.1', port, "secret", size=2)
+            replies = await pool.commands(["say a", "say b"])
+            await pool.close()
+            return server, replies, pool
+        
+        server, replies, pool = self._run(loop, scenario, drop_first=True)
+        
+        assert replies == ["ran say a", "ran say b"]
+        assert pool.reconnects == 1
+    
+    def test_reload_datapack_async(self, loop):
+        """Test that a datapack reload runs reload, enable and a check, in order."""
+        async def scenario(server, port):
+            rcon = MinecraftRCON('127.0.0.1', port, "secret")
+            loaded = await rcon.reload_datapack_async("mcvoice")
+            missing = await rcon.reload_datapack_async("other")
+            await rcon.close_async()
+            return server, loaded, missing
+        
+        server, loaded, missing = self._run(loop, scenario)
+        
+        assert loaded is True
+        assert missing is False
+        assert server.commands[:3] == ["reload", 'datapack enable "file/mcvoice"', "datapack list enabled"]
@@ -0,0 +1,239 @@
+"""Tests for audio buffering helpers."""
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.audio import (
+    DiscordPcmConverter,
+    GATE_FRAME_SAMPLES,
+    SpeakerRingBuffer,
+    SpeechGate,
+    UtteranceSegmenter,
+)
+
+
+class TestSpeakerRingBuffer:
+    """Test cases for SpeakerRingBuffer class."""
+    
+    @pytest.fixture
+    def ring(self):
+        """Create a small ring buffer for testing."""
+        return SpeakerRingBuffer(8, dtype=np.int16)
+    
+    def test_write_and_peek(self, ring):
+        """Test that written samples come back in order."""
+        ring.write(np.arange(5, dtype=np.int16))
+        
+        assert len(ring) == 5
+        assert ring.peek(5).tolist() == [0, 1, 2, 3, 4]
+    
+    def test_consume(self, ring):
+        """Test consuming samples from the front of the ring."""
+        ring.write(np.arange(5, dtype=np.int16))
+        ring.consume(3)
+        
+        assert len(ring) == 2
+        assert ring.peek(10).tolist() == [3, 4]
+    
+    def test_wrapped_window_is_contiguous_view(self, ring):
+        """Test that a window crossing the end of the ring is still a zero-copy view."""
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.consume(6)
+        ring.write(np.arange(10, 16, dtype=np.int16))  # Wraps around the end
+        
+        window = ring.peek(6)
+        
+        assert window.tolist() == [10, 11, 12, 13, 14, 15]
+        assert np.shares_memory(window, ring._data)
+    
+    def test_overflow_drops_oldest(self, ring):
+        """Test that writing past capacity drops the oldest samples."""
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.write(np.arange(6, 11, dtype=np.int16))
+        
+        assert len(ring) == 8
+        assert ring.peek(8).tolist() == [3, 4, 5, 6, 7, 8, 9, 10]
+        assert ring.dropped_samples == 3
+    
+    def test_write_larger_than_capacity(self, ring):
+        """Test that a single oversized write keeps only the newest samples."""
+        ring.write(np.arange(12, dtype=np.int16))
+        
+        assert ring.peek(8).tolist() == list(range(4, 12))
+    
+    def test_peek_latest(self, ring):
+        """Test that the newest samples are returned without consuming them."""
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.consume(2)
+        
+        assert ring.peek_latest(3).tolist() == [3, 4, 5]
+        assert ring.peek_latest(10).tolist() == [2, 3, 4, 5]
+        assert len(ring) == 4
+    
+    def test_clear(self, ring):
+        """Test clearing the ring."""
+        ring.write(np.arange(5, dtype=np.int16))
+        ring.clear()
+        
+        assert len(ring) == 0
+        assert ring.peek(5).tolist() == []
+
+
+
+def _stereo_tone(freq_hz: float, seconds: float = 1.0, amplitude: int = 16000) -> np.ndarray:
+    """Interleaved int16 48kHz stereo sine tone."""
+    t = np.arange(int(48000 * seconds)) / 48000
+    mono = (np.sin(2 * np.pi * freq_hz * t) * amplitude).astype(np.int16)
+    return np.repeat(mono, 2)
+
+
+def _convert_in_packets(converter, pcm: np.ndarray, packet_samples: int = 1920) -> np.ndarray:
+    """Feed PCM through the converter in 20ms packets and join the output."""
+    parts = [
+        converter.process(pcm[i:i + packet_samples].tobytes()).copy()
+        for i in range(0, len(pcm), packet_samples)
+    ]
+    return np.concatenate(parts)
+
+
+class TestDiscordPcmConverter:
+    """Test cases for DiscordPcmConverter class."""
+    
+    def test_output_rate_and_dtype(self):
+        """Test that 1s of 48kHz stereo becomes 1s of 16kHz mono float32."""
+        out = _convert_in_packets(DiscordPcmConverter(), _stereo_tone(1000))
+        
+        assert out.dtype == np.float32
+        assert len(out) == 16000
+    
+    def test_passband_tone_preserved(self):
+        """Test that speech-band content keeps its level."""
+        out = _convert_in_packets(DiscordPcmConverter(), _stereo_tone(1000))
+        rms = np.sqrt(np.mean(out[200:] ** 2))
+        
+        assert rms == pytest.approx(16000 / 32768 / np.sqrt(2), rel=0.02)
+    
+    def test_high_frequency_does_not_alias(self):
+        """Test that content above the 8kHz output Nyquist is filtered out."""
+        out = _convert_in_packets(DiscordPcmConverter(), _stereo_tone(12000))
+        rms = np.sqrt(np.mean(out[200:] ** 2))
+        
+        assert rms < 1e-3
+    
+    def test_packet_boundaries_are_seamless(self):
+        """Test that filter state carries over so odd packet sizes match one-shot conversion."""
+        pcm = _stereo_tone(440, seconds=0.5)
+        one_shot = DiscordPcmConverter().process(pcm.tobytes()).copy()
+        chunked = _convert_in_packets(DiscordPcmConverter(), pcm, packet_samples=1000)
+        
+        assert len(chunked) == len(one_shot)
+        np.testing.assert_allclose(chunked, one_shot, atol=1e-6)
+    
+    def test_gain_and_clipping(self):
+        """Test that gain is applied and the output is clipped to [-1, 1]."""
+        out = _convert_in_packets(DiscordPcmConverter(gain=10.0), _stereo_tone(1000, amplitude=30000))
+        
+        assert out.max() <= 1.0
+        assert out.min() >= -1.0
+        assert out.max() == pytest.approx(1.0)
+    
+    def test_preallocated_output(self):
+        """Test writing into a caller-provided buffer."""
+        converter = DiscordPcmConverter()
+        out = np.zeros(converter.max_output(960), dtype=np.float32)
+        
+        result = converter.process(_stereo_tone(1000, seconds=0.02).tobytes(), out=out)
+        
+        assert np.shares_memory(result, out)
+
+
+class TestSpeechGate:
+    """Test cases for SpeechGate class."""
+    
+    @staticmethod
+    def _noise(seconds: float, level: float, seed: int = 0) -> np.ndarray:
+        """16kHz float32 white noise at a given RMS level."""
+        rng = np.random.default_rng(seed)
+        return (rng.standard_normal(int(16000 * seconds)) * level).astype(np.float32)
+    
+    def test_digital_silence_is_not_speech(self):
+        """Test that all-zero frames never count as speech."""
+        gate = SpeechGate()
+        
+        assert gate.process(np.zeros(16000, dtype=np.float32)) == 0
+    
+    def test_loud_frames_after_quiet_background(self):
+        """Test that frames well above the noise floor count as speech."""
+        gate = SpeechGate()
+        gate.process(self._noise(1.0, 0.001))
+        
+        speech = gate.process(self._noise(0.2, 0.1, seed=1))
+        
+        assert speech == 10  # 200ms = 10 frames of 20ms
+    
+    def test_steady_background_noise_is_gated(self):
+        """Test that constant noise above the absolute floor is learned as background."""
+        gate = SpeechGate(threshold_db=-50.0)
+        gate.process(self._noise(1.0, 0.01))  # ~-40dBFS
+        
+        assert gate.process(self._noise(1.0, 0.01, seed=1)) == 0
+    
+    def test_partial_frames_are_carried_over(self):
+        """Test that samples split across calls are classified as whole frames."""
+        gate = SpeechGate()
+        loud = self._noise(0.02, 0.1)
+        half = GATE_FRAME_SAMPLES // 2
+        
+        assert gate.process(loud[:half]) == 0
+        assert gate.process(loud[half:]) == 1
+
+
+class TestUtteranceSegmenter:
+    """Test cases for UtteranceSegmenter class."""
+    
+    @pytest.fixture
+    def segmenter(self):
+        """Create a segmenter: 40ms to open, 100ms silence to close, 200ms max."""
+        return UtteranceSegmenter(trailing_silence_ms=100, max_ms=200, min_speech_ms=40)
+    
+    @staticmethod
+    def _push_all(segmenter, decisions):
+        """Feed decisions and return the non-None events with their frame index."""
+        events = []
+        for i, is_speech in enumerate(decisions):
+            event = segmenter.push(is_speech)
+            if event:
+                events.append((i, event))
+        return events
+    
+    def test_utterance_opens_and_closes(self, segmenter):
+        """Test a short utterance followed by trailing silence."""
+        events = self._push_all(segmenter, [False] * 3 + [True] * 4 + [False] * 5)
+        
+        assert events == [(4, UtteranceSegmenter.START), (11, UtteranceSegmenter.END)]
+        assert segmenter.in_utterance is False
+    
+    def test_single_blip_does_not_open(self, segmenter):
+        """Test that speech shorter than min_speech_ms is ignored."""
+        events = self._push_all(segmenter, [True, False] * 5)
+        
+        assert events == []
+    
+    def test_short_pause_does_not_close(self, segmenter):
+        """Test that a pause shorter than the trailing silence keeps the utterance open."""
+        events = self._push_all(segmenter, [True] * 2 + [False] * 3 + [True] * 2)
+        
+        assert events == [(1, UtteranceSegmenter.START)]
+        assert segmenter.in_utterance is True
+    
+    def test_long_speech_is_split(self, segmenter):
+        """Test that continuous speech is split at the max length."""
+        events = self._push_all(segmenter, [True] * 12)
+        
+        assert events == [(1, UtteranceSegmenter.START), (9, UtteranceSegmenter.SPLIT)]
+        assert segmenter.in_utterance is True
@@ -0,0 +1,143 @@
+"""Tests for block word detection."""
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.block_detector import BlockDetector
+from src.config import Config
+
+
+class TestBlockDetector:
+    """Test cases for BlockDetector class."""
+    
+    @pytest.fixture
+    def detector(self, tmp_path):
+        """Create a detector over a small vocabulary."""
+        words_file = tmp_path / "block_words.json"
+        words_file.write_text(json.dumps({
+            "stone": "minecraft:stone",
+            "diamond": "minecraft:diamond_ore",
+            "diamond block": "minecraft:diamond_block",
+            "sand": "minecraft:sand",
+            "Red Sand": "minecraft:red_sand",
+        }))
+        return BlockDetector(words_file)
+    
+    def test_whole_words_only(self, detector):
+        """Test that block words inside other words don't match."""
+        assert detector.find_block_word("sandstone everywhere") is None
+        assert detector.find_block_word("Stone!") == "stone"
+    
+    def test_longest_phrase_wins(self, detector):
+        """Test that the longest block word is preferred over a shorter one."""
+        assert detector.find_block_word("a diamond block please") == "diamond block"
+        assert detector.find_block_word("stone then diamond block") == "diamond block"
+        assert detector.find_block_word("some red sand") == "Red Sand"
+    
+    def test_add_and_remove_recompile(self, detector):
+        """Test that adding or removing a word takes effect immediately."""
+        assert detector.find_block_word("gold block") is None
+        
+        detector.add_block_word("Gold Block", "minecraft:gold_block")
+        assert detector.find_block_word("the gold block") == "gold block"
+        
+        detector.remove_block_word("stone")
+        assert detector.find_block_word("stone") is None
+    
+    def test_detect_block_result(self, detector):
+        """Test that detect_block reports the matched word and block ID."""
+        result = detector.detect_block("Diamond block, please", user_id=42)
+        
+        assert result['matched_word'] == "diamond block"
+        assert result['block_id'] == "minecraft:diamond_block"
+        assert result['user_id'] == 42
+        assert detector.detect_block("nothing here") is None
+    
+    def test_detect_blocks_finds_every_match(self, detector):
+        """Test that every block word is returned in spoken order."""
+        results = detector.detect_blocks("stone and diamond block and sand")
+        
+        assert [r['matched_word'] for r in results] == ["stone", "diamond block", "sand"]
+        assert [r['span'] for r in results] == [(0, 5), (10, 23), (28, 32)]
+    
+    def test_detect_blocks_skips_overlaps(self, detector):
+        """Test that a longer phrase isn't also reported as its shorter parts."""
+        results = detector.detect_blocks("Red sand, please")
+        
+        assert [r['block_id'] for r in results] == ["minecraft:red_sand"]
+        assert detector.detect_blocks("nothing here") == []
+    
+    @pytest.fixture
+    def fuzzy_detector(self, tmp_path, monkeypatch):
+        """Create a detector with the opt-in fuzzy fallback enabled."""
+        monkeypatch.setattr(Config, 'BLOCK_FUZZY_MATCHING', True, raising=False)
+        words_file = tmp_path / "block_words.json"
+        words_file.write_text(json.dumps({
+            "stone": "minecraft:stone",
+            "cobblestone": "minecraft:cobblestone",
+            "obsidian": "minecraft:obsidian",
+            "gravel": "minecraft:gravel",
+            "grass": "minecraft:grass_block",
+            "glass": "minecraft:glass",
+            "nether": "minecraft:netherrack",
+            "water": "minecraft:water",
+            "bricks": "minecraft:bricks",
+        }))
+        return BlockDetector(words_file)
+    
+    def test_fuzzy_matching_is_opt_in(self, detector):
+        """Test that near misses don't match unless fuzzy matching is enabled."""
+        detector.add_block_word("obsidian", "minecraft:obsidian")
+        
+        assert detector.find_block_word("dig the obsidean") is None
+    
+    def test_fuzzy_fallback_matches_near_misses(self, fuzzy_detector):
+        """Test that misheard block words still match, without swallowing exact ones."""
+        assert fuzzy_detector.find_block_word("dig the obsidean") == "obsidian"
+        assert fuzzy_detector.find_block_word("cobble stone please") == "cobblestone"
+        results = fuzzy_detector.detect_blocks("stone and kobblestone")
+        assert [r['matched_word'] for r in results] == ["stone", "cobblestone"]
+        assert fuzzy_detector.find_block_word("stand here") is None
+    
+    @pytest.mark.parametrize("text", [
+        "of course", "cross", "class", "neither", "waiter", "wider",
+        "breaks", "brakes", "stain", "gravle", "the weather is nice",
+    ])
+    def test_fuzzy_fallback_ignores_everyday_words(self, fuzzy_detector, text):
+        """Test that ordinary chat near short block words never triggers a clear."""
+        assert fuzzy_detector.detect_blocks(text) == []
+        assert fuzzy_detector.find_block_word(text) is None
+    
+    def test_reload_if_changed_swaps_words(self, detector, tmp_path):
+        """Test that edits to the file are picked up and a bad file keeps the current words."""
+        assert detector.reload_if_changed() is False
+        
+        words_file = tmp_path / "block_words.json"
+        words_file.write_text(json.dumps({"gravel": "minecraft:gravel", "stone block": "minecraft:stone"}))
+        assert detector.reload_if_changed() is True
+        assert detector.find_block_word("some gravel") == "gravel"
+        assert detector.find_block_word("diamond") is None
+        
+        words_file.write_text("{not json")
+        assert detector.reload_if_changed() is False
+        assert detector.find_block_word("some gravel") == "gravel"
+    
+    def test_add_block_word_updates_file_signature(self, detector):
+        """Test that the detector's own writes aren't reloaded again by the watcher."""
+        detector.add_block_word("gravel", "minecraft:gravel")
+        
+        assert detector.reload_if_changed() is False
+        assert json.loads(detector.block_words_file.read_text())["gravel"] == "minecraft:gravel"
+    
+    def test_spoken_radius(self, detector):
+        """Test that digits and number words next to a radius word set the radius."""
+        assert detector.detect_block("stone within five blocks")['spoken_radius'] == 5
+        assert detector.detect_block("sand radius of 4")['spoken_radius'] == 4
+        assert detector.detect_block("clear stone in 20 blocks")['spoken_radius'] == 10  # Clamped to MAX_RADIUS
+        # A number on its own isn't a radius
+        assert detector.detect_block("i found 2 diamond")['spoken_radius'] is None
@@ -0,0 +1,73 @@
+"""Tests for the generated block tag datapack."""
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.datapack import DatapackManager, block_tags, clear_function, tag_name
+
+ORES = ["minecraft:iron_ore", "minecraft:gold_ore", "minecraft:diamond_ore"]
+
+
+class TestDatapack:
+    """Test cases for datapack generation and DatapackManager."""
+    
+    @pytest.fixture
+    def manager(self, tmp_path):
+        """Create a manager writing into a temporary datapacks folder."""
+        return DatapackManager(tmp_path / "datapacks", pack_format=48)
+    
+    def test_tags_only_for_multi_block_words(self):
+        """Test that words naming one block don't get a tag."""
+        tags = block_tags({"ore": ORES, "sand": "minecraft:sand", "nether brick": ["a:b", "c:d"]})
+        
+        assert tags == {"ore": ORES, "nether_brick": ["a:b", "c:d"]}
+        assert tag_name("Red Sand!") == "red_sand"
+    
+    def test_write_replaces_previous_pack(self, manager, tmp_path):
+        """Test that the pack is written for both tag folder names and stale tags disappear."""
+        manager.write({"ore": ORES, "wood": ["#minecraft:logs", "#minecraft:planks"]})
+        manager.write({"ore": ORES})
+        
+        pack = tmp_path / "datapacks" / "mcvoice"
+        assert json.loads((pack / "pack.mcmeta").read_text())["pack"]["pack_format"] == 48
+        for folder in ("block", "blocks"):
+            tag = json.loads((pack / "data" / "mcvoice" / "tags" / folder / "ore.json").read_text())
+            assert tag["values"] == ORES
+        assert not (pack / "data" / "mcvoice" / "tags" / "block" / "wood.json").exists()
+    
+    def test_resolve_uses_tag_only_once_installed(self, manager):
+        """Test that clears fall back to block IDs until the server has the matching tag."""
+        tags = manager.write({"ore": ORES})
+        assert manager.resolve("ore", ORES) == ORES
+        
+        manager.mark_installed(tags)
+        assert manager.resolve("ore", ORES) == ["#mcvoice:ore"]
+        assert manager.resolve("ore", ORES + ["minecraft:coal_ore"]) == ORES + ["minecraft:coal_ore"]
+        assert manager.resolve("sand", "minecraft:sand") == ["minecraft:sand"]
+    
+    def test_clear_function_covers_world_height(self):
+        """Test that a macro function fills every segment around every player at the given radius."""
+        source = clear_function("#mcvoice:ore", -64, 320, max_radius=10, macro=True)
+        fills = [line for line in source.splitlines() if not line.startswith('#')]
+        
+        # 21x21 columns at radius 10 allow 74 layers per fill: 385 layers need 6
+        assert len(fills) == 6
+        assert fills[0] == "$execute as @a at @s run fill ~-$(r) -64 ~-$(r) ~$(r) 9 ~$(r) minecraft:air replace #mcvoice:ore"
+        assert fills[-1].endswith("~-$(r) 306 ~-$(r) ~$(r) 320 ~$(r) minecraft:air replace #mcvoice:ore")
+    
+    def test_function_command_once_installed(self, manager, tmp_path):
+        """Test that clears call the word's function only after the server loaded it."""
+        contents = manager.write({"ore": ORES, "sand": "minecraft:sand"})
+        function_dir = tmp_path / "datapacks" / "mcvoice" / "data" / "mcvoice" / "function" / "clear"
+        assert sorted(p.name for p in function_dir.iterdir()) == ["ore.mcfunction", "sand.mcfunction"]
+        assert manager.function_command("sand", "minecraft:sand", 8) is None
+        
+        manager.mark_installed(contents)
+        assert manager.function_command("ore", ORES, 5) == "function mcvoice:clear/ore {r:5}"
+        assert manager.function_command("sand", "minecraft:sand", 8) == "function mcvoice:clear/sand {r:8}"
+        assert manager.function_command("ore", ORES[:1], 5) is None
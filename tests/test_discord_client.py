@@ -0,0 +1,252 @@
+"""Tests for the voice capture sink, packet batches and batch consumer."""
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.discord_client import (
+    AudioPacketBatch,
+    AudioQueueSink,
+    BATCH_MAX_PACKETS,
+    FRAME_BYTES,
+    HANDOFF_INTERVAL,
+    VoiceClient,
+)
+
+
+def _voice_data(pcm: bytes, ssrc: int = 1234, timestamp: int = 960):
+    """Create a mock VoiceData carrying decoded PCM."""
+    data = Mock()
+    data.pcm = pcm
+    data.packet = Mock(ssrc=ssrc, timestamp=timestamp)
+    return data
+
+
+class TestAudioPacketBatch:
+    """Test cases for AudioPacketBatch class."""
+    
+    def test_append_and_iterate(self):
+        """Test that frames come back with their metadata and PCM."""
+        batch = AudioPacketBatch(max_packets=4, frame_bytes=4)
+        batch.append(1, 100, b'\x01\x00\x02\x00', 960)
+        batch.append(None, None, b'\x03\x00\x04\x00', None)
+        
+        packets = list(batch)
+        
+        assert len(batch) == 2
+        assert packets[0].ssrc == 1
+        assert packets[0].user_id == 100
+        assert packets[0].timestamp == 960
+        assert bytes(packets[0].audio) == b'\x01\x00\x02\x00'
+        assert packets[1].ssrc is None
+        assert packets[1].user_id is None
+        assert bytes(packets[1].audio) == b'\x03\x00\x04\x00'
+    
+    def test_append_when_full(self):
+        """Test that a full batch rejects new frames."""
+        batch = AudioPacketBatch(max_packets=1, frame_bytes=4)
+        
+        assert batch.append(1, 100, b'\x00' * 4, None) is True
+        assert batch.append(1, 100, b'\x00' * 4, None) is False
+        assert len(batch) == 1
+    
+    def test_clear_keeps_buffer(self):
+        """Test that clearing empties the batch without reallocating PCM storage."""
+        batch = AudioPacketBatch(max_packets=2, frame_bytes=4)
+        batch.append(1, 100, b'\x00' * 4, None)
+        pcm = batch.pcm
+        
+        batch.clear()
+        
+        assert len(batch) == 0
+        assert batch.pcm is pcm
+
+
+class TestAudioQueueSink:
+    """Test cases for AudioQueueSink class."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the sink to hand frames to."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @pytest.fixture
+    def queue(self):
+        """Create an audio queue."""
+        return asyncio.Queue(maxsize=2)
+    
+    @pytest.fixture
+    def sink(self, queue, loop):
+        """Create a capturing sink."""
+        return AudioQueueSink(queue, [True], loop)
+    
+    @staticmethod
+    def _run_loop(loop):
+        """Let scheduled handoffs run."""
+        loop.run_until_complete(asyncio.sleep(HANDOFF_INTERVAL * 3))
+    
+    def test_write_publishes_when_consumer_idle(self, sink, queue, loop):
+        """Test that a frame reaches the queue after the handoff interval."""
+        user = Mock(id=42)
+        sink.write(user, _voice_data(b'\x00' * FRAME_BYTES))
+        
+        assert queue.empty()  # Nothing touches the queue from the writer side
+        self._run_loop(loop)
+        
+        batch = queue.get_nowait()
+        packet = next(iter(batch))
+        assert packet.user_id == 42
+        assert packet.ssrc == 1234
+    
+    def test_write_from_reader_thread(self, sink, queue, loop):
+        """Test that frames written on another thread are coalesced into one batch."""
+        user = Mock(id=42)
+        writer = threading.Thread(
+            target=lambda: [sink.write(user, _voice_data(b'\x00' * FRAME_BYTES)) for _ in range(5)]
+        )
+        writer.start()
+        writer.join()
+        self._run_loop(loop)
+        
+        assert queue.qsize() == 1
+        assert len(queue.get_nowait()) == 5
+    
+    def test_write_batches_while_consumer_busy(self, sink, queue, loop):
+        """Test that frames stay pending while the queue is non-empty."""
+        user = Mock(id=42)
+        sink.write(user, _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        for _ in range(3):
+            sink.write(user, _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        
+        assert queue.qsize() == 1
+        pending = sink.take_pending()
+        assert [len(batch) for batch in pending] == [3]
+        assert sink.take_pending() == []
+    
+    def test_take_pending_keeps_frame_order(self, sink, queue, loop):
+        """Test that full batches awaiting a flush come back before newer frames."""
+        user = Mock(id=42)
+        total = BATCH_MAX_PACKETS * 2 + 3
+        for i in range(total):
+            sink.write(user, _voice_data(b'\x00' * FRAME_BYTES, timestamp=i))
+        
+        pending = sink.take_pending()
+        self._run_loop(loop)  # The scheduled flush finds nothing left to deliver
+        
+        assert [len(batch) for batch in pending] == [BATCH_MAX_PACKETS, BATCH_MAX_PACKETS, 3]
+        timestamps = [packet.timestamp for batch in pending for packet in batch]
+        assert timestamps == list(range(total))
+        assert queue.empty()
+    
+    def test_full_batch_is_published(self, sink, queue, loop):
+        """Test that a full batch is queued even while the consumer is busy."""
+        user = Mock(id=42)
+        sink.write(user, _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        for _ in range(BATCH_MAX_PACKETS):
+            sink.write(user, _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        
+        assert queue.qsize() == 2
+    
+    def test_write_ignored_when_not_capturing(self, queue, loop):
+        """Test that nothing is queued when capture is off."""
+        sink = AudioQueueSink(queue, [False], loop)
+        sink.write(Mock(id=42), _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        
+        assert queue.empty()
+    
+    def test_release_recycles_batch(self, sink, queue, loop):
+        """Test that released batches are reused."""
+        sink.write(Mock(id=42), _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        batch = queue.get_nowait()
+        
+        sink.release(batch)
+        sink.write(Mock(id=42), _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        queue.get_nowait()  # Filled from the batch that was pending at release time
+        sink.write(Mock(id=42), _voice_data(b'\x00' * FRAME_BYTES))
+        self._run_loop(loop)
+        
+        assert queue.get_nowait() is batch
+
+
+class TestVoiceClient:
+    """Test cases for VoiceClient's consumer side."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the sink and the consumer."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @staticmethod
+    def _client(loop, maxsize=16):
+        """Create a capturing VoiceClient with a sink but no voice connection."""
+        client = VoiceClient.__new__(VoiceClient)
+        client.audio_queue = asyncio.Queue(maxsize=maxsize)
+        client.is_capturing = [True]
+        client._sink = AudioQueueSink(client.audio_queue, client.is_capturing, loop)
+        return client
+    
+    def test_burst_then_silence_delivers_every_frame(self, loop):
+        """Test that a burst of more than max_batches batches followed by silence isn't left in the sink."""
+        client = self._client(loop)
+        user = Mock(id=42)
+        total = BATCH_MAX_PACKETS * 3 + 2
+        for i in range(total):
+            client._sink.write(user, _voice_data(b'\x00' * FRAME_BYTES, timestamp=i))
+        loop.run_until_complete(asyncio.sleep(HANDOFF_INTERVAL * 3))  # Full batches queued, tail kept
+        
+        # Silence from here on: no write() will ever schedule another flush
+        batches = loop.run_until_complete(asyncio.wait_for(client.get_audio_batches(max_batches=3), 1.0))
+        
+        timestamps = [packet.timestamp for batch in batches for packet in batch]
+        assert timestamps == list(range(total))
+        assert client.audio_queue.empty()
+    
+    def test_returns_queued_batches_in_order(self, loop):
+        """Test that one call returns every queued batch, oldest first."""
+        client = self._client(loop)
+        queued = []
+        for i in range(3):
+            batch = AudioPacketBatch()
+            batch.append(1234, 42, b'\x00' * FRAME_BYTES, i)
+            client.audio_queue.put_nowait(batch)
+            queued.append(batch)
+        
+        batches = loop.run_until_complete(client.get_audio_batches())
+        
+        assert batches == queued
+        assert client.audio_queue.empty()
+    
+    def test_stop_capturing_wakes_consumer(self, loop):
+        """Test that a consumer blocked on a silent channel returns once capture stops."""
+        client = self._client(loop)
+        client.is_listening = lambda: False
+        
+        async def scenario():
+            consumer = asyncio.ensure_future(client.get_audio_batches())
+            await asyncio.sleep(HANDOFF_INTERVAL)
+            blocked = not consumer.done()
+            client.stop_capturing()
+            return blocked, await asyncio.wait_for(consumer, 1.0)
+        
+        blocked, batches = loop.run_until_complete(scenario())
+        
+        assert blocked
+        assert batches == []
+        assert client.is_capturing_flag is False
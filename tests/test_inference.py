@@ -0,0 +1,233 @@
+"""Tests for the inference scheduler."""
+import asyncio
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.inference import InferenceScheduler
+
+
+class _Decoder:
+    """Fake decoder that blocks until released and records each call."""
+    
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+    
+    async def __call__(self, audio, beam_size):
+        self.calls.append((len(audio), beam_size))
+        await self.release.wait()
+        return f"{len(audio)} samples"
+
+
+def _collector(results, name):
+    """Result handler that records (name, text)."""
+    async def on_result(text):
+        results.append((name, text))
+    return on_result
+
+
+class TestInferenceScheduler:
+    """Test cases for InferenceScheduler class."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the scheduler's workers."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @staticmethod
+    def _run(loop, coro):
+        """Run a coroutine and let pending callbacks settle."""
+        async def body():
+            result = await coro
+            for _ in range(5):
+                await asyncio.sleep(0)
+            return result
+        return loop.run_until_complete(body())
+    
+    def test_results_are_delivered(self, loop):
+        """Test that a submitted window is decoded and handed back."""
+        decoder = _Decoder()
+        decoder.release.set()
+        scheduler = InferenceScheduler(decoder, workers=1)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('a', np.zeros(100, dtype=np.float32), _collector(results, 'a'))
+            await asyncio.sleep(0.01)
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert results == [('a', '100 samples')]
+        assert scheduler.completed == 1
+    
+    def test_speaker_windows_are_merged(self, loop):
+        """Test that audio beyond the per-speaker cap joins the speaker's waiting window."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1, max_pending_per_speaker=1)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('busy', np.zeros(10, dtype=np.float32), _collector(results, 'busy'))
+            await asyncio.sleep(0)  # Worker picks up the first job and blocks
+            scheduler.submit('a', np.zeros(100, dtype=np.float32), _collector(results, 'first'))
+            scheduler.submit('a', np.zeros(50, dtype=np.float32), _collector(results, 'second'))
+            assert scheduler.queue_depth == 1
+            decoder.release.set()
+            await asyncio.sleep(0.01)
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert scheduler.merged == 1
+        assert ('first', None) in results
+        assert ('second', '150 samples') in results
+    
+    def test_full_queue_drops_oldest(self, loop):
+        """Test that the queue never grows past max_queue."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1, max_queue=2)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('busy', np.zeros(10, dtype=np.float32), _collector(results, 'busy'))
+            await asyncio.sleep(0)
+            for name in ('a', 'b', 'c'):
+                scheduler.submit(name, np.zeros(10, dtype=np.float32), _collector(results, name))
+            assert scheduler.queue_depth == 2
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert scheduler.dropped_full == 1
+        assert results[0] == ('a', None)
+    
+    def test_rejection_callbacks_are_kept_and_logged(self, loop, caplog):
+        """Test that rejection callbacks stay referenced until done and their errors are logged."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1, max_queue=1)
+        
+        async def failing(text):
+            raise RuntimeError("callback failed")
+        
+        async def scenario():
+            scheduler.submit('busy', np.zeros(10, dtype=np.float32), failing)
+            await asyncio.sleep(0)
+            scheduler.submit('a', np.zeros(10, dtype=np.float32), failing)
+            scheduler.submit('b', np.zeros(10, dtype=np.float32), failing)
+            pending = len(scheduler._callbacks)
+            await scheduler.stop()
+            return pending
+        
+        pending = self._run(loop, scenario())
+        
+        assert pending == 1
+        assert scheduler._callbacks == set()
+        assert "callback failed" in caplog.text
+    
+    def test_stale_jobs_are_dropped(self, loop):
+        """Test that jobs that waited past the deadline are never decoded."""
+        decoder = _Decoder()
+        decoder.release.set()
+        scheduler = InferenceScheduler(decoder, workers=1, deadline_seconds=0.0)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('a', np.zeros(10, dtype=np.float32), _collector(results, 'a'))
+            await asyncio.sleep(0.01)
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert decoder.calls == []
+        assert results == [('a', None)]
+        assert scheduler.dropped_stale == 1
+    
+    def test_overload_degrades_beam(self, loop):
+        """Test that a backed-up queue switches to the degraded beam size."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1, degrade_depth=2, degraded_beam_size=1)
+        
+        async def scenario():
+            for name in ('a', 'b', 'c'):
+                scheduler.submit(name, np.zeros(10, dtype=np.float32), _collector([], name), beam_size=5)
+            decoder.release.set()
+            await asyncio.sleep(0.01)
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert [beam for _, beam in decoder.calls] == [1, 5, 5]
+        assert scheduler.degraded == 1
+    
+    def test_partial_rejected_while_speaker_waiting(self, loop):
+        """Test that a droppable job is refused when its speaker already has work queued."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('busy', np.zeros(10, dtype=np.float32), _collector(results, 'busy'))
+            await asyncio.sleep(0)
+            scheduler.submit('a', np.zeros(10, dtype=np.float32), _collector(results, 'final'))
+            accepted = scheduler.submit('a', np.zeros(10, dtype=np.float32), _collector(results, 'partial'), droppable=True)
+            await scheduler.stop()
+            return accepted
+        
+        assert self._run(loop, scenario()) is False
+        assert ('partial', None) in results
+    
+    def test_ready_windows_are_batched(self, loop):
+        """Test that windows from several speakers share one batch decode."""
+        decoder = _Decoder()
+        decoder.release.set()
+        batches = []
+        
+        async def decode_batch(windows, beam_size):
+            batches.append([len(w) for w in windows])
+            return [f"{len(w)} samples" for w in windows]
+        
+        scheduler = InferenceScheduler(
+            decoder, workers=1, decode_batch=decode_batch, max_batch=3, batch_window_ms=5
+        )
+        results = []
+        
+        async def scenario():
+            for name, size in (('a', 10), ('b', 20), ('c', 30), ('d', 40)):
+                scheduler.submit(name, np.zeros(size, dtype=np.float32), _collector(results, name))
+            await asyncio.sleep(0.05)
+            await scheduler.stop()
+        
+        self._run(loop, scenario())
+        
+        assert batches == [[10, 20, 30]]
+        assert decoder.calls == [(40, None)]  # Leftover window decoded alone
+        assert sorted(results) == [('a', '10 samples'), ('b', '20 samples'), ('c', '30 samples'), ('d', '40 samples')]
+        assert scheduler.batched_windows == 3
+    
+    def test_cancel_drops_only_given_keys(self, loop):
+        """Test that cancelling one set of speakers leaves others queued."""
+        decoder = _Decoder()
+        scheduler = InferenceScheduler(decoder, workers=1)
+        results = []
+        
+        async def scenario():
+            scheduler.submit('busy', np.zeros(10, dtype=np.float32), _collector(results, 'busy'))
+            await asyncio.sleep(0)
+            for name in ('a', 'b', 'c'):
+                scheduler.submit(name, np.zeros(10, dtype=np.float32), _collector(results, name))
+            dropped = scheduler.cancel({'a', 'c'})
+            assert scheduler.queue_depth == 1
+            await scheduler.stop()
+            return dropped
+        
+        assert self._run(loop, scenario()) == 2
+        assert ('a', None) in results and ('c', None) in results
@@ -0,0 +1,153 @@
+"""Tests for the keyword spotter's phrase trie and scoring."""
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from tokenizers import Tokenizer, models, pre_tokenizers, decoders
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.keyword_spotting import KeywordSpotter
+
+VOCAB = [
+    "<|endoftext|>", "<|startoftranscript|>", "<|notimestamps|>",
+    "stone", "Stone", "diamond", "Diamond", "ore", "Ore", "hello", ".", ",", "!", "?",
+]
+
+
+def _fake_model():
+    """Minimal stand-in for WhisperModel: a word-level tokenizer and a fixed prompt."""
+    tokenizer = Tokenizer(models.WordLevel({token: i for i, token in enumerate(VOCAB)}, unk_token="hello"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.decoder = decoders.WordPiece()
+    return SimpleNamespace(
+        hf_tokenizer=tokenizer,
+        model=SimpleNamespace(is_multilingual=False),
+        get_prompt=lambda tokenizer, previous_tokens, without_timestamps, **kwargs: [1, 2],
+    )
+
+
+class _Encoded(np.ndarray):
+    """Encoder output as the spotter sees it (array with a device)."""
+    
+    device = "cpu"
+
+
+class _Speaker:
+    """
+    Stub CTranslate2 Whisper that "hears" a fixed token sequence per window.
+    
+    Follows CTranslate2's generate semantics: the whole prompt is the start
+    sequence, generation stops at max_length (prompt included), and logits are
+    returned only for generated steps.
+    """
+    
+    def __init__(self, said):
+        self.said = said  # Window index -> token IDs the model hears
+        self.calls = []
+    
+    def feature_extractor(self, window):
+        return np.full((2, 3001), window[0], dtype=np.float32)
+    
+    def encode(self, features):
+        return np.ascontiguousarray(features[:, :, :1]).view(_Encoded)
+    
+    def generate(self, features, prompts, max_length, suppress_tokens, return_logits_vocab=False, **kwargs):
+        self.calls.append([list(prompt) for prompt in prompts])
+        suppressed = set(suppress_tokens)
+        results = []
+        for window, prompt in zip(np.asarray(features)[:, 0, 0], prompts):
+            said = [token for token in self.said[int(window)] if token not in suppressed] + [VOCAB.index("<|endoftext|>")]
+            sequence, logits = [], []
+            prefix = list(prompt[2:])
+            while len(prompt) + len(sequence) < max_length:
+                position = len(prefix) + len(sequence)
+                spoken = prefix + sequence == said[:position] and position < len(said)
+                step = _logits(VOCAB[said[position]]) if spoken else np.zeros(len(VOCAB), dtype=np.float32)
+                logits.append(step)
+                token = int(np.argmax(step))
+                if token == VOCAB.index("<|endoftext|>"):
+                    break
+                sequence.append(token)
+            results.append(SimpleNamespace(
+                sequences_ids=[sequence],
+                logits=[logits] if return_logits_vocab else None,
+                no_speech_prob=0.0,
+            ))
+        return results
+
+
+def _ids(*tokens):
+    """Token IDs for vocabulary entries."""
+    return [VOCAB.index(token) for token in tokens]
+
+
+def _logits(token: str, margin: float = 20.0) -> np.ndarray:
+    """Step logits that put almost all probability on one token."""
+    logits = np.zeros(len(VOCAB), dtype=np.float32)
+    logits[VOCAB.index(token)] = margin
+    return logits
+
+
+class TestKeywordSpotter:
+    """Test cases for KeywordSpotter class."""
+    
+    @pytest.fixture
+    def spotter(self):
+        """Create a spotter over a few block words."""
+        return KeywordSpotter(_fake_model(), ["stone", "diamond", "diamond ore"])
+    
+    def test_longest_phrase_wins(self, spotter):
+        """Test that the trie walk prefers the longest phrase spelled."""
+        assert spotter._longest_phrase(_ids("diamond", "ore", ".")) == ("diamond ore", _ids("diamond", "ore"))
+        assert spotter._longest_phrase(_ids("Diamond", "stone")) == ("diamond", _ids("Diamond"))
+    
+    def test_unknown_start_is_no_match(self, spotter):
+        """Test that output not starting with a phrase matches nothing."""
+        assert spotter._longest_phrase(_ids("ore", "stone")) == (None, [])
+    
+    def test_suppression_keeps_phrase_vocabulary(self, spotter):
+        """Test that only phrase tokens, punctuation and end-of-text survive the mask."""
+        allowed = set(range(len(VOCAB))) - set(spotter._suppress)
+        
+        assert allowed == set(_ids("<|endoftext|>", "stone", "Stone", "diamond", "Diamond", "ore", "Ore", ".", ",", "!", "?"))
+    
+    def test_confident_phrase(self, spotter):
+        """Test that a likely phrase followed by a word boundary scores near 1."""
+        steps = [_logits("diamond"), _logits("ore"), _logits(".")]
+        
+        assert spotter._confidence(steps, _ids("diamond", "ore")) == pytest.approx(1.0, abs=1e-3)
+    
+    def test_phrase_continuing_into_another_word(self, spotter):
+        """Test that a phrase the model wants to extend scores low."""
+        steps = [_logits("stone"), _logits("Ore")]
+        
+        assert spotter._confidence(steps, _ids("stone")) < 0.01
+    
+    def test_spot_scores_phrases_with_forced_steps(self):
+        """Test spot() end to end against a stub with CTranslate2's prompt and logits semantics."""
+        stub = _Speaker({
+            0: _ids("diamond", "ore", "."),
+            1: _ids("stone", "Ore"),  # "stone" running into another word
+            2: _ids("hello"),
+        })
+        model = _fake_model()
+        model.feature_extractor = stub.feature_extractor
+        model.encode = stub.encode
+        model.model.generate = stub.generate
+        spotter = KeywordSpotter(model, ["stone", "diamond", "diamond ore"])
+        windows = [np.full(160, float(i), dtype=np.float32) for i in range(3)]
+        
+        results = spotter.spot(windows)
+        
+        assert results[0][0] == "diamond ore"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-3)
+        assert results[1] is None
+        assert results[2] is None
+        # Constrained pass, then one forced step per phrase token plus the token after
+        assert [len(prompts) for prompts in stub.calls] == [3, 2, 2, 1]
+        assert stub.calls[-1] == [[1, 2] + _ids("diamond", "ore")]
@@ -253,6 +253,28 @@ class TestMinecraftRCON:
         assert any("execute as TestPlayer" in c for c in call_args_list)
         assert any("minecraft:grass_block" in c and "minecraft:air" in c and "replace" in c for c in call_args_list)
     
+    @patch('src.minecraft_rcon.MCRcon')
+    def test_replace_blocks_in_chunk_honours_radius(self, mock_mcrcon_class, rcon_client, mock_mcrcon):
+        """Test that a smaller radius narrows the fill box and needs fewer, taller segments."""
+        mock_mcrcon_class.return_value = mock_mcrcon
+        mock_mcrcon.command.return_value = ""
+        rcon_client.connect()
+        
+        result = rcon_client.replace_blocks_in_chunk_around_player(
+            player="TestPlayer",
+            target_block="minecraft:stone",
+            world_min_y=-64,
+            world_max_y=320,
+            radius=3,
+        )
+        
+        assert result is True
+        commands = [c[0][0] for c in mock_mcrcon.command.call_args_list]
+        # 7x7 columns allow 668 layers per fill, so the 385-block-tall world is one command
+        assert commands == [
+            "execute as TestPlayer at @s run fill ~-3 -64 ~-3 ~3 320 ~3 minecraft:air replace minecraft:stone"
+        ]
+    
     @patch('src.minecraft_rcon.MCRcon')
     def test_replace_blocks_in_chunk_around_all_players(self, mock_mcrcon_class, rcon_client, mock_mcrcon):
         """Test replacing a block in chunk around all players."""
@@ -277,6 +299,26 @@ class TestMinecraftRCON:
         
         assert results == {"P1": True, "P2": True}
     
+    @patch('src.minecraft_rcon.MCRcon')
+    def test_replace_many_in_chunk_around_all_players(self, mock_mcrcon_class, rcon_client, mock_mcrcon):
+        """Test replacing several blocks around all players with one player lookup."""
+        mock_mcrcon_class.return_value = mock_mcrcon
+        mock_mcrcon.command.return_value = ""
+        mock_mcrcon.command.side_effect = ["There are 2 of a max of 20 players online: P1, P2"] + [""] * 16
+        rcon_client.connect()
+        
+        results = rcon_client.replace_many_in_chunk_around_all_players(
+            target_blocks=["minecraft:stone", "minecraft:dirt"],
+        )
+        
+        assert results == {
+            "minecraft:stone": {"P1": True, "P2": True},
+            "minecraft:dirt": {"P1": True, "P2": True},
+        }
+        commands = [call.args[0] for call in mock_mcrcon.command.call_args_list]
+        assert commands.count("list") == 1
+        assert sum("replace minecraft:dirt" in command for command in commands) == len(commands[1:]) // 2
+    
     @patch('src.minecraft_rcon.MCRcon')
     def test_test_connection(self, mock_mcrcon_class, rcon_client, mock_mcrcon):
         """Test connection test method."""
@@ -0,0 +1,49 @@
+"""Tests for phonetic keys and the fuzzy block word index."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.phonetic import FuzzyIndex, edit_distance, phonetic_key
+
+
+class TestPhonetic:
+    """Test cases for phonetic_key and FuzzyIndex."""
+    
+    @pytest.fixture
+    def index(self):
+        """Create an index over a few block words (letters only, no spaces)."""
+        return FuzzyIndex(["cobblestone", "obsidian", "gravel", "diamondblock", "sand", "netherbrick"])
+    
+    def test_sound_alike_spellings_share_a_key(self):
+        """Test that spellings of the same sounds get the same key."""
+        assert phonetic_key("cobblestone") == phonetic_key("kobble stone")
+        assert phonetic_key("bricks") == phonetic_key("brix")
+        assert phonetic_key("stone") != phonetic_key("sand")
+    
+    def test_edit_distance_is_bounded(self):
+        """Test that distances past the limit are reported as limit + 1."""
+        assert edit_distance("gravel", "gravle", 2) == 1
+        assert edit_distance("stone", "obsidian", 2) == 3
+    
+    def test_lookup_near_misses(self, index):
+        """Test that misspelled and misheard words find their entry."""
+        assert index.lookup("obsidean") == "obsidian"
+        assert index.lookup("obsidion") == "obsidian"
+        assert index.lookup("dimondblock") == "diamondblock"
+        assert index.lookup("kobblestone") == "cobblestone"
+    
+    def test_short_and_distant_words_do_not_match(self, index):
+        """Test that short words and unrelated words are never fuzzy matches."""
+        assert index.lookup("send") is None
+        assert index.lookup("gravle") is None
+        assert index.lookup("weather") is None
+    
+    def test_sound_alike_but_misspelled_words_do_not_match(self, index):
+        """Test that a shared phonetic key alone is not enough."""
+        assert phonetic_key("obsidian") == phonetic_key("absidoon")
+        assert index.lookup("absidoon") is None
+        assert index.lookup("neitherbreak") is None
@@ -0,0 +1,141 @@
+"""Tests for the multi-process Whisper pool, with a fake worker in place of Whisper."""
+import asyncio
+import pytest
+import numpy as np
+import sys
+import time
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import process_pool
+from src.process_pool import WhisperProcessPool, WorkerError
+
+
+def _fake_worker(conn, shm_name, model_sizes, device, compute_type, cpu_threads):
+    """Worker that "transcribes" a window as the sum of its samples, read from shared memory."""
+    shm = SharedMemory(name=shm_name)
+    samples = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+    try:
+        if model_sizes[0] == 'broken':
+            conn.send(('error', 'no such model'))
+            return
+        conn.send(('ready', None))
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+            if message[0] == 'ping':
+                conn.send(('pong', None))
+                continue
+            lengths = message[1]
+            offsets = np.cumsum([0] + lengths)
+            conn.send(('ok', [f"{samples[offsets[i]:offsets[i + 1]].sum():.1f}" for i in range(len(lengths))]))
+    finally:
+        del samples
+        shm.close()
+
+
+class TestWhisperProcessPool:
+    """Test cases for WhisperProcessPool class."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the pool."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @staticmethod
+    def _pool(model_size='tiny', **kwargs):
+        """Create a one-worker pool running the fake worker."""
+        return WhisperProcessPool(model_size, workers=1, max_batch=2, timeout=10.0, worker_target=_fake_worker, **kwargs)
+    
+    def test_windows_round_trip_through_shared_memory(self, loop):
+        """Test that batched windows reach the worker intact and results come back in order."""
+        pool = self._pool()
+        
+        async def scenario():
+            try:
+                return await pool.transcribe(
+                    [np.full(1000, 0.5, dtype=np.float32), np.full(10, 2.0, dtype=np.float32)], None, ""
+                )
+            finally:
+                await pool.stop()
+        
+        assert loop.run_until_complete(scenario()) == ["500.0", "20.0"]
+    
+    def test_killed_worker_is_restarted(self, loop):
+        """Test that a worker that died while idle is respawned before its next request."""
+        pool = self._pool()
+        
+        async def scenario():
+            try:
+                await pool.start()
+                handle = pool._handles[0]
+                handle.process.kill()
+                handle.process.join()
+                result = await pool.transcribe([np.ones(4, dtype=np.float32)], None, "")
+                return result, pool.restarts, handle.process.is_alive()
+            finally:
+                await pool.stop()
+        
+        result, restarts, alive = loop.run_until_complete(scenario())
+        
+        assert result == ["4.0"]
+        assert restarts == 1
+        assert alive
+    
+    def test_health_check_survives_missing_connection(self, loop, monkeypatch):
+        """Test that the health loop restarts a dead worker and a handle without a pipe, and keeps running."""
+        monkeypatch.setattr(process_pool, 'HEALTH_CHECK_INTERVAL', 0.05)
+        pool = self._pool()
+        
+        async def scenario():
+            try:
+                await pool.start()
+                handle = pool._handles[0]
+                pool._kill(handle)  # As if a restart had failed halfway
+                deadline = time.monotonic() + 10
+                while pool.restarts < 1 and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                handle.process.kill()
+                handle.process.join()
+                while pool.restarts < 2 and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                return pool.restarts, pool._health_task.done()
+            finally:
+                await pool.stop()
+        
+        restarts, health_done = loop.run_until_complete(scenario())
+        
+        assert restarts == 2
+        assert health_done is False
+    
+    def test_failed_start_releases_shared_memory(self, loop):
+        """Test that shared-memory segments are unlinked when a worker fails to load."""
+        pool = self._pool('broken')
+        names = []
+        
+        original_spawn = pool._spawn
+        
+        def spawn(handle):
+            names.append(handle.shm.name)
+            original_spawn(handle)
+        
+        pool._spawn = spawn
+        
+        with pytest.raises(WorkerError):
+            loop.run_until_complete(pool.start())
+        
+        assert names
+        for name in names:
+            with pytest.raises(FileNotFoundError):
+                SharedMemory(name=name)
+        assert pool._handles == []
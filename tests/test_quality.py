@@ -0,0 +1,77 @@
+"""Tests for the adaptive quality controller."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.quality import QualityController, QualityTier, parse_tiers
+
+TIERS = [QualityTier("small", 5), QualityTier("base", 2), QualityTier("tiny", 1)]
+
+
+class TestQualityController:
+    """Test cases for QualityController class."""
+    
+    @pytest.fixture
+    def controller(self):
+        """Create a controller with no cooldown and two samples per decision."""
+        return QualityController(TIERS, cooldown_seconds=0.0, min_samples=2)
+    
+    @staticmethod
+    def _feed(controller, rtf, lag_ms=0.0, count=2):
+        """Report count decodes of 1s audio at the given RTF on the current tier."""
+        for _ in range(count):
+            controller.record(1.0, rtf, lag_ms, controller.tier)
+    
+    def test_parse_tiers(self):
+        """Test that tier lists parse best first and missing beams default to 1."""
+        assert parse_tiers("small:5, base:2,tiny") == [
+            QualityTier("small", 5), QualityTier("base", 2), QualityTier("tiny", 1)
+        ]
+        assert parse_tiers("") == []
+    
+    def test_steps_down_when_slow(self, controller):
+        """Test that a high real-time factor moves to the next cheaper tier."""
+        self._feed(controller, rtf=1.2)
+        
+        assert controller.tier == QualityTier("base", 2)
+    
+    def test_steps_down_on_lag(self, controller):
+        """Test that queue lag alone forces a step down."""
+        self._feed(controller, rtf=0.5, lag_ms=3000.0)
+        
+        assert controller.tier == QualityTier("base", 2)
+    
+    def test_steps_up_after_recovery(self, controller):
+        """Test that a comfortably fast tier steps back up."""
+        self._feed(controller, rtf=1.2)
+        self._feed(controller, rtf=0.1)
+        
+        assert controller.tier == QualityTier("small", 5)
+        assert controller.switches == 2
+    
+    def test_holds_in_between(self, controller):
+        """Test that an RTF between the thresholds keeps the current tier."""
+        self._feed(controller, rtf=0.5, count=10)
+        
+        assert controller.tier == QualityTier("small", 5)
+    
+    def test_cooldown_prevents_flapping(self):
+        """Test that no second switch happens inside the cooldown."""
+        controller = QualityController(TIERS, cooldown_seconds=60.0, min_samples=1)
+        controller._switched_at -= 60.0  # Startup cooldown already over
+        self._feed(controller, rtf=1.2, count=1)
+        self._feed(controller, rtf=1.2, count=5)
+        
+        assert controller.tier == QualityTier("base", 2)
+    
+    def test_stale_tier_samples_are_ignored(self, controller):
+        """Test that decodes finishing on an old tier don't drive the current one."""
+        self._feed(controller, rtf=1.2)
+        for _ in range(5):
+            controller.record(1.0, 1.2, 0.0, QualityTier("small", 5))
+        
+        assert controller.tier == QualityTier("base", 2)
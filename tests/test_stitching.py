@@ -0,0 +1,57 @@
+"""Tests for stitching transcripts of overlapping windows."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.stitching import TranscriptStitcher
+
+
+class TestTranscriptStitcher:
+    """Test cases for TranscriptStitcher class (3s windows, 1s overlap, so a 2s hop)."""
+    
+    @pytest.fixture
+    def stitcher(self):
+        """Create a stitcher for 3s windows overlapping by 1s."""
+        return TranscriptStitcher(window_seconds=3.0, overlap_seconds=1.0)
+    
+    def test_word_in_overlap_emitted_once(self, stitcher):
+        """Test that a word both windows heard is emitted by only one of them."""
+        first = stitcher.stitch(0.0, [(0.2, 0.6, " place"), (2.2, 2.7, " stone")])
+        second = stitcher.stitch(2.0, [(0.25, 0.7, " Stone."), (1.2, 1.6, " now")])
+        
+        assert first == "place stone"
+        assert second == "now"
+        assert stitcher.duplicates == 1
+    
+    def test_word_cut_at_edge_taken_from_next_window(self, stitcher):
+        """Test that a word straddling a window's end comes from the window that heard it whole."""
+        first = stitcher.stitch(0.0, [(0.3, 0.8, " dig"), (2.7, 3.0, " dia")])
+        second = stitcher.stitch(2.0, [(0.6, 1.4, " diamond")])
+        
+        assert first == "dig"
+        assert second == "diamond"
+    
+    def test_out_of_order_windows(self, stitcher):
+        """Test that windows finishing out of order still emit each word once."""
+        later = stitcher.stitch(2.0, [(0.3, 0.7, " stone"), (1.5, 1.9, " dirt")])
+        earlier = stitcher.stitch(0.0, [(0.1, 0.5, " grass"), (2.3, 2.7, " stone")])
+        
+        assert later == "stone dirt"
+        assert earlier == "grass"
+    
+    def test_repeated_word_at_different_times(self, stitcher):
+        """Test that saying a word twice is not mistaken for a duplicate."""
+        first = stitcher.stitch(0.0, [(0.2, 0.6, " stone")])
+        second = stitcher.stitch(2.0, [(0.8, 1.2, " stone")])
+        
+        assert first == "stone"
+        assert second == "stone"
+    
+    def test_final_window_owns_its_tail(self, stitcher):
+        """Test that the last window of a stream keeps words up to its end."""
+        assert stitcher.stitch(2.0, [(2.8, 3.0, " sand")]) == ""
+        assert stitcher.stitch(2.0, [(2.8, 3.0, " sand")], final=True) == "sand"
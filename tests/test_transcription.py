@@ -0,0 +1,366 @@
+"""Tests for per-guild transcription sessions and model warm-up."""
+import asyncio
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add project root to path and import as package
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import Config
+from src.audio import SpeechGate
+from src import transcription
+from src.transcription import TranscriptionService
+
+# 20ms of 48kHz stereo PCM16 silence, as Discord delivers it
+SILENT_PACKET = np.zeros(960 * 2, dtype=np.int16).tobytes()
+# 20ms of a loud tone (treated as speech by the stub gate below)
+SPEECH_PACKET = (np.sin(np.arange(960 * 2) * 0.05) * 8000).astype(np.int16).tobytes()
+
+
+def _loudness_gate(self, samples):
+    """Stand-in for SpeechGate.classify: any 20ms frame with signal is speech."""
+    frames = len(samples) // 320
+    return [bool(np.abs(frame).max() > 0.01) for frame in samples[:frames * 320].reshape(-1, 320)]
+
+
+class TestTranscriptionSessions:
+    """Test cases for TranscriptionService sessions."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the service."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @pytest.fixture
+    def service(self):
+        """Create a service that skips model loading."""
+        service = TranscriptionService()
+        service.load_state = "ready"
+        yield service
+        service.executor.shutdown(wait=False)
+    
+    def test_stopping_one_guild_keeps_the_other(self, loop, service):
+        """Test that stop_session only ends the given guild's session."""
+        async def scenario():
+            await service.start_session(1)
+            await service.start_session(2)
+            await service.stop_session(1)
+            await service.process_audio_chunk(SILENT_PACKET, user_id=10, ssrc=100, guild_id=1)
+            await service.process_audio_chunk(SILENT_PACKET, user_id=20, ssrc=200, guild_id=2)
+        
+        loop.run_until_complete(scenario())
+        
+        assert service.is_transcribing
+        assert service.get_session(1) is None
+        assert list(service.get_session(2).streams) == [200]
+    
+    def test_set_vocabulary_replaces_hotwords_and_keywords(self, service):
+        """Test that a vocabulary swap updates hotwords and keywords together."""
+        service.set_vocabulary(["Stone", "diamond block"])
+        service.set_vocabulary(["gravel"])
+        
+        assert service.hotwords == "gravel"
+        assert service.keywords == ["gravel"]
+    
+    def test_same_ssrc_in_two_guilds_is_isolated(self, loop, service):
+        """Test that equal SSRCs in different guilds get separate streams."""
+        async def scenario():
+            await service.start_session(1)
+            await service.start_session(2)
+            await service.process_audio_chunk(SILENT_PACKET, user_id=10, ssrc=100, guild_id=1)
+            await service.process_audio_chunk(SILENT_PACKET, user_id=20, ssrc=100, guild_id=2)
+        
+        loop.run_until_complete(scenario())
+        
+        first = service.get_session(1)
+        second = service.get_session(2)
+        assert first.streams[100] is not second.streams[100]
+        assert first.user_id_map[100] == 10
+        assert second.user_id_map[100] == 20
+    
+    def test_transcript_carries_guild(self, loop, service):
+        """Test that transcripts are delivered with their session's guild."""
+        received = []
+        
+        async def callback(text, user_id, timestamp, guild_id):
+            received.append((text, user_id, guild_id))
+        
+        service.set_transcript_callback(callback)
+        
+        async def scenario():
+            session = await service.start_session(7)
+            stream = service._get_stream(session, 100)
+            await service._handle_transcript(10, stream, 0, "stone")
+        
+        loop.run_until_complete(scenario())
+        
+        assert received == [("stone", 10, 7)]
+    
+    def test_results_after_stop_are_discarded(self, loop, service):
+        """Test that a transcript finishing after its session stopped is not delivered."""
+        received = []
+        
+        async def callback(**kwargs):
+            received.append(kwargs)
+        
+        service.set_transcript_callback(callback)
+        
+        async def scenario():
+            session = await service.start_session(7)
+            stream = service._get_stream(session, 100)
+            await service.stop_session(7)
+            await service._handle_transcript(10, stream, 0, "stone")
+        
+        loop.run_until_complete(scenario())
+        
+        assert received == []
+    
+    def test_overlapping_windows(self, loop, service, monkeypatch):
+        """Test that fixed windows advance by window minus overlap and carry their stream position."""
+        monkeypatch.setattr(Config, 'WHISPER_SEGMENTATION', 'fixed', raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_CHUNK_SECONDS', 1, raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_WINDOW_OVERLAP_SECONDS', 0.25, raising=False)
+        monkeypatch.setattr(Config, 'SPEECH_GATE_ENABLED', False, raising=False)
+        submitted = []
+        monkeypatch.setattr(
+            service.scheduler, 'submit',
+            lambda key, audio, on_result, **kwargs: submitted.append((len(audio), on_result.args[2], kwargs)),
+        )
+        
+        async def scenario():
+            await service.start_session(1)
+            for _ in range(125):  # 2.5s of 20ms packets
+                await service.process_audio_chunk(SILENT_PACKET, user_id=10, ssrc=100, guild_id=1)
+        
+        loop.run_until_complete(scenario())
+        
+        assert [(length, start) for length, start, _ in submitted] == [(16000, 0), (16000, 12000), (16000, 24000)]
+        assert all(kwargs == {'mergeable': False} for _, _, kwargs in submitted)
+    
+    def test_end_session_emits_trailing_words(self, loop, service, monkeypatch):
+        """Test that teardown flushes the last overlapping window before the session is removed."""
+        monkeypatch.setattr(Config, 'WHISPER_SEGMENTATION', 'fixed', raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_CHUNK_SECONDS', 1, raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_WINDOW_OVERLAP_SECONDS', 0.25, raising=False)
+        monkeypatch.setattr(Config, 'SPEECH_GATE_ENABLED', False, raising=False)
+        monkeypatch.setattr(service.scheduler, 'submit', lambda *args, **kwargs: None)
+        
+        async def decode(audio, beam_size=None):
+            return [(0.3, 0.5, "more"), (0.6, 0.9, "stone")]
+        
+        monkeypatch.setattr(service, '_decode', decode)
+        received = []
+        
+        async def callback(text, user_id, timestamp, guild_id):
+            received.append((text, guild_id))
+        
+        service.set_transcript_callback(callback)
+        
+        async def scenario():
+            await service.start_session(1)
+            for _ in range(75):  # 1.5s of 20ms packets: one full window, then a partial one
+                await service.process_audio_chunk(SILENT_PACKET, user_id=10, ssrc=100, guild_id=1)
+            await service.end_session(1)
+        
+        loop.run_until_complete(scenario())
+        
+        assert received == [("more stone", 1)]
+        assert service.get_session(1) is None
+    
+    def test_block_name_split_across_windows_is_detected(self, loop, service, monkeypatch):
+        """Test that a name split between two stitched emissions is delivered whole, and only once."""
+        monkeypatch.setattr(Config, 'WHISPER_SEGMENTATION', 'fixed', raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_CHUNK_SECONDS', 1, raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_WINDOW_OVERLAP_SECONDS', 0.25, raising=False)
+        monkeypatch.setattr(Config, 'SPEECH_GATE_ENABLED', False, raising=False)
+        service.set_keyword_matcher(
+            lambda text: next((word for word in ("diamond block", "dirt") if word in text), None)
+        )
+        received = []
+        
+        async def callback(text, user_id, timestamp, guild_id):
+            received.append(text)
+        
+        service.set_transcript_callback(callback)
+        
+        async def scenario():
+            await service.start_session(1)
+            await service.process_audio_chunk(SILENT_PACKET, user_id=10, ssrc=100, guild_id=1)
+            stream = service.get_session(1).streams[100]
+            await service._handle_window_words(10, stream, 0, [(0.1, 0.3, "dirt"), (0.4, 0.7, "diamond")])
+            await service._handle_window_words(10, stream, 12000, [(0.05, 0.3, "block"), (0.4, 0.6, "please")])
+            await service._handle_window_words(10, stream, 24000, [(0.05, 0.3, "thanks")], final=True)
+        
+        loop.run_until_complete(scenario())
+        
+        assert received == ["dirt diamond", "diamond block please", "thanks"]
+    
+    def test_utterance_ends_when_packets_stop(self, loop, service, monkeypatch):
+        """Test that speech followed by no packets at all (Discord DTX) still ends the utterance promptly."""
+        monkeypatch.setattr(Config, 'WHISPER_SEGMENTATION', 'utterance', raising=False)
+        monkeypatch.setattr(Config, 'UTTERANCE_TRAILING_SILENCE_MS', 100, raising=False)
+        monkeypatch.setattr(SpeechGate, 'classify', _loudness_gate)
+        submitted = []
+        monkeypatch.setattr(
+            service.scheduler, 'submit',
+            lambda key, audio, on_result, **kwargs: submitted.append((len(audio), on_result.args[2])),
+        )
+        
+        async def scenario():
+            await service.start_session(1)
+            for _ in range(10):  # 200ms of speech, then the speaker's packets stop
+                await service.process_audio_chunk(SPEECH_PACKET, user_id=10, ssrc=100, guild_id=1)
+            stream = service.get_session(1).streams[100]
+            open_before = stream.segmenter.in_utterance
+            await asyncio.sleep(0.2)
+            return stream, open_before
+        
+        stream, open_before = loop.run_until_complete(scenario())
+        
+        assert open_before is True
+        assert len(submitted) == 1
+        assert submitted[0][1] == 1  # Utterance ID
+        assert stream.segmenter.in_utterance is False
+        assert len(stream.buffer) == 0
+    
+    def _streaming(self, service, monkeypatch):
+        """Enable streaming partials with a keyword matcher; returns the delivered transcripts."""
+        monkeypatch.setattr(Config, 'WHISPER_SEGMENTATION', 'utterance', raising=False)
+        monkeypatch.setattr(Config, 'WHISPER_STREAMING', True, raising=False)
+        monkeypatch.setattr(Config, 'STREAMING_STABLE_HITS', 2, raising=False)
+        monkeypatch.setattr(SpeechGate, 'classify', _loudness_gate)
+        service.set_keyword_matcher(lambda text: "stone" if "stone" in text.lower() else None)
+        received = []
+        
+        async def callback(text, user_id, timestamp, guild_id):
+            received.append(text)
+        
+        service.set_transcript_callback(callback)
+        return received
+    
+    def test_stable_partial_triggers_once(self, loop, service, monkeypatch):
+        """Test that a keyword fires only once consecutive partials agree, and only once per utterance."""
+        received = self._streaming(service, monkeypatch)
+        
+        async def scenario():
+            session = await service.start_session(1)
+            stream = service._get_stream(session, 100)
+            stream.utterance_id = 1
+            await service._handle_partial(10, stream, 1, "dig the")
+            await service._handle_partial(10, stream, 1, "dig the stone")
+            first = list(received)
+            await service._handle_partial(10, stream, 1, "dig the stone")
+            await service._handle_partial(10, stream, 1, "dig the stone please")
+            return first
+        
+        first = loop.run_until_complete(scenario())
+        
+        assert first == []  # One partial naming the keyword isn't stable yet
+        assert received == ["dig the stone"]
+    
+    def test_final_transcript_does_not_trigger_again(self, loop, service, monkeypatch):
+        """Test that the utterance's final decode doesn't repeat an early trigger, but a new utterance can."""
+        received = self._streaming(service, monkeypatch)
+        
+        async def scenario():
+            session = await service.start_session(1)
+            stream = service._get_stream(session, 100)
+            stream.utterance_id = 1
+            for _ in range(2):
+                await service._handle_partial(10, stream, 1, "stone")
+            await service._handle_transcript(10, stream, 1, "Stone.")
+            stream.utterance_id = 2
+            await service._handle_transcript(10, stream, 2, "stone again")
+        
+        loop.run_until_complete(scenario())
+        
+        assert received == ["stone", "stone again"]
+    
+    def test_partial_dropped_while_speaker_has_queued_window(self, loop, service, monkeypatch):
+        """Test that a partial is rejected (not queued) when the speaker already has a window waiting."""
+        self._streaming(service, monkeypatch)
+        monkeypatch.setattr(Config, 'STREAMING_INTERVAL_MS', 20, raising=False)
+        decoded = []
+        
+        async def decode(audio, beam_size=None):
+            decoded.append(beam_size)
+            return ""
+        
+        monkeypatch.setattr(service.scheduler, '_decode', decode)
+        
+        async def scenario():
+            session = await service.start_session(1)
+            stream = service._get_stream(session, 100)
+            service._submit_window(np.zeros(1600, dtype=np.float32), 10, stream, 0)
+            for _ in range(5):  # Opens an utterance; its first partial finds the window still queued
+                await service.process_audio_chunk(SPEECH_PACKET, user_id=10, ssrc=100, guild_id=1)
+            inflight = stream.partial_inflight
+            await asyncio.sleep(0.05)
+            await service.stop_session(1)
+            return stream, inflight
+        
+        stream, inflight = loop.run_until_complete(scenario())
+        
+        assert inflight is True
+        assert stream.partial_inflight is False  # Rejection handed back, so the next partial can go
+        assert service.scheduler.submitted == 2
+        assert decoded == [None]  # Only the queued window was decoded
+
+
+class TestModelLoading:
+    """Test cases for model preload, warm-up and readiness."""
+    
+    @pytest.fixture
+    def loop(self):
+        """Create an event loop for the service."""
+        loop = asyncio.new_event_loop()
+        yield loop
+        loop.close()
+    
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Create a service whose Whisper model is a stand-in (nothing is downloaded)."""
+        monkeypatch.setattr(transcription, 'WhisperModel', lambda model_size, **kwargs: object())
+        service = TranscriptionService()
+        yield service
+        service.executor.shutdown(wait=False)
+    
+    def test_warm_up_runs_once_before_ready(self, loop, service, monkeypatch):
+        """Test that startup warms the model up once and readiness flips only after it ran."""
+        states = []
+        monkeypatch.setattr(transcription, 'warm_up', lambda model: states.append(service.load_state))
+        
+        async def scenario():
+            service.start_preload()
+            service.start_preload()  # A second ready event reuses the running preload
+            await service._preload_task
+            await service._ensure_model()  # First session: already loaded
+        
+        loop.run_until_complete(scenario())
+        
+        assert states == ["loading"]
+        assert service.load_state == "ready"
+        assert service.model is not None
+    
+    def test_failed_warm_up_does_not_block_startup(self, loop, service, monkeypatch, caplog):
+        """Test that a warm-up error is logged but the model still becomes ready."""
+        def warm_up(model):
+            raise RuntimeError("no decoder")
+        
+        monkeypatch.setattr(transcription, 'warm_up', warm_up)
+        
+        async def scenario():
+            service.start_preload()
+            await service._preload_task
+        
+        with caplog.at_level("WARNING"):
+            loop.run_until_complete(scenario())
+        
+        assert service.load_state == "ready"
+        assert service.model is not None
+        assert "Whisper warm-up failed: no decoder" in caplog.text